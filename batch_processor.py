@@ -9,47 +9,148 @@ import sys
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+import cleaning_recipe
+import compressed_io
+import csv_schema
+import dedup
+import format_converter
+import validation
+import zone_map
+
 
 class BatchProcessor:
     """Process multiple files in batch mode"""
 
-    def __init__(self, input_dir, output_dir, workers=4):
-        """Initialize batch processor"""
+    def __init__(self, input_dir, output_dir, workers=4, dedup_columns=None,
+                 chunksize=100000, memory_limit_mb=256, rules=None,
+                 output_format=None):
+        """Initialize batch processor
+
+        CSV files are deduplicated in chunks of ``chunksize`` rows, each
+        file's hash set spilling to disk beyond ``memory_limit_mb``.
+        With ``rules`` (a rule-set file or parsed spec) every file is
+        validated first and failing rows go to ``quarantine_<name>``.
+        With ``output_format`` (e.g. 'parquet') results are written in
+        that format, as ``processed_<name>.<output_format>``.
+        """
         self.input_dir = Path(input_dir)
         self.output_dir = Path(output_dir)
         self.workers = workers
+        self.dedup_columns = dedup_columns
+        self.chunksize = chunksize
+        self.memory_limit_mb = memory_limit_mb
+        self.output_format = output_format
+        if output_format is not None and (
+            f".{output_format}" not in format_converter.STREAMING
+        ):
+            raise ValueError(f"Unsupported output format: {output_format}")
+        self.rules = (cleaning_recipe.read_document(rules)
+                      if isinstance(rules, (str, Path)) else rules)
+        if self.rules is not None:
+            # Fail on a bad rule set before any file is processed
+            validation.Validator.from_spec(self.rules)
+        self.validators = {}
 
         # Create output directory
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
     def process_file(self, file_path):
-        """Process a single file"""
+        """Process a single file
+
+        Every file is cleaned as CSV in chunks: JSON, JSON Lines, .xlsx,
+        Parquet, Feather and Arrow inputs are first streamed into a
+        temporary CSV, and other output formats are streamed from one.
+        Without ``output_format`` each result keeps its input's format
+        (.xls inputs become ``processed_<stem>.csv``).
+        Compressed CSV and JSON inputs (.csv.gz, .jsonl.bz2, ...) are
+        decompressed as they are read; a compressed CSV keeps its codec.
+        """
+        temporary = []
         try:
-            # Read file
-            if file_path.suffix == '.csv':
-                df = pd.read_csv(file_path)
-            elif file_path.suffix == '.json':
-                df = pd.read_json(file_path)
-            elif file_path.suffix in ['.xlsx', '.xls']:
-                df = pd.read_excel(file_path)
-            else:
-                return False, f"Unsupported format: {file_path.suffix}"
-
-            # Process data (example: remove duplicates)
-            df = df.drop_duplicates()
-
-            # Save processed file
             output_file = self.output_dir / f"processed_{file_path.name}"
-            df.to_csv(output_file, index=False)
 
+            # Process data (example: remove duplicates)
+            source = file_path
+            suffix = format_converter.file_format(file_path)
+            if suffix == '.csv':
+                pass
+            elif suffix in format_converter.STREAMING:
+                source = self.output_dir / f".{file_path.name}.csv"
+                temporary.append(source)
+                format_converter.stream_convert(file_path, source,
+                                                self.chunksize)
+            elif suffix == '.xls':
+                source = self.output_dir / f".{file_path.name}.csv"
+                temporary.append(source)
+                pd.read_excel(file_path).to_csv(source, index=False)
+            else:
+                return False, f"Unsupported format: {suffix}"
+
+            if self.rules is not None:
+                valid = self.output_dir / f".valid_{file_path.name}"
+                temporary.append(valid)
+                validation.validate_csv(
+                    source, valid, self.quarantine_path(file_path),
+                    self.validator(file_path), self.chunksize
+                )
+                source = valid
+
+            # Results keep the input's format unless told otherwise;
+            # .xls input, which cannot be written back, becomes CSV
+            if self.output_format is not None:
+                output_suffix = f".{self.output_format}"
+            elif suffix in format_converter.STREAMING:
+                output_suffix = suffix
+            else:
+                output_suffix = '.csv'
+                output_file = self.output_dir / (
+                    f"processed_{file_path.stem}.csv"
+                )
+            if suffix != output_suffix and self.output_format is not None:
+                if compressed_io.detect(output_file, magic=False):
+                    output_file = output_file.with_suffix('')
+                output_file = output_file.with_name(
+                    output_file.name + output_suffix
+                )
+
+            deduped = output_file
+            if output_suffix != '.csv':
+                deduped = self.output_dir / f".dedup_{file_path.name}.csv"
+                temporary.append(deduped)
+
+            dedup.dedup_csv(source, deduped, subset=self.dedup_columns,
+                            chunksize=self.chunksize,
+                            memory_limit_mb=self.memory_limit_mb,
+                            parse_dates=False)
+            if deduped != output_file:
+                format_converter.stream_convert(deduped, output_file,
+                                                self.chunksize)
             return True, f"Processed {file_path.name}"
 
         except Exception as e:
             return False, f"Error processing {file_path.name}: {e}"
 
+        finally:
+            for path in temporary:
+                Path(path).unlink(missing_ok=True)
+
+    def validator(self, file_path):
+        """Fresh validator for one file, kept for the summary"""
+        validator = validation.Validator.from_spec(self.rules)
+        self.validators[file_path.name] = validator
+        return validator
+
+    def quarantine_path(self, file_path):
+        """Quarantine file for the failing rows of one input"""
+        return self.output_dir / f"quarantine_{file_path.stem}.csv"
+
     def process_directory(self, pattern='*.csv', parallel=True):
         """Process all files in directory"""
-        files = list(self.input_dir.glob(pattern))
+        files = [
+            f for f in self.input_dir.glob(pattern)
+            if not f.name.endswith((csv_schema.SIDECAR_SUFFIX,
+                                    zone_map.INDEX_SUFFIX))
+        ]
 
         if not files:
             print(f"❌ No files found matching pattern: {pattern}")
@@ -117,6 +218,16 @@ class BatchProcessor:
         print("=" * 50)
         print(f"✅ Successful: {success}")
         print(f"❌ Failed: {fail}")
+        if self.validators:
+            rows = sum(v.rows for v in self.validators.values())
+            quarantined = sum(v.quarantined
+                              for v in self.validators.values())
+            print(f"🔎 Quarantined: {quarantined} of {rows} rows")
+            for name in self.validators[next(iter(self.validators))].counts:
+                count = sum(v.counts[name] for v in self.validators.values())
+                seconds = sum(v.timings[name]
+                              for v in self.validators.values())
+                print(f"   {name:<36}{count:>10} rows{seconds:8.2f}s")
         print(f"📁 Output directory: {self.output_dir}")
         print("=" * 50)
 
@@ -134,14 +245,41 @@ def main():
                         help='Enable parallel processing')
     parser.add_argument('--workers', type=int, default=4,
                         help='Number of parallel workers')
+    parser.add_argument('--dedup-columns',
+                        help='Comma-separated columns that identify a '
+                             'duplicate (default: all)')
+    parser.add_argument('--chunksize', type=int, default=100000,
+                        help='Rows per chunk when deduplicating CSV files')
+    parser.add_argument('--memory-limit', type=int, default=256,
+                        help='Per-file memory budget in MB for the dedup '
+                             'hash set before it spills to disk')
+    parser.add_argument('--rules',
+                        help='JSON/YAML validation rule set; failing rows '
+                             'go to quarantine_<name>.csv')
+    parser.add_argument('--output-format',
+                        choices=[suffix[1:] for suffix in
+                                 format_converter.STREAMING],
+                        help='Write results in this format (e.g. parquet) '
+                             'as processed_<name>.<format> (default: each '
+                             "input's own format)")
 
     args = parser.parse_args()
 
-    processor = BatchProcessor(
-        args.input_dir,
-        args.output_dir,
-        args.workers
-    )
+    try:
+        processor = BatchProcessor(
+            args.input_dir,
+            args.output_dir,
+            args.workers,
+            dedup_columns=([c.strip() for c in args.dedup_columns.split(',')]
+                           if args.dedup_columns else None),
+            chunksize=args.chunksize,
+            memory_limit_mb=args.memory_limit,
+            rules=args.rules,
+            output_format=args.output_format
+        )
+    except Exception as e:
+        print(f"❌ Error loading rules: {e}")
+        sys.exit(1)
 
     processor.process_directory(
         pattern=args.pattern,
@@ -151,51 +289,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
-# Refactor build process in file handler - 2025-10-12 03:10:13
-# Improved readability
-data = [
-    item
-    for item in collection
-    if item.is_valid()
-]
-
-# Patch configuration - 2025-10-12 03:26:29
-# Modified: 2025-10-12 03:26:29
-CONFIG_VALUE = 'new_value'
-
-# Build backup routine - 2025-10-19 17:43:32
-# Improved: 2025-10-19 17:43:32
-# Additional configuration
-
-# Correct race condition issue - 2025-10-21 07:07:47
-def handle_error(error):
-    """Handle error gracefully"""
-    logger.error(f'Error: {error}')
-    return None
-
-# Revise dependency - 2025-10-31 09:38:20
-# Improved: 2025-10-31 09:38:20
-# Additional configuration
-
-# Adjust authentication flow - 2025-11-10 13:10:02
-# Modified: 2025-11-10 13:10:02
-CONFIG_VALUE = 'new_value'
-
-# Refactor caching mechanism - 2025-11-17 10:10:56
-# Improved readability
-data = [
-    item
-    for item in collection
-    if item.is_valid()
-]
-
-# Clean helper function in data processor - 2025-11-28 07:22:10
-# Enhanced: 2025-11-28 07:22:10
-"""Documentation updated"""
-
-# Address logging system issue - 2026-02-04 17:46:28
-async def async_operation():
-    """Async operation support"""
-    result = await fetch_data()
-    return process(result)
\ No newline at end of file
@@ -0,0 +1,3 @@
+"""
+Benchmarks - Synthetic datasets and a throughput harness for the CLIs
+"""
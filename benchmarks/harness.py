@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Harness - Time the command-line tools on synthetic data at several scales
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import synthetic
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_SCALES = (10000, 100000, 1000000)
+BATCH_FILES = 4
+
+# Sidecars the tools write next to their inputs; removed before each run
+# so every measurement starts cold unless --warm is given
+SIDECAR_SUFFIXES = ('.schema.json', '.zonemap.json')
+
+DATASET = {
+    'columns': 9,
+    'null_rate': 0.02,
+    'duplicate_rate': 0.01,
+    'outlier_rate': 0.001,
+    'cardinality': 50,
+}
+
+# name -> (script, argument template, largest scale it is run at)
+# {input}, {output} and {dir}/{outdir} are filled in per run
+CASES = {
+    'csv_processor.filter': (
+        'csv_processor.py',
+        ['{input}', '{output}.csv', '--filter', 'float_0 > 100'], None),
+    'csv_processor.sort': (
+        'csv_processor.py',
+        ['{input}', '{output}.csv', '--sort', 'float_1'], None),
+    'csv_processor.top_n': (
+        'csv_processor.py',
+        ['{input}', '{output}.csv', '--sort=-float_1', '--limit', '100',
+         '--chunksize', '100000'], None),
+    'csv_processor.external_sort': (
+        'csv_processor.py',
+        ['{input}', '{output}.csv', '--sort', 'float_1',
+         '--chunksize', '100000', '--memory-limit', '64'], None),
+    'csv_processor.aggregate': (
+        'csv_processor.py',
+        ['{input}', '{output}.csv', '--group-by', 'category_0',
+         '--agg', 'float_0:sum,float_0:mean,int_0:max',
+         '--chunksize', '100000'], None),
+    'data_cleaner.clean': (
+        'data_cleaner.py',
+        ['{input}', '--output', '{output}.csv', '--remove-duplicates',
+         '--fill-missing', 'mean', '--remove-outliers'], None),
+    'format_converter.csv_json': (
+        'format_converter.py', ['{input}', '{output}.json'], None),
+    'format_converter.csv_ndjson': (
+        'format_converter.py', ['{input}', '{output}.jsonl'], None),
+    'format_converter.csv_xlsx': (
+        'format_converter.py', ['{input}', '{output}.xlsx'], 100000),
+    'batch_processor.parallel': (
+        'batch_processor.py',
+        ['--input-dir', '{dir}', '--output-dir', '{outdir}', '--parallel'],
+        None),
+}
+
+
+def environment():
+    """Describe the machine and library versions behind a result"""
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def run_command(command, cwd, log_path):
+    """Run a script, returning ``(returncode, wall seconds, peak MB)``
+
+    The script runs under ``benchmarks.measure``, which records its peak
+    memory including worker processes; output goes to ``log_path``.
+    """
+    stats_path = log_path.with_suffix('.stats.json')
+    stats_path.unlink(missing_ok=True)
+    with open(log_path, 'wb') as log:
+        start = time.perf_counter()
+        returncode = subprocess.call(
+            [command[0], '-m', 'benchmarks.measure', str(stats_path)]
+            + command[1:],
+            cwd=cwd, stdout=log, stderr=subprocess.STDOUT
+        )
+        wall = time.perf_counter() - start
+    try:
+        with open(stats_path, encoding='utf-8') as f:
+            peak = json.load(f)['peak_rss_mb']
+    except (OSError, ValueError, KeyError):
+        peak = None
+    return returncode, wall, peak
+
+
+def clear_sidecars(paths):
+    """Remove schema and zone map sidecars next to the given inputs"""
+    for path in paths:
+        for suffix in SIDECAR_SUFFIXES:
+            Path(str(path) + suffix).unlink(missing_ok=True)
+
+
+def prepare_data(data_dir, rows, seed):
+    """Generate (or reuse) the single file and batch directory for a scale
+
+    Returns ``(csv_path, batch_dir)``.
+    """
+    options = dict(DATASET, seed=seed)
+    stem = f"synthetic_{rows}_{seed}"
+    csv_path = data_dir / f"{stem}.csv"
+    if not csv_path.exists():
+        print(f"📝 Generating {rows} rows → {csv_path}")
+        synthetic.write_csv(csv_path, rows, **options)
+
+    batch_dir = data_dir / f"{stem}_batch"
+    if not batch_dir.exists():
+        tmp = batch_dir.with_name(batch_dir.name + '.tmp')
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+        for i in range(BATCH_FILES):
+            part_options = dict(options, seed=seed + i + 1)
+            synthetic.write_csv(tmp / f"part_{i}.csv",
+                                rows // BATCH_FILES, **part_options)
+        os.replace(tmp, batch_dir)
+    return csv_path, batch_dir
+
+
+def run_case(name, rows, csv_path, batch_dir, work_dir, repeat=1,
+             warm=False):
+    """Run one case ``repeat`` times and return its best result"""
+    script, template, _ = CASES[name]
+    output = work_dir / name.replace('.', '_')
+    out_dir = work_dir / f"{name.replace('.', '_')}_out"
+    inputs = [csv_path] + sorted(batch_dir.glob('*.csv'))
+    values = {'input': csv_path, 'output': output, 'dir': batch_dir,
+              'outdir': out_dir}
+    command = [sys.executable, str(ROOT / script)] + [
+        arg.format(**values) for arg in template
+    ]
+
+    best = None
+    for _ in range(repeat):
+        if not warm:
+            clear_sidecars(inputs)
+        shutil.rmtree(out_dir, ignore_errors=True)
+        returncode, wall, peak = run_command(command, ROOT,
+                                             output.with_suffix('.log'))
+        if best is None or wall < best['wall_seconds']:
+            best = {
+                'case': name,
+                'rows': rows,
+                'ok': returncode == 0,
+                'wall_seconds': round(wall, 4),
+                'rows_per_sec': round(rows / wall, 1) if wall else None,
+                'peak_rss_mb': round(peak, 1) if peak is not None else None,
+            }
+    return best
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, cases=None, repeat=1, seed=0,
+                   data_dir=None, warm=False):
+    """Run the selected cases at every scale and return the report dict"""
+    names = [name for name in CASES if cases is None or any(
+        name == case or name.startswith(case + '.') for case in cases
+    )]
+    own_dir = data_dir is None
+    data_dir = Path(data_dir or tempfile.mkdtemp(prefix='bench_data_'))
+    data_dir.mkdir(parents=True, exist_ok=True)
+    work_dir = Path(tempfile.mkdtemp(prefix='bench_work_'))
+
+    results = []
+    try:
+        for rows in scales:
+            csv_path, batch_dir = prepare_data(data_dir, rows, seed)
+            for name in names:
+                limit = CASES[name][2]
+                if limit is not None and rows > limit:
+                    continue
+                result = run_case(name, rows, csv_path, batch_dir,
+                                  work_dir, repeat, warm)
+                status = '✅' if result['ok'] else '❌'
+                if not result['ok']:
+                    log = work_dir / f"{name.replace('.', '_')}.log"
+                    print(log.read_text(errors='replace')[-2000:])
+                print(f"{status} {name:32} {rows:>10} rows "
+                      f"{result['wall_seconds']:8.2f}s "
+                      f"{result['rows_per_sec'] or 0:>12,.0f} rows/s "
+                      f"{result['peak_rss_mb'] or 0:8.1f} MB")
+                results.append(result)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if own_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    return {
+        'environment': environment(),
+        'dataset': dict(DATASET, seed=seed),
+        'repeat': repeat,
+        'warm': warm,
+        'results': results,
+    }
+
+
+def compare(report, baseline, tolerance=0.10):
+    """Compare a report with a baseline report
+
+    Returns one dict per case and scale found in both, with throughput
+    and peak memory ratios (current / baseline) and a ``regression`` flag
+    when throughput drops, or memory grows, by more than ``tolerance``.
+    """
+    previous = {(r['case'], r['rows']): r for r in baseline['results']}
+    rows = []
+    for result in report['results']:
+        before = previous.get((result['case'], result['rows']))
+        if before is None or not (result['ok'] and before['ok']):
+            continue
+        speed = result['rows_per_sec'] / before['rows_per_sec']
+        memory = None
+        if result['peak_rss_mb'] and before['peak_rss_mb']:
+            memory = result['peak_rss_mb'] / before['peak_rss_mb']
+        rows.append({
+            'case': result['case'],
+            'rows': result['rows'],
+            'speed_ratio': round(speed, 3),
+            'memory_ratio': round(memory, 3) if memory else None,
+            'regression': speed < 1 - tolerance or (
+                memory is not None and memory > 1 + tolerance
+            ),
+        })
+    return rows
+
+
+def print_comparison(rows):
+    """Print a baseline comparison table"""
+    print("\n📊 Compared with baseline (current / baseline):")
+    for row in rows:
+        status = '⚠️' if row['regression'] else '✅'
+        memory = (f"{row['memory_ratio']:.2f}x"
+                  if row['memory_ratio'] is not None else 'n/a')
+        print(f"{status} {row['case']:32} {row['rows']:>10} rows "
+              f"speed {row['speed_ratio']:.2f}x  memory {memory}")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(
+        description='Benchmark the data processing scripts'
+    )
+    parser.add_argument('--scales',
+                        default=','.join(str(s) for s in DEFAULT_SCALES),
+                        help='Comma-separated row counts '
+                             '(default: 10000,100000,1000000)')
+    parser.add_argument('--cases',
+                        help='Comma-separated cases or scripts to run, '
+                             'e.g. "csv_processor,data_cleaner.clean" '
+                             f'(available: {", ".join(CASES)})')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Runs per case; the fastest is kept')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of the synthetic data (default: 0)')
+    parser.add_argument('--data-dir',
+                        help='Keep generated datasets here for reuse')
+    parser.add_argument('--warm', action='store_true',
+                        help='Keep schema/zone map sidecars between runs')
+    parser.add_argument('--output', help='Write the JSON report here')
+    parser.add_argument('--baseline', help='Baseline JSON report to compare')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Allowed slowdown/memory growth before a '
+                             'result counts as a regression (default: 0.10)')
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help='Exit with status 1 if any case regressed')
+
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(',')]
+    cases = ([c.strip() for c in args.cases.split(',')]
+             if args.cases else None)
+    report = run_benchmarks(scales, cases, args.repeat, args.seed,
+                            args.data_dir, args.warm)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        report['comparison'] = compare(report, baseline, args.tolerance)
+        print_comparison(report['comparison'])
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Saved report to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+    failed = [r for r in report['results'] if not r['ok']]
+    regressed = [r for r in report.get('comparison', []) if r['regression']]
+    if failed or (args.fail_on_regression and regressed):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
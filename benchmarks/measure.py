@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Measure - Run a script and record its peak memory
+
+Usage: python -m benchmarks.measure STATS_JSON SCRIPT [ARGS...]
+
+``ru_maxrss`` of a child seen from the harness starts at the harness's
+own peak (Linux carries it across fork and exec), so the peak is taken
+inside the measured process instead: ``VmHWM`` of this process plus the
+largest ``ru_maxrss`` of the worker processes it waited for.
+"""
+
+import json
+import resource
+import runpy
+import sys
+from pathlib import Path
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process and its children in MB"""
+    scale = 1 if sys.platform == 'darwin' else 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    own = int(line.split()[1]) * 1024
+                    break
+            else:
+                raise OSError("no VmHWM")
+    except OSError:
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    return max(own, children) / 1024 / 1024
+
+
+def main():
+    """Main entry point"""
+    stats_path, script = sys.argv[1], sys.argv[2]
+    sys.argv = sys.argv[2:]
+    sys.path[0] = str(Path(script).resolve().parent)
+
+    code = 0
+    try:
+        runpy.run_path(script, run_name='__main__')
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (e.code is not None)
+    finally:
+        with open(stats_path, 'w', encoding='utf-8') as f:
+            json.dump({'peak_rss_mb': peak_rss_mb()}, f)
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Synthetic - Deterministic synthetic CSV datasets for benchmarking
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+# Rows generated per block; each block has its own seeded generator, so a
+# file is identical whatever the total size and can be written in blocks
+BLOCK_ROWS = 100000
+
+DEFAULT_MIX = {'int': 2, 'float': 3, 'category': 2, 'string': 1, 'date': 1}
+KINDS = ('int', 'float', 'category', 'string', 'date', 'bool')
+
+DATE_START = np.datetime64('2020-01-01')
+DATE_DAYS = 5 * 365
+
+
+def parse_mix(text):
+    """Parse ``"int:2,float:3"`` into a kind -> weight dict"""
+    mix = {}
+    for spec in text.split(','):
+        kind, _, weight = spec.strip().partition(':')
+        if kind not in KINDS:
+            raise ValueError(f"Unknown column kind: {kind}")
+        mix[kind] = int(weight or 1)
+    return mix
+
+
+def column_kinds(columns, mix=None):
+    """Kinds of the ``columns`` data columns, interleaved by weight"""
+    mix = mix or DEFAULT_MIX
+    pattern = [kind for kind, weight in mix.items() for _ in range(weight)]
+    if not pattern:
+        raise ValueError("Column mix is empty")
+    return [pattern[i % len(pattern)] for i in range(columns)]
+
+
+def column_names(columns, mix=None):
+    """Header of a generated dataset: ``id`` then ``<kind>_<n>`` columns"""
+    seen = {}
+    names = ['id']
+    for kind in column_kinds(columns, mix):
+        names.append(f"{kind}_{seen.get(kind, 0)}")
+        seen[kind] = seen.get(kind, 0) + 1
+    return names
+
+
+def make_column(rng, kind, rows, cardinality, outlier_rate):
+    """Values for one column of one block"""
+    if kind == 'int':
+        values = rng.integers(0, 1000000, rows).astype(float)
+        scale = 1000000.0
+    elif kind == 'float':
+        values = rng.normal(100.0, 15.0, rows).round(4)
+        scale = 15.0
+    elif kind == 'category':
+        return pd.Categorical.from_codes(
+            rng.integers(0, cardinality, rows),
+            [f"c{i}" for i in range(cardinality)]
+        ).astype(object)
+    elif kind == 'string':
+        return np.char.add('user_', rng.integers(0, 10 ** 9, rows)
+                           .astype(str)).astype(object)
+    elif kind == 'date':
+        days = rng.integers(0, DATE_DAYS, rows)
+        return (DATE_START + days).astype(str).astype(object)
+    else:
+        return rng.random(rows) < 0.5
+
+    if outlier_rate:
+        outliers = rng.random(rows) < outlier_rate
+        signs = np.where(rng.random(rows) < 0.5, -1, 1)
+        values = np.where(outliers, values + signs * 20 * scale, values)
+    if kind == 'int':
+        values = values.astype(np.int64)
+    return values
+
+
+def generate_block(block, rows, columns=8, mix=None, null_rate=0.0,
+                   duplicate_rate=0.0, outlier_rate=0.0, cardinality=50,
+                   seed=0):
+    """Generate block number ``block`` of a dataset"""
+    rng = np.random.default_rng([seed, block])
+    names = column_names(columns, mix)
+    data = {'id': np.arange(block * BLOCK_ROWS, block * BLOCK_ROWS + rows)}
+    for name, kind in zip(names[1:], column_kinds(columns, mix)):
+        data[name] = make_column(rng, kind, rows, cardinality, outlier_rate)
+    df = pd.DataFrame(data, columns=names)
+
+    if null_rate:
+        for name in names[1:]:
+            missing = rng.random(rows) < null_rate
+            if df[name].dtype.kind == 'i':
+                df[name] = df[name].astype('Int64')
+            elif df[name].dtype.kind == 'b':
+                df[name] = df[name].astype('boolean')
+            df.loc[missing, name] = None
+
+    if duplicate_rate and rows > 1:
+        # Replace randomly chosen rows with copies of earlier rows that
+        # are themselves kept, so every copy really is a duplicate
+        copied = rng.random(rows) < duplicate_rate
+        copied[0] = False
+        kept = np.flatnonzero(~copied)
+        targets = np.flatnonzero(copied)
+        earlier = np.searchsorted(kept, targets)
+        order = np.arange(rows)
+        order[targets] = kept[(rng.random(len(targets)) * earlier)
+                              .astype(np.int64)]
+        df = df.iloc[order].reset_index(drop=True)
+    return df
+
+
+def blocks(rows, **options):
+    """Yield the blocks of a ``rows``-row dataset in order"""
+    for block, start in enumerate(range(0, rows, BLOCK_ROWS)):
+        yield generate_block(block, min(BLOCK_ROWS, rows - start), **options)
+
+
+def generate(rows, **options):
+    """Generate a whole dataset as one DataFrame
+
+    ``options`` are ``columns``, ``mix`` (kind -> weight), ``null_rate``,
+    ``duplicate_rate``, ``outlier_rate``, ``cardinality`` and ``seed``.
+    The same arguments always produce the same data.
+    """
+    parts = list(blocks(rows, **options))
+    if not parts:
+        return generate_block(0, 0, **options)
+    return pd.concat(parts, ignore_index=True)
+
+
+def write_csv(path, rows, **options):
+    """Write a dataset to CSV block by block, in constant memory"""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        written = 0
+        for df in blocks(rows, **options):
+            df.to_csv(f, index=False, header=(written == 0))
+            written += len(df)
+        if written == 0:
+            generate_block(0, 0, **options).to_csv(f, index=False)
+    return path
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(
+        description='Generate a deterministic synthetic CSV dataset'
+    )
+    parser.add_argument('output', help='Output CSV file')
+    parser.add_argument('--rows', type=int, default=100000,
+                        help='Number of rows (default: 100000)')
+    parser.add_argument('--columns', type=int, default=8,
+                        help='Number of data columns besides id (default: 8)')
+    parser.add_argument('--mix', default='int:2,float:3,category:2,'
+                                         'string:1,date:1',
+                        help='Column kinds and weights, from '
+                             f'{", ".join(KINDS)}')
+    parser.add_argument('--null-rate', type=float, default=0.0,
+                        help='Fraction of missing values per column')
+    parser.add_argument('--duplicate-rate', type=float, default=0.0,
+                        help='Fraction of rows that repeat an earlier row')
+    parser.add_argument('--outlier-rate', type=float, default=0.0,
+                        help='Fraction of numeric values pushed far out')
+    parser.add_argument('--cardinality', type=int, default=50,
+                        help='Distinct values per category column')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed (default: 0)')
+
+    args = parser.parse_args()
+
+    try:
+        write_csv(args.output, args.rows, columns=args.columns,
+                  mix=parse_mix(args.mix), null_rate=args.null_rate,
+                  duplicate_rate=args.duplicate_rate,
+                  outlier_rate=args.outlier_rate,
+                  cardinality=args.cardinality, seed=args.seed)
+    except Exception as e:
+        print(f"❌ Error generating data: {e}")
+        sys.exit(1)
+
+    print(f"✅ Wrote {args.rows} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
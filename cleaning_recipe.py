@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Cleaning Recipe - Declarative cleaning steps fused into streaming passes
+"""
+
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import compressed_io
+import csv_schema
+import dedup
+import missing_values
+import outliers
+import validation
+
+
+class ValidateStep:
+    """Split off rows that break a validation rule set
+
+    ``rules`` is a rule file or a parsed rule set.  Failing rows go to
+    ``quarantine`` with the rules they broke, the first time each chunk
+    is validated; later passes replay the recorded keep-mask, as
+    ``DedupStep`` does.  Its state is the ``unique`` rules' hash sets.
+    """
+
+    name = 'validate'
+    stats = False
+
+    def __init__(self, rules, quarantine='quarantine.csv'):
+        """Initialize step"""
+        if isinstance(rules, (str, Path)):
+            self.validator = validation.load_rules(rules)
+        else:
+            self.validator = validation.Validator.from_spec(rules)
+        self.quarantine = quarantine
+        self.append = False
+        self.masks = []
+        self.position = 0
+
+    def rewind(self):
+        """Start a new pass over the input"""
+        self.position = 0
+
+    def state(self):
+        """What a later run needs to continue the stream"""
+        return {'seen': [rule.seen and rule.seen.runs
+                         for rule in self.validator.rules]}
+
+    def restore(self, state):
+        """Continue from a saved state, appending to the quarantine"""
+        for rule, runs in zip(self.validator.rules, state['seen']):
+            if runs is not None:
+                rule.seen.runs = list(runs)
+        self.append = True
+        self.masks = []
+        self.position = 0
+
+    def apply(self, chunk):
+        """Keep the rows that pass every rule"""
+        if self.position < len(self.masks):
+            mask = np.unpackbits(self.masks[self.position],
+                                 count=len(chunk)).astype(bool)
+        else:
+            bad, reasons = self.validator.check(chunk)
+            append = self.append or self.position > 0
+            with compressed_io.open_write(self.quarantine,
+                                          append=append) as f:
+                chunk[bad].assign(
+                    **{validation.REASONS_COLUMN: reasons}
+                ).to_csv(f, index=False, header=not append)
+            mask = ~bad
+            self.masks.append(np.packbits(mask))
+        self.position += 1
+        return chunk[mask]
+
+
+class DedupStep:
+    """Drop rows already seen earlier in the stream
+
+    The keep-mask of each chunk is recorded (one bit per row) the first
+    time the step runs, so later passes replay it without hashing.  The
+    hash set stays in memory: 8 bytes per distinct row.  Its state is the
+    set itself.
+    """
+
+    name = 'remove_duplicates'
+    stats = False
+
+    def __init__(self, subset=None, bits=64):
+        """Initialize step"""
+        self.subset = subset
+        self.bits = bits
+        self.seen = dedup.HashSet()
+        self.masks = []
+        self.position = 0
+
+    def rewind(self):
+        """Start a new pass over the input"""
+        self.position = 0
+
+    def state(self):
+        """What a later run needs to continue the stream"""
+        return {'runs': self.seen.runs}
+
+    def restore(self, state):
+        """Continue from a saved state"""
+        self.seen.runs = list(state['runs'])
+        self.masks = []
+        self.position = 0
+
+    def apply(self, chunk):
+        """Keep the first occurrence of each row"""
+        if self.position < len(self.masks):
+            mask = np.unpackbits(self.masks[self.position],
+                                 count=len(chunk)).astype(bool)
+        else:
+            mask = self.seen.first_seen(
+                dedup.row_hashes(chunk, self.subset, self.bits)
+            )
+            self.masks.append(np.packbits(mask))
+        self.position += 1
+        return chunk[mask]
+
+
+class FillStep:
+    """Fill missing values with a mean, zero, median or percentile"""
+
+    name = 'fill_missing_values'
+    stats = True
+
+    def __init__(self, method='mean', columns=None):
+        """Initialize step"""
+        missing_values.parse_method(method)
+        self.method = method
+        self.columns = columns
+        self.scanner = None
+        self.values = None
+
+    def rewind(self):
+        """Start a new pass over the input"""
+
+    def scan(self):
+        """Statistics this step needs before it can run"""
+        if self.scanner is not None:
+            return self.scanner
+        return missing_values.FillScan(self.method, self.columns)
+
+    def prepare(self, scan):
+        """Take the fill values from a finished scan"""
+        self.scanner = scan
+        self.values = scan.values()
+
+    def state(self):
+        """What a later run needs to continue the stream"""
+        return {'scan': self.scanner}
+
+    def restore(self, state):
+        """Continue from a saved state"""
+        self.scanner = state['scan']
+
+    def apply(self, chunk):
+        """Fill the gaps of one chunk"""
+        missing_values.fill_frame(chunk, self.values)
+        return chunk
+
+
+class OutliersStep:
+    """Drop rows with an outlier in any of ``columns``"""
+
+    name = 'remove_outliers'
+    stats = True
+
+    def __init__(self, columns=None, method='zscore', threshold=None):
+        """Initialize step"""
+        outliers.check_method(method, threshold)
+        self.columns = columns
+        self.method = method
+        self.threshold = threshold
+        self.scanner = None
+        self.bounds = None
+
+    def rewind(self):
+        """Start a new pass over the input"""
+
+    def scan(self):
+        """Statistics this step needs before it can run"""
+        if self.scanner is not None:
+            return self.scanner
+        return outliers.OutlierScan(self.columns, self.method,
+                                    self.threshold)
+
+    def prepare(self, scan):
+        """Take the bounds from a finished scan"""
+        self.scanner = scan
+        self.bounds = scan.bounds()
+
+    def state(self):
+        """What a later run needs to continue the stream"""
+        return {'scan': self.scanner}
+
+    def restore(self, state):
+        """Continue from a saved state"""
+        self.scanner = state['scan']
+
+    def apply(self, chunk):
+        """Drop the outlier rows of one chunk"""
+        mask = outliers.outlier_mask(chunk, self.bounds).to_numpy()
+        return chunk[~mask]
+
+
+class StandardizeStep:
+    """Lower-case column names and replace spaces with underscores"""
+
+    name = 'standardize_columns'
+    stats = False
+
+    def rewind(self):
+        """Start a new pass over the input"""
+
+    def state(self):
+        """What a later run needs to continue the stream"""
+        return {}
+
+    def restore(self, state):
+        """Continue from a saved state"""
+
+    def apply(self, chunk):
+        """Rename the columns of one chunk"""
+        chunk.columns = [col.lower().strip().replace(' ', '_')
+                         for col in chunk.columns]
+        return chunk
+
+
+STEPS = {step.name: step for step in (ValidateStep, DedupStep, FillStep,
+                                      OutliersStep, StandardizeStep)}
+
+ALIASES = {
+    'dedup': 'remove_duplicates',
+    'fill': 'fill_missing_values',
+    'outliers': 'remove_outliers',
+    'standardize': 'standardize_columns',
+}
+
+
+def make_step(spec):
+    """Build a step from ``"name"`` or ``{"step": name, **params}``"""
+    if isinstance(spec, str):
+        spec = {'step': spec}
+    params = dict(spec)
+    name = params.pop('step', None)
+    name = ALIASES.get(name, name)
+    if name not in STEPS:
+        raise ValueError(f"Unknown recipe step '{name}' "
+                         f"(use one of: {', '.join(STEPS)})")
+    try:
+        return STEPS[name](**params)
+    except TypeError as e:
+        raise ValueError(f"Bad parameters for step '{name}': {e}")
+
+
+class Recipe:
+    """Ordered cleaning steps run over CSV chunks in fused passes
+
+    Every step that needs global statistics (fill values, outlier
+    bounds) gets one scan pass over what the steps before it emit; then
+    a final pass runs all steps on each chunk and writes it.  A recipe
+    with k such steps therefore reads the input k + 1 times but never
+    holds more than one chunk of it.  Time is accounted per step.
+
+    A recipe can be continued over appended input: ``state`` captures
+    the dedup set and the running statistics, and after ``restore`` the
+    stats passes fold new rows into them instead of starting over.
+    """
+
+    def __init__(self, steps, chunksize=100000, spec=None):
+        """Initialize recipe"""
+        self.steps = steps
+        self.chunksize = chunksize
+        self.spec = spec
+        self.timings = {}
+        self.removed = {}
+        self.rows = 0
+
+    @classmethod
+    def from_spec(cls, spec, chunksize=None):
+        """Build a recipe from a parsed JSON/YAML document
+
+        The document is a list of steps, or a mapping with ``steps`` and
+        an optional ``chunksize``.
+        """
+        if isinstance(spec, list):
+            spec = {'steps': spec}
+        if not isinstance(spec, dict) or not spec.get('steps'):
+            raise ValueError("A recipe needs a non-empty list of steps")
+        steps = [make_step(step) for step in spec['steps']]
+        return cls(steps, chunksize or spec.get('chunksize', 100000),
+                   spec['steps'])
+
+    @property
+    def passes(self):
+        """Number of passes over the input"""
+        return sum(step.stats for step in self.steps) + 1
+
+    def state(self):
+        """Per-step state for continuing over appended input"""
+        return [step.state() for step in self.steps]
+
+    def restore(self, states):
+        """Continue from ``state()`` of an earlier run"""
+        for step, state in zip(self.steps, states):
+            step.restore(state)
+
+    def label(self, i):
+        """Timing label of step ``i``"""
+        return f"{i + 1}. {self.steps[i].name}"
+
+    def timed(self, label, start):
+        """Add the time since ``start`` to ``label``"""
+        elapsed = time.perf_counter() - start
+        self.timings[label] = self.timings.get(label, 0.0) + elapsed
+
+    def read(self, input_file, encoding):
+        """Input chunks; an input without rows yields its empty header"""
+        empty = True
+        for chunk in csv_schema.read_csv(input_file, encoding=encoding,
+                                         chunksize=self.chunksize):
+            empty = False
+            yield chunk
+        if empty:
+            yield pd.read_csv(input_file, encoding=encoding, nrows=0)
+
+    def chunks(self, read_chunks, count):
+        """Chunks of ``read_chunks()`` through the first ``count`` steps"""
+        for step in self.steps[:count]:
+            step.rewind()
+        self.removed = {}
+        self.rows = 0
+        reader = iter(read_chunks())
+        while True:
+            start = time.perf_counter()
+            chunk = next(reader, None)
+            self.timed('read', start)
+            if chunk is None:
+                return
+            self.rows += len(chunk)
+            for i in range(count):
+                start = time.perf_counter()
+                before = len(chunk)
+                chunk = self.steps[i].apply(chunk)
+                self.timed(self.label(i), start)
+                self.removed[i] = (self.removed.get(i, 0)
+                                   + before - len(chunk))
+            yield chunk
+
+    def run(self, input_file, output_file, encoding='utf-8',
+            read_chunks=None, append=False):
+        """Clean ``input_file`` into ``output_file``; returns rows written
+
+        ``read_chunks`` replaces reading the whole input (it is called
+        once per pass); with ``append`` the output is appended to,
+        without a header.
+        """
+        if read_chunks is None:
+            def read_chunks():
+                return self.read(input_file, encoding)
+
+        self.timings = {}
+        for k, step in enumerate(self.steps):
+            if not step.stats:
+                continue
+            scan = step.scan()
+            for chunk in self.chunks(read_chunks, k):
+                start = time.perf_counter()
+                scan.update(chunk)
+                self.timed(self.label(k) + ' (stats)', start)
+            step.prepare(scan)
+
+        written = 0
+        with compressed_io.open_write(output_file, encoding,
+                                      append=append) as f:
+            chunks = self.chunks(read_chunks, len(self.steps))
+            for i, chunk in enumerate(chunks):
+                start = time.perf_counter()
+                chunk.to_csv(f, index=False, header=(i == 0 and not append))
+                self.timed('write', start)
+                written += len(chunk)
+        return written
+
+    def report(self):
+        """Print per-step timings and removed rows"""
+        print(f"\n⏱️  Recipe timings ({self.passes} passes over the input):")
+        labels = ['read']
+        for i, step in enumerate(self.steps):
+            if step.stats:
+                labels.append(self.label(i) + ' (stats)')
+            labels.append(self.label(i))
+        labels.append('write')
+        for label in labels:
+            line = f"  {label:<36}{self.timings.get(label, 0.0):8.2f}s"
+            for i in range(len(self.steps)):
+                if label == self.label(i) and self.removed.get(i):
+                    line += f"  removed {self.removed[i]} rows"
+            print(line)
+        print(f"  {'total':<36}{sum(self.timings.values()):8.2f}s")
+
+
+def read_document(path):
+    """Parse a JSON file, or a YAML file if PyYAML is installed"""
+    text = Path(path).read_text()
+    if Path(path).suffix.lower() in ('.yml', '.yaml'):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("YAML files need PyYAML "
+                             "(pip install pyyaml); use JSON instead")
+        return yaml.safe_load(text)
+    return json.loads(text)
+
+
+def load_recipe(path, chunksize=None):
+    """Read a recipe from a JSON file, or YAML if PyYAML is installed"""
+    return Recipe.from_spec(read_document(path), chunksize)
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Column Cache - Memory-mapped columnar cache of parsed CSV files
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import csv_schema
+import parallel_reader
+
+
+DEFAULT_CACHE_DIR = Path(
+    os.environ.get('DATA_CACHE_DIR',
+                   Path.home() / '.cache' / 'data-processing-scripts')
+)
+DEFAULT_MAX_MB = int(os.environ.get('DATA_CACHE_MAX_MB', 10 * 1024))
+
+META_FILE = 'meta.json'
+
+# Entries written by another layout are treated as misses
+CACHE_VERSION = 3
+
+
+class ColumnCache:
+    """Columnar on-disk cache of parsed CSV files
+
+    Each cached file is a directory holding one ``.npy`` file per column
+    plus ``meta.json``.  Numeric, boolean and datetime columns are
+    memory-mapped on load.  Categoricals and string columns are stored
+    as codes, memory-mapped on load, plus their categories; text
+    categories are UTF-8 bytes with an offsets array.  String columns
+    therefore load as categoricals.  A file with any other column
+    (mixed objects, nullable extension types) is not cached.  Entries
+    are keyed by the CSV's absolute path and validated against its size
+    and mtime, and the least recently used entries are evicted once the
+    cache grows beyond ``max_mb``.
+    """
+
+    def __init__(self, cache_dir=None, max_mb=DEFAULT_MAX_MB):
+        """Initialize column cache"""
+        self.cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+
+    def entry_dir(self, csv_path, encoding='utf-8', parse_dates=False,
+                  categories=False):
+        """Return the cache directory for a CSV file read this way"""
+        key = f"{Path(csv_path).resolve()}|{encoding}"
+        if parse_dates:
+            key += '|dates'
+        if categories:
+            key += '|categories'
+        return self.cache_dir / hashlib.sha1(key.encode()).hexdigest()
+
+    def read_meta(self, entry):
+        """Return an entry's metadata, or None if it is missing/corrupt"""
+        try:
+            with open(entry / META_FILE, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, csv_path, columns=None, encoding='utf-8',
+             parse_dates=False, categories=False):
+        """Load a cached frame, or None on a miss or stale entry
+
+        Only ``columns`` (default: all) are read.
+        """
+        entry = self.entry_dir(csv_path, encoding, parse_dates, categories)
+        meta = self.read_meta(entry)
+        if (meta is None or meta.get('version') != CACHE_VERSION
+                or meta['source'] != csv_schema.fingerprint(csv_path)):
+            return None
+
+        specs = {spec['name']: spec for spec in meta['columns']}
+        names = list(specs) if columns is None else list(columns)
+        missing = [name for name in names if name not in specs]
+        if missing:
+            raise KeyError(f"Columns not in {csv_path}: {missing}")
+
+        data = {}
+        for name in names:
+            data[name] = self.load_column(entry, specs[name])
+        df = pd.DataFrame(data, columns=names, copy=False)
+
+        # Touch the entry so LRU eviction sees it as recently used
+        os.utime(entry / META_FILE)
+        return df
+
+    @staticmethod
+    def load_column(entry, spec):
+        """Rebuild one column from its files"""
+        path = entry / spec['file']
+        kind = spec['kind']
+        if kind == 'array':
+            return np.load(path, mmap_mode='c')
+        if kind == 'category':
+            codes = np.load(path, mmap_mode='c')
+            return pd.Categorical.from_codes(
+                codes, ColumnCache.load_categories(entry, spec),
+                ordered=spec['ordered']
+            )
+        # 'datetimetz'
+        values = np.load(path, mmap_mode='c')
+        return pd.DatetimeIndex(values).tz_localize('UTC').tz_convert(
+            spec['tz']
+        )
+
+    @staticmethod
+    def load_categories(entry, spec):
+        """Read the categories written by ``store_categories``"""
+        values = np.load(entry / spec['categories'])
+        if 'offsets' not in spec:
+            return values
+        offsets = np.load(entry / spec['offsets']).tolist()
+        data = values.tobytes()
+        return [data[start:end].decode('utf-8')
+                for start, end in zip(offsets, offsets[1:])]
+
+    def store(self, csv_path, df, encoding='utf-8', parse_dates=False,
+              categories=False):
+        """Write a parsed frame to the cache and enforce the size cap"""
+        entry = self.entry_dir(csv_path, encoding, parse_dates, categories)
+        tmp = entry.with_name(entry.name + '.tmp')
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+
+        try:
+            specs = [self.store_column(tmp, i, name, df.iloc[:, i])
+                     for i, name in enumerate(df.columns)]
+        except ValueError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        meta = {
+            'version': CACHE_VERSION,
+            'path': str(Path(csv_path).resolve()),
+            'source': csv_schema.fingerprint(csv_path),
+            'rows': len(df),
+            'columns': specs,
+        }
+        with open(tmp / META_FILE, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+        self.evict(keep=entry)
+        return entry
+
+    @staticmethod
+    def store_column(entry, i, name, series):
+        """Write one column and return its metadata"""
+        spec = {'name': name, 'file': f"{i}.npy", 'dtype': str(series.dtype)}
+        dtype = series.dtype
+
+        if isinstance(dtype, pd.StringDtype) or (
+            dtype == object
+            and pd.api.types.infer_dtype(series) in ('string', 'empty')
+        ):
+            # Strings load back as categoricals over the mapped codes,
+            # ordered like the strings so comparisons and sorts agree
+            series = series.astype(pd.CategoricalDtype(ordered=True))
+            dtype = series.dtype
+
+        if isinstance(dtype, pd.CategoricalDtype):
+            spec.update(kind='category', ordered=bool(dtype.ordered))
+            spec.update(ColumnCache.store_categories(entry, i,
+                                                     dtype.categories))
+            np.save(entry / spec['file'], series.cat.codes.to_numpy())
+        elif isinstance(dtype, pd.DatetimeTZDtype):
+            spec.update(kind='datetimetz', tz=str(dtype.tz))
+            np.save(entry / spec['file'],
+                    series.dt.tz_convert('UTC').dt.tz_localize(None)
+                    .to_numpy())
+        elif isinstance(dtype, np.dtype) and dtype.kind in 'biufcmM':
+            spec['kind'] = 'array'
+            np.save(entry / spec['file'], series.to_numpy())
+        else:
+            raise ValueError(f"column '{name}' ({dtype}) cannot be "
+                             "memory-mapped")
+        return spec
+
+    @staticmethod
+    def store_categories(entry, i, categories):
+        """Write categories without pickling; returns their file names
+
+        Text is stored as one UTF-8 byte buffer plus the offset of every
+        value in it, numbers and datetimes as a plain array.
+        """
+        if pd.api.types.infer_dtype(categories) in ('string', 'empty'):
+            encoded = [value.encode('utf-8') for value in categories]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(value) for value in encoded], out=offsets[1:])
+            files = {'categories': f"{i}.categories.npy",
+                     'offsets': f"{i}.offsets.npy"}
+            np.save(entry / files['categories'],
+                    np.frombuffer(b''.join(encoded), dtype=np.uint8))
+            np.save(entry / files['offsets'], offsets)
+            return files
+        values = categories.to_numpy()
+        if values.dtype.kind not in 'biufmM':
+            raise ValueError(f"categories of {categories.dtype} cannot be "
+                             "stored")
+        np.save(entry / f"{i}.categories.npy", values)
+        return {'categories': f"{i}.categories.npy"}
+
+    def entries(self):
+        """Return ``(last_used, size, path)`` for every cache entry"""
+        found = []
+        if not self.cache_dir.is_dir():
+            return found
+        for entry in self.cache_dir.iterdir():
+            meta_file = entry / META_FILE
+            if entry.suffix == '.tmp' or not meta_file.exists():
+                continue
+            size = sum(f.stat().st_size for f in entry.iterdir())
+            found.append((meta_file.stat().st_mtime, size, entry))
+        return found
+
+    def evict(self, keep=None):
+        """Drop least recently used entries until under the size cap"""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            if entry == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        """Remove every cache entry"""
+        for _, _, entry in self.entries():
+            shutil.rmtree(entry, ignore_errors=True)
+
+    def read_csv(self, csv_path, usecols=None, encoding='utf-8',
+                 workers=None, parse_dates=False, categories=False):
+        """Load a CSV through the cache, parsing and storing on a miss
+
+        Reads with and without ``parse_dates``/``categories`` are cached
+        separately.
+        """
+        options = {'parse_dates': parse_dates, 'categories': categories}
+        df = self.load(csv_path, columns=usecols, encoding=encoding,
+                       **options)
+        if df is not None:
+            return df
+
+        df = parallel_reader.read_csv(csv_path, workers=workers,
+                                      encoding=encoding, **options)
+        try:
+            self.store(csv_path, df, encoding=encoding, **options)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not write cache: {e}")
+        return df if usecols is None else df[list(usecols)]
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Columnar CSV cache')
+    parser.add_argument('inputs', nargs='*', help='CSV files to cache')
+    parser.add_argument('--cache-dir', help='Cache directory')
+    parser.add_argument('--max-mb', type=int, default=DEFAULT_MAX_MB,
+                        help='Cache size cap in MB')
+    parser.add_argument('--list', action='store_true',
+                        help='List cache entries')
+    parser.add_argument('--clear', action='store_true',
+                        help='Remove all cache entries')
+
+    args = parser.parse_args()
+    cache = ColumnCache(args.cache_dir, args.max_mb)
+
+    if args.clear:
+        cache.clear()
+        print(f"✅ Cleared {cache.cache_dir}")
+
+    for path in args.inputs:
+        try:
+            df = cache.read_csv(path)
+            print(f"✅ Cached {len(df)} rows from {path}")
+        except Exception as e:
+            print(f"❌ Error caching {path}: {e}")
+            sys.exit(1)
+
+    if args.list:
+        for last_used, size, entry in sorted(cache.entries(), reverse=True):
+            meta = cache.read_meta(entry)
+            print(f"{size / 1024 / 1024:10.1f} MB  {meta['path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Column Parallel - Clean wide numeric tables in column ranges across processes
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+import missing_values
+import outliers
+
+
+# Column ranges per worker, so uneven ranges still balance
+RANGES_PER_WORKER = 2
+
+
+class SharedBlock:
+    """Numeric columns copied once into a column-major shared float64 block
+
+    Each column is contiguous, so a column range is a contiguous slice
+    that workers can view, and write, without copying.
+    """
+
+    def __init__(self, df, columns):
+        """Copy ``columns`` of ``df`` into a new shared block"""
+        self.columns = list(columns)
+        self.shape = (len(df), len(self.columns))
+        size = max(1, self.shape[0] * self.shape[1] * 8)
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.array = np.ndarray(self.shape, dtype=np.float64,
+                                buffer=self.shm.buf, order='F')
+        for j, column in enumerate(self.columns):
+            self.array[:, j] = df[column].to_numpy(dtype=np.float64,
+                                                   na_value=np.nan)
+
+    def ranges(self, workers):
+        """Disjoint ``(start, stop)`` column ranges"""
+        parts = min(len(self.columns), workers * RANGES_PER_WORKER)
+        bounds = np.linspace(0, len(self.columns), parts + 1).astype(int)
+        return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:])
+                if b > a]
+
+    def map(self, task, workers, **params):
+        """Run ``task`` over every column range, in order"""
+        ranges = self.ranges(workers)
+        args = [(self.shm.name, self.shape, start, stop,
+                 self.columns[start:stop], params) for start, stop in ranges]
+        if workers <= 1 or len(ranges) < 2:
+            return [task(*arg) for arg in args]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(task, *zip(*args)))
+
+    def close(self):
+        """Release and remove the shared block"""
+        del self.array
+        self.shm.close()
+        self.shm.unlink()
+
+
+def run_on_range(work, name, shape, start, stop, columns, params):
+    """Call ``work(block, frame, params)`` on a view of one column range"""
+    # Workers share the parent's resource tracker, so attaching does not
+    # take ownership; the parent unlinks the block
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf,
+                           order='F')[:, start:stop]
+        frame = pd.DataFrame(block, columns=columns, copy=False)
+        result = work(block, frame, params)
+        del block, frame
+        return result
+    finally:
+        try:
+            shm.close()
+        except BufferError:
+            # Views still held by a failing ``work``'s traceback; the
+            # mapping goes away with the worker
+            pass
+
+
+def fill_work(block, frame, params):
+    """Fill the gaps of ``block`` from the statistics of its columns"""
+    values = missing_values.fill_values(frame, params['method'])
+    for j, column in enumerate(frame.columns):
+        value = values[column]
+        if pd.isna(value):
+            continue
+        missing = np.isnan(block[:, j])
+        block[missing, j] = value
+
+
+def outlier_work(block, frame, params):
+    """Packed row mask of the outliers in ``frame``"""
+    bounds = outliers.outlier_bounds(frame, method=params['method'],
+                                     threshold=params['threshold'])
+    return np.packbits(outliers.outlier_mask(frame, bounds).to_numpy())
+
+
+def fill_range(name, shape, start, stop, columns, params):
+    """Fill the gaps of one column range in place"""
+    return run_on_range(fill_work, name, shape, start, stop, columns, params)
+
+
+def outlier_range(name, shape, start, stop, columns, params):
+    """Packed outlier row mask of one column range"""
+    return run_on_range(outlier_work, name, shape, start, stop, columns,
+                        params)
+
+
+def fill_missing(df, method='mean', workers=None):
+    """``fill_values``/``fill_frame`` with float columns in parallel
+
+    Float columns with gaps are filled in shared memory by column range
+    and copied back; other numeric columns with gaps and text columns
+    are filled in this process.  Returns the filled columns.
+    """
+    missing_values.parse_method(method)
+    workers = workers or os.cpu_count() or 1
+    gaps = [column for column in missing_values.numeric_columns(df)
+            if df[column].hasnans]
+    shared = [column for column in gaps if df[column].dtype.kind == 'f']
+    rest = [column for column in gaps if column not in shared]
+
+    if shared:
+        block = SharedBlock(df, shared)
+        try:
+            block.map(fill_range, workers, method=method)
+            for j, column in enumerate(shared):
+                df[column] = block.array[:, j].astype(df[column].dtype)
+        finally:
+            block.close()
+
+    values = missing_values.fill_values(df, method, rest) if rest else {}
+    return shared + missing_values.fill_frame(df, values)
+
+
+def outlier_mask(df, columns=None, method='zscore', threshold=None,
+                 workers=None):
+    """``outlier_bounds`` + ``outlier_mask`` with columns in parallel
+
+    Each worker computes the bounds and a row mask for its columns; the
+    masks are OR-ed at the end.
+    """
+    outliers.check_method(method, threshold)
+    workers = workers or os.cpu_count() or 1
+    columns = (outliers.numeric_columns(df) if columns is None
+               else list(columns))
+    mask = np.zeros(len(df), dtype=bool)
+    if not columns or not len(df):
+        return mask
+
+    block = SharedBlock(df, columns)
+    try:
+        for packed in block.map(outlier_range, workers, method=method,
+                                threshold=threshold):
+            mask |= np.unpackbits(packed, count=len(df)).astype(bool)
+    finally:
+        block.close()
+    return mask
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Columnar - Parquet, Feather and Arrow IPC in record batches (needs pyarrow)
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+from zone_map import Pruner
+
+
+PARQUET_SUFFIXES = ('.parquet', '.pq')
+IPC_SUFFIXES = ('.feather', '.arrow', '.ipc')
+SUFFIXES = PARQUET_SUFFIXES + IPC_SUFFIXES
+
+# Default codecs: Parquet and Feather as pyarrow writes them; plain Arrow
+# IPC stays uncompressed so it can be memory-mapped without copies
+COMPRESSION = {'.parquet': 'snappy', '.pq': 'snappy', '.feather': 'lz4',
+               '.arrow': None, '.ipc': None}
+
+CODECS = ('none', 'snappy', 'gzip', 'brotli', 'lz4', 'zstd')
+
+# Batch size when a whole file is read at once
+READ_ALL = 1 << 20
+
+
+def arrow():
+    """``(pyarrow, pyarrow.parquet)``, or a ValueError without pyarrow"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("Parquet, Feather and Arrow files need pyarrow "
+                         "(pip install pyarrow)")
+    return pyarrow, pyarrow.parquet
+
+
+def is_columnar(path):
+    """True for Parquet, Feather and Arrow IPC paths"""
+    return Path(path).suffix.lower() in SUFFIXES
+
+
+def is_parquet(path):
+    """True for Parquet paths"""
+    return Path(path).suffix.lower() in PARQUET_SUFFIXES
+
+
+def open_ipc(path):
+    """Reader over a memory-mapped Arrow IPC file or stream"""
+    pa, _ = arrow()
+    source = pa.memory_map(str(path), 'r')
+    try:
+        return pa.ipc.open_file(source)
+    except pa.ArrowInvalid:
+        source.seek(0)
+        return pa.ipc.open_stream(source)
+
+
+def ipc_batches(reader):
+    """Record batches of an IPC file or stream reader"""
+    if hasattr(reader, 'num_record_batches'):
+        return (reader.get_batch(i)
+                for i in range(reader.num_record_batches))
+    return iter(reader)
+
+
+def column_names(path):
+    """Column names from the file's schema, without reading data"""
+    _, pq = arrow()
+    if is_parquet(path):
+        return pq.read_schema(str(path)).names
+    return open_ipc(path).schema.names
+
+
+def row_group_stats(row_group, names):
+    """Zone-map style ``{column: {'min', 'max', 'nulls'}}`` and kinds
+
+    Only numeric and date/time columns with statistics are included.
+    """
+    pa, _ = arrow()
+    stats = {}
+    kinds = {}
+    for i in range(row_group.num_columns):
+        column = row_group.column(i)
+        name = column.path_in_schema
+        if name not in names or column.statistics is None:
+            continue
+        s = column.statistics
+        field = names[name]
+        if pa.types.is_integer(field) or pa.types.is_floating(field):
+            kinds[name] = 'number'
+        elif pa.types.is_timestamp(field) or pa.types.is_date(field):
+            kinds[name] = 'datetime'
+        else:
+            continue
+        if s.has_min_max:
+            low, high = s.min, s.max
+            if kinds[name] == 'datetime':
+                low, high = (pd.Timestamp(low).isoformat(),
+                             pd.Timestamp(high).isoformat())
+        elif s.null_count == row_group.num_rows:
+            low = high = None
+        else:
+            del kinds[name]
+            continue
+        stats[name] = {'min': low, 'max': high, 'nulls': s.null_count}
+    return stats, kinds
+
+
+def matching_row_groups(parquet_file, condition):
+    """Row groups whose statistics do not rule out ``condition``"""
+    schema = parquet_file.schema_arrow
+    names = {field.name: field.type for field in schema}
+    groups = []
+    for i in range(parquet_file.num_row_groups):
+        row_group = parquet_file.metadata.row_group(i)
+        if not row_group.num_rows:
+            continue
+        stats, kinds = row_group_stats(row_group, names)
+        if Pruner(condition, kinds).may_match(stats):
+            groups.append(i)
+    return groups
+
+
+def read_chunks(path, chunksize=100000, columns=None, condition=None):
+    """DataFrames of up to ``chunksize`` rows
+
+    Only ``columns`` are read.  For Parquet, row groups whose min/max
+    statistics rule out ``condition`` (a ``DataFrame.query`` string) are
+    skipped; the remaining rows are not filtered here.  Feather and
+    Arrow IPC files are memory-mapped.
+    """
+    _, pq = arrow()
+    if is_parquet(path):
+        parquet_file = pq.ParquetFile(str(path), memory_map=True)
+        groups = (matching_row_groups(parquet_file, condition) if condition
+                  else list(range(parquet_file.num_row_groups)))
+        empty = True
+        if groups:
+            for batch in parquet_file.iter_batches(batch_size=chunksize,
+                                                   row_groups=groups,
+                                                   columns=columns):
+                empty = False
+                yield batch.to_pandas()
+        if empty:
+            schema = parquet_file.schema_arrow
+            table = schema.empty_table()
+            yield (table.select(columns) if columns else table).to_pandas()
+        return
+
+    reader = open_ipc(path)
+    empty = True
+    for batch in ipc_batches(reader):
+        if columns is not None:
+            batch = batch.select(columns)
+        for start in range(0, batch.num_rows, chunksize):
+            empty = False
+            yield batch.slice(start, chunksize).to_pandas()
+    if empty:
+        schema = reader.schema
+        table = schema.empty_table()
+        yield (table.select(columns) if columns else table).to_pandas()
+
+
+def read_frame(path, columns=None, condition=None):
+    """A whole file as one DataFrame, read as in ``read_chunks``"""
+    return pd.concat(read_chunks(path, READ_ALL, columns, condition),
+                     ignore_index=True)
+
+
+def arrow_type(kind):
+    """Arrow type of a ``csv_schema`` dtype name, or None"""
+    pa, _ = arrow()
+    return {'int64': pa.int64(), 'float64': pa.float64(),
+            'bool': pa.bool_(), 'string': pa.string()}.get(kind)
+
+
+class ColumnarWriter:
+    """Write DataFrame chunks to Parquet, Feather or Arrow IPC
+
+    The schema comes from the first chunk, with the types of ``dtypes``
+    (``csv_schema`` dtype names per column) taking precedence; later
+    chunks are cast to it.  Rows are grouped into row groups (record
+    batches for IPC) of ``row_group_size`` rows, or one per chunk by
+    default.
+    """
+
+    def __init__(self, path, compression=None, row_group_size=None,
+                 dtypes=None):
+        """Prepare to write ``path``; ``compression`` 'none' disables it"""
+        self.pa, self.pq = arrow()
+        self.dtypes = dtypes or {}
+        self.path = str(path)
+        suffix = Path(path).suffix.lower()
+        self.compression = (COMPRESSION[suffix] if compression is None
+                            else compression)
+        if self.compression == 'none':
+            self.compression = None
+        self.row_group_size = row_group_size
+        self.writer = None
+        self.schema = None
+        self.pending = []
+        self.pending_rows = 0
+        self.rows = 0
+
+    def open(self, schema):
+        """Start the file with ``schema``"""
+        self.schema = schema
+        if is_parquet(self.path):
+            self.writer = self.pq.ParquetWriter(
+                self.path, schema, compression=self.compression or 'none'
+            )
+        else:
+            options = self.pa.ipc.IpcWriteOptions(
+                compression=self.compression
+            )
+            self.writer = self.pa.ipc.new_file(self.path, schema,
+                                               options=options)
+
+    def write(self, chunk):
+        """Append the rows of ``chunk``"""
+        # Each chunk would bring its own dictionary; write plain values
+        categorical = {column: chunk[column].cat.categories.dtype
+                       for column in chunk.columns
+                       if isinstance(chunk[column].dtype,
+                                     pd.CategoricalDtype)}
+        if categorical:
+            chunk = chunk.astype(categorical)
+        table = self.pa.Table.from_pandas(chunk, preserve_index=False)
+        if self.writer is None:
+            schema = self.pa.schema([
+                field.with_type(arrow_type(self.dtypes.get(field.name))
+                                or field.type)
+                for field in table.schema
+            ])
+            self.open(schema)
+            table = table.cast(schema)
+        else:
+            try:
+                table = table.cast(self.schema)
+            except (self.pa.ArrowInvalid, self.pa.ArrowNotImplementedError,
+                    ValueError) as e:
+                raise ValueError("Column types changed between chunks "
+                                 f"({e}); use a larger --chunksize or "
+                                 "--chunksize 0")
+        self.rows += table.num_rows
+        if self.row_group_size is None:
+            self.writer.write_table(table)
+            return
+        self.pending.append(table)
+        self.pending_rows += table.num_rows
+        if self.pending_rows >= self.row_group_size:
+            self.flush(final=False)
+
+    def flush(self, final=True):
+        """Write the buffered rows as full row groups (and the rest)"""
+        if not self.pending:
+            return
+        table = self.pa.concat_tables(self.pending)
+        size = self.row_group_size
+        full = table.num_rows if final else (table.num_rows // size * size)
+        for start in range(0, full, size):
+            part = table.slice(start, min(size, full - start))
+            if is_parquet(self.path):
+                self.writer.write_table(part, row_group_size=size)
+            else:
+                # One record batch per group
+                self.writer.write_table(part.combine_chunks(),
+                                        max_chunksize=size)
+        rest = table.slice(full)
+        self.pending = [rest] if rest.num_rows else []
+        self.pending_rows = rest.num_rows
+
+    def close(self):
+        """Finish the file; without chunks it gets an empty schema"""
+        if self.writer is None:
+            self.open(self.pa.schema([]))
+        self.flush()
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
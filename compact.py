@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Compact - Shrink DataFrames in memory with smaller dtypes and categoricals
+"""
+
+import numpy as np
+import pandas as pd
+
+from csv_schema import CATEGORY_RATIO, MAX_CATEGORIES
+
+
+def memory_mb(df):
+    """Deep memory usage of a frame in MB"""
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+
+def downcast(series):
+    """Smallest dtype that holds every value of a numeric column exactly
+
+    Integers go to the smallest signed integer type that fits their range.
+    Floats go to float32 only when every value survives the round trip.
+    Other columns are returned unchanged.
+    """
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return series
+    if pd.api.types.is_integer_dtype(dtype):
+        return pd.to_numeric(series, downcast='integer')
+    if pd.api.types.is_float_dtype(dtype) and dtype != np.float32:
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        with np.errstate(over='ignore', invalid='ignore'):
+            narrow = values.astype(np.float32)
+        same = (narrow.astype(np.float64) == values) | np.isnan(values)
+        if same.all():
+            return series.astype(np.float32)
+    return series
+
+
+def categorize(series, max_categories=MAX_CATEGORIES,
+               ratio=CATEGORY_RATIO):
+    """Low-cardinality string column as 'category', others unchanged"""
+    dtype = series.dtype
+    if not (pd.api.types.is_object_dtype(dtype)
+            or pd.api.types.is_string_dtype(dtype)):
+        return series
+    non_null = int(series.count())
+    if not non_null:
+        return series
+    distinct = series.nunique()
+    if distinct > max_categories or distinct > ratio * non_null:
+        return series
+    return series.astype('category')
+
+
+def compact_frame(df, max_categories=MAX_CATEGORIES, ratio=CATEGORY_RATIO):
+    """Downcast numerics and categorize strings, one column at a time
+
+    Columns are replaced in place so only one column is ever copied.
+    Returns the names of the columns whose dtype changed.
+    """
+    changed = []
+    for column in df.columns:
+        series = df[column]
+        compacted = categorize(downcast(series), max_categories, ratio)
+        if compacted.dtype != series.dtype:
+            df[column] = compacted
+            changed.append(column)
+    return changed
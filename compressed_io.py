@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Compressed IO - Detect compressed files and write them in parallel blocks
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+SUFFIXES = {'.gz': 'gzip', '.gzip': 'gzip', '.bz2': 'bz2', '.xz': 'xz',
+            '.zst': 'zstd'}
+
+MAGIC = ((b'\x1f\x8b', 'gzip'), (b'BZh', 'bz2'),
+         (b'\xfd7zXZ\x00', 'xz'), (b'\x28\xb5\x2f\xfd', 'zstd'))
+
+# Uncompressed bytes per independently compressed block (gzip member,
+# bz2/xz stream, zstd frame); concatenated blocks are one valid file
+BLOCK_SIZE = 4 * 1024 * 1024
+
+LEVELS = {'gzip': 6, 'bz2': 9, 'xz': 6, 'zstd': 3}
+
+
+def zstandard():
+    """The zstandard module, or a ValueError when it is not installed"""
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("zstd files need zstandard "
+                         "(pip install zstandard)")
+    return zstandard
+
+
+def detect(path, magic=True):
+    """Codec of a file from its suffix, else its first bytes; or None"""
+    codec = SUFFIXES.get(Path(path).suffix.lower())
+    if codec is not None or not magic:
+        return codec
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(6)
+    except OSError:
+        return None
+    for prefix, codec in MAGIC:
+        if head.startswith(prefix):
+            return codec
+    return None
+
+
+def data_suffix(path):
+    """Suffix of the data format: '.csv' for both x.csv and x.csv.gz"""
+    path = Path(path)
+    if path.suffix.lower() in SUFFIXES:
+        path = path.with_suffix('')
+    return path.suffix.lower()
+
+
+def open_read(path, encoding=None):
+    """Open a possibly compressed file, decompressing as it is read
+
+    Binary without ``encoding``, text with it.
+    """
+    codec = detect(path)
+    if codec is None:
+        raw = open(path, 'rb')
+    elif codec == 'gzip':
+        raw = gzip.open(path, 'rb')
+    elif codec == 'bz2':
+        raw = bz2.open(path, 'rb')
+    elif codec == 'xz':
+        raw = lzma.open(path, 'rb')
+    else:
+        reader = zstandard().ZstdDecompressor().stream_reader(
+            open(path, 'rb'), closefd=True, read_across_frames=True
+        )
+        raw = io.BufferedReader(reader)
+    if encoding is None:
+        return raw
+    return io.TextIOWrapper(raw, encoding=encoding)
+
+
+def compress(codec, data, level):
+    """One self-contained compressed block"""
+    if codec == 'gzip':
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if codec == 'bz2':
+        return bz2.compress(data, compresslevel=level)
+    if codec == 'xz':
+        return lzma.compress(data, preset=level)
+    return zstandard().ZstdCompressor(level=level).compress(data)
+
+
+class BlockWriter(io.BufferedIOBase):
+    """Binary writer that compresses BLOCK_SIZE blocks on a thread pool
+
+    Like pigz, each block is compressed independently (the codecs
+    release the GIL, so threads run in parallel) and the blocks are
+    written in order; gzip, bz2, xz and zstd readers all accept such
+    concatenated members as one stream.  At most two blocks per worker
+    are in flight, which bounds memory.
+    """
+
+    def __init__(self, path, codec, workers=None, level=None, append=False):
+        """Open ``path`` for writing (or appending) ``codec`` blocks"""
+        super().__init__()
+        if codec == 'zstd':
+            zstandard()
+        self.codec = codec
+        self.level = LEVELS[codec] if level is None else level
+        self.workers = workers or os.cpu_count() or 1
+        self.file = open(path, 'ab' if append else 'wb')
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        self.pending = deque()
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= BLOCK_SIZE:
+            self.submit(bytes(self.buffer[:BLOCK_SIZE]))
+            del self.buffer[:BLOCK_SIZE]
+        return len(data)
+
+    def submit(self, block):
+        """Queue a block, writing finished ones to keep the queue short"""
+        self.pending.append(self.executor.submit(compress, self.codec,
+                                                 block, self.level))
+        while len(self.pending) > 2 * self.workers:
+            self.file.write(self.pending.popleft().result())
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self.buffer:
+                self.submit(bytes(self.buffer))
+                self.buffer = bytearray()
+            while self.pending:
+                self.file.write(self.pending.popleft().result())
+        finally:
+            self.executor.shutdown()
+            self.file.close()
+            super().close()
+
+
+def open_write(path, encoding='utf-8', append=False, workers=None,
+               level=None):
+    """Open a text file for writing, compressed if its suffix says so
+
+    Compressed output goes through a BlockWriter with ``workers``
+    threads; plain output is an ordinary file.
+    """
+    codec = detect(path, magic=False)
+    if codec is None:
+        return open(path, 'a' if append else 'w', encoding=encoding,
+                    newline='')
+    writer = BlockWriter(path, codec, workers, level, append)
+    return io.TextIOWrapper(writer, encoding=encoding, newline='')
@@ -8,44 +8,292 @@ import argparse
 import sys
 from pathlib import Path
 
+import compressed_io
+import csv_schema
+from column_cache import ColumnCache
+import parallel_reader
+import zone_map
+from external_sort import ExternalSorter
+from partial_aggregate import aggregate_chunks
+from query_plan import QueryPlan, query
+from top_n import TopNCollector, top_n
+
 
 class CSVProcessor:
     """Process CSV files with filtering, sorting, and transformation"""
 
-    def __init__(self, input_file, encoding='utf-8'):
-        """Initialize CSV processor"""
+    # Operations that streaming mode can run without loading the file
+    STREAMING_OPS = ('filter', 'select', 'sort', 'limit', 'topn',
+                     'aggregate')
+
+    def __init__(self, input_file, encoding='utf-8', chunksize=None,
+                 lazy=False, memory_limit_mb=256, workers=None, cache=False,
+                 cache_dir=None, parse_dates=False, categories=False):
+        """Initialize CSV processor
+
+        With ``chunksize`` set the file is not loaded up front; filters and
+        column selections are queued and applied chunk by chunk on save,
+        a sort becomes an external merge sort that spills runs of at most
+        ``memory_limit_mb`` to disk, and an aggregate is computed from
+        per-chunk partials on a pool of ``workers`` processes.  A sort
+        followed by a limit keeps only a running top N.
+        With ``cache`` set whole-file loads go through the memory-mapped
+        column cache in ``cache_dir``.
+        With ``lazy`` set every operation is only recorded in a query plan
+        that is optimized and executed once by ``collect()`` or ``save()``.
+        ``parse_dates`` loads ISO-8601 text columns as datetimes and
+        ``categories`` low-cardinality text columns as ordered
+        categoricals, so filters compare them as such.
+        """
         self.input_file = input_file
         self.encoding = encoding
+        self.chunksize = chunksize
+        self.lazy = lazy
+        self.memory_limit_mb = memory_limit_mb
+        self.workers = workers
+        self.cache = ColumnCache(cache_dir) if cache else None
+        self.options = {'parse_dates': parse_dates, 'categories': categories}
         self.df = None
-        self.load_data()
+        self.plan = None
+
+        if self.chunksize or self.lazy:
+            self.load_header()
+            mode = 'Lazy plan' if self.lazy else 'Streaming'
+            print(f"✅ {mode} over {self.input_file}"
+                  + (f" in chunks of {self.chunksize} rows"
+                     if self.chunksize else ""))
+        else:
+            self.load_data()
 
     def load_data(self):
-        """Load CSV file into pandas DataFrame"""
+        """Load CSV file into pandas DataFrame
+
+        Dtypes come from the schema sidecar when one exists; otherwise
+        they are inferred.
+        """
         try:
-            self.df = pd.read_csv(self.input_file, encoding=self.encoding)
+            self.df = self.read_csv()
             print(f"✅ Loaded {len(self.df)} rows from {self.input_file}")
         except Exception as e:
             print(f"❌ Error loading file: {e}")
             sys.exit(1)
 
+    def read_csv(self, usecols=None, steps=()):
+        """Read the whole input, through the column cache when enabled
+
+        Large files are parsed in parallel across ``workers`` processes.
+        When a zone map exists, blocks the filters in ``steps`` rule out
+        are not parsed at all.
+        """
+        if self.cache is not None:
+            return self.cache.read_csv(self.input_file, usecols=usecols,
+                                       encoding=self.encoding,
+                                       workers=self.workers, **self.options)
+        ranges = self.matching_ranges(steps)
+        if ranges is not None:
+            return zone_map.read_blocks(self.input_file, ranges,
+                                        usecols=usecols,
+                                        encoding=self.encoding,
+                                        workers=self.workers, **self.options)
+        return parallel_reader.read_csv(self.input_file,
+                                        workers=self.workers,
+                                        encoding=self.encoding,
+                                        usecols=usecols, **self.options)
+
+    def load_header(self):
+        """Read only the header and start an empty query plan"""
+        try:
+            columns = pd.read_csv(self.input_file, encoding=self.encoding,
+                                  nrows=0).columns
+            self.plan = QueryPlan(columns)
+        except Exception as e:
+            print(f"❌ Error loading file: {e}")
+            sys.exit(1)
+
+    def read_chunks(self, **kwargs):
+        """Iterate over the input file in chunks of ``chunksize`` rows"""
+        return csv_schema.read_csv(self.input_file, encoding=self.encoding,
+                                   chunksize=self.chunksize, **self.options,
+                                   **kwargs)
+
+    def matching_ranges(self, steps):
+        """Byte ranges the zone map cannot rule out for ``steps``' filters
+
+        Returns None when there are no filters or no up-to-date index.
+        """
+        conditions = [arg for op, arg in steps if op == 'filter']
+        if not conditions:
+            return None
+        index = zone_map.load_index(self.input_file)
+        if index is None:
+            return None
+        ranges = zone_map.matching_blocks(
+            index, ' and '.join(f"({c})" for c in conditions),
+            self.options['parse_dates']
+        )
+        print(f"🔍 Zone map: scanning {len(ranges)} of "
+              f"{len(index['blocks'])} blocks")
+        return ranges
+
+    def scan_chunks(self, usecols=None, steps=()):
+        """Chunks for a streaming scan, skipping zone-map-pruned blocks"""
+        ranges = self.matching_ranges(steps)
+        if ranges is None:
+            return self.read_chunks(usecols=usecols)
+        return zone_map.iter_blocks(self.input_file, ranges, usecols=usecols,
+                                    encoding=self.encoding, **self.options)
+
+    def apply_operations(self, chunk):
+        """Apply queued streaming operations to a single chunk"""
+        return QueryPlan.apply(chunk, self.plan.optimize())
+
+    def defer(self, op, arg, label):
+        """Record an operation in the plan instead of running it
+
+        Returns False when the operation has to run eagerly.
+        """
+        if self.plan is None:
+            return False
+
+        if self.lazy or op in self.STREAMING_OPS:
+            self.plan.add(op, arg)
+            print(f"✅ Queued {label}")
+        else:
+            print(f"❌ Error: {op} is not supported in streaming mode")
+        return True
+
+    def explain(self):
+        """Print and return the optimized query plan"""
+        if self.plan is None:
+            text = "== No deferred plan: operations run eagerly =="
+        else:
+            text = self.plan.explain(self.input_file)
+        print(text)
+        return text
+
+    def collect(self):
+        """Execute the recorded plan once and load the result into self.df
+
+        Only the columns the plan needs are parsed.  In streaming mode the
+        filter/select prefix runs chunk by chunk before the remaining steps,
+        a leading aggregate is merged from per-chunk partials, a leading
+        top-N keeps a bounded running result, and a leading limit stops
+        reading once it has enough rows.
+        """
+        if self.plan is None:
+            return self.df
+
+        usecols = self.plan.required_columns()
+        head, tail = self.plan.split()
+        first = tail[0][0] if tail else None
+        try:
+            if self.chunksize:
+                chunks = (
+                    QueryPlan.apply(chunk, head)
+                    for chunk in self.scan_chunks(usecols, head)
+                )
+            if self.chunksize and first == 'aggregate':
+                group_by, agg_dict = tail[0][1]
+                df = aggregate_chunks(chunks, group_by, agg_dict,
+                                      workers=self.workers)
+                tail = tail[1:]
+            elif self.chunksize and first == 'topn':
+                column, ascending, n = tail[0][1]
+                collector = TopNCollector(column, ascending, n)
+                for chunk in chunks:
+                    collector.add(chunk)
+                df = collector.result()
+                if df is None:
+                    df = self.empty_frame(usecols, head)
+                tail = tail[1:]
+            elif self.chunksize:
+                limit = tail[0][1] if first == 'limit' else None
+                parts = []
+                rows = 0
+                for chunk in chunks:
+                    if limit is not None:
+                        chunk = chunk.head(limit - rows)
+                    parts.append(chunk)
+                    rows += len(chunk)
+                    if limit is not None and rows >= limit:
+                        break
+                if not parts:
+                    parts = [self.empty_frame(usecols, head)]
+                df = pd.concat(parts, ignore_index=True)
+            else:
+                df = QueryPlan.apply(self.read_csv(usecols, head), head)
+            self.df = QueryPlan.apply(df, tail)
+            self.plan = None
+            print(f"✅ Executed plan: {len(self.df)} rows")
+        except Exception as e:
+            print(f"❌ Error executing plan: {e}")
+        return self.df
+
+    def empty_frame(self, usecols, steps):
+        """Zero-row result of ``steps`` over the (projected) header"""
+        return QueryPlan.apply(
+            pd.read_csv(self.input_file, encoding=self.encoding,
+                        usecols=usecols, nrows=0),
+            steps
+        )
+
     def filter_rows(self, condition):
         """Filter rows based on condition"""
+        if self.defer('filter', condition, f"filter: {condition}"):
+            return
+
         try:
-            self.df = self.df.query(condition)
+            self.df = query(self.df, condition)
             print(f"✅ Filtered to {len(self.df)} rows")
         except Exception as e:
             print(f"❌ Error filtering: {e}")
 
     def sort_by(self, column, ascending=True):
-        """Sort DataFrame by column"""
+        """Sort DataFrame by one or more columns
+
+        ``column`` and ``ascending`` may be lists for multi-column keys.
+        """
+        if self.defer('sort', (column, ascending), f"sort by {column}"):
+            return
+
         try:
             self.df = self.df.sort_values(by=column, ascending=ascending)
             print(f"✅ Sorted by {column}")
         except Exception as e:
             print(f"❌ Error sorting: {e}")
 
+    def limit(self, n):
+        """Keep only the first ``n`` rows"""
+        if self.defer('limit', n, f"limit: {n} rows"):
+            return
+
+        self.df = self.df.head(n)
+        print(f"✅ Limited to {len(self.df)} rows")
+
+    def top_n(self, column, n, ascending=False):
+        """Keep the ``n`` rows with the largest values of ``column``
+
+        With ``ascending`` the smallest values are kept instead; the rows
+        come out in that sort order.  ``column`` and ``ascending`` may be
+        lists as in ``sort_by``.  Only ``n`` rows plus one chunk are held
+        at a time, and the full sort is never run.
+        """
+        if self.defer('topn', (column, ascending, n),
+                      f"top {n} rows by {column}"):
+            return
+
+        try:
+            self.df = top_n(self.df, column, n, ascending=ascending)
+            print(f"✅ Kept top {len(self.df)} rows by {column}")
+        except Exception as e:
+            print(f"❌ Error selecting top rows: {e}")
+
     def select_columns(self, columns):
         """Select specific columns"""
+        if self.defer('select', list(columns),
+                      f"column selection: {columns}"):
+            return
+
         try:
             self.df = self.df[columns]
             print(f"✅ Selected columns: {columns}")
@@ -53,23 +301,104 @@ class CSVProcessor:
             print(f"❌ Error selecting columns: {e}")
 
     def aggregate(self, group_by, agg_dict):
-        """Aggregate data by grouping"""
+        """Aggregate data by grouping
+
+        Streaming mode supports sum, count, min, max, mean, var and std.
+        """
+        if self.defer('aggregate', (group_by, agg_dict),
+                      f"aggregation by {group_by}"):
+            return
+
         try:
-            self.df = self.df.groupby(group_by).agg(agg_dict).reset_index()
+            self.df = self.df.groupby(
+                group_by, observed=True
+            ).agg(agg_dict).reset_index()
             print(f"✅ Aggregated by {group_by}")
         except Exception as e:
             print(f"❌ Error aggregating: {e}")
 
     def save(self, output_file):
         """Save processed data to CSV"""
+        if self.plan is not None:
+            head, tail = self.plan.split()
+            if self.chunksize and not tail:
+                self.save_stream(output_file)
+                return
+            if self.chunksize and len(tail) == 1 and tail[0][0] == 'sort':
+                self.save_sorted(output_file, head, *tail[0][1])
+                return
+            self.collect()
+
         try:
-            self.df.to_csv(output_file, index=False, encoding=self.encoding)
+            with compressed_io.open_write(output_file, self.encoding) as f:
+                self.df.to_csv(f, index=False)
             print(f"✅ Saved to {output_file}")
         except Exception as e:
             print(f"❌ Error saving: {e}")
 
+    def save_stream(self, output_file):
+        """Stream the input through queued operations, appending to output"""
+        try:
+            rows = 0
+            chunks = 0
+            usecols = self.plan.required_columns()
+            steps = self.plan.optimize()
+            with compressed_io.open_write(output_file, self.encoding) as f:
+                for chunk in self.scan_chunks(usecols, steps):
+                    chunk = self.apply_operations(chunk)
+                    chunk.to_csv(f, index=False, header=(chunks == 0))
+                    rows += len(chunk)
+                    chunks += 1
+
+                if chunks == 0:
+                    # Empty input: still write the (projected) header
+                    empty = pd.read_csv(self.input_file,
+                                        encoding=self.encoding,
+                                        usecols=usecols, nrows=0)
+                    self.apply_operations(empty).to_csv(f, index=False)
+
+            print(f"✅ Saved {rows} rows from {chunks} chunks "
+                  f"to {output_file}")
+        except Exception as e:
+            print(f"❌ Error saving: {e}")
+
+    def save_sorted(self, output_file, steps, column, ascending):
+        """Stream the input through ``steps`` into an external merge sort"""
+        try:
+            sorter = ExternalSorter(column, ascending=ascending,
+                                    memory_limit_mb=self.memory_limit_mb)
+            chunks = (
+                QueryPlan.apply(chunk, steps)
+                for chunk in self.scan_chunks(
+                    self.plan.required_columns(), steps
+                )
+            )
+            rows = sorter.sort_chunks(chunks, output_file,
+                                      encoding=self.encoding)
+            print(f"✅ Sorted {rows} rows by {column} "
+                  f"({sorter.runs} spilled runs) to {output_file}")
+        except Exception as e:
+            print(f"❌ Error sorting: {e}")
+
     def show_info(self):
         """Display DataFrame information"""
+        if self.lazy and self.plan is not None:
+            self.collect()
+
+        if self.plan is not None:
+            head = self.apply_operations(
+                pd.read_csv(self.input_file, encoding=self.encoding,
+                            usecols=self.plan.required_columns(),
+                            nrows=self.chunksize)
+            )
+            print("\n📊 Data Info (streaming, first chunk):")
+            print(f"Chunk size: {self.chunksize}")
+            print(f"Columns: {len(head.columns)}")
+            print(f"\nColumn names: {list(head.columns)}")
+            print(f"\nFirst 5 rows:")
+            print(head.head())
+            return
+
         print("\n📊 Data Info:")
         print(f"Rows: {len(self.df)}")
         print(f"Columns: {len(self.df.columns)}")
@@ -84,14 +413,56 @@ def main():
     parser.add_argument('input', help='Input CSV file')
     parser.add_argument('output', help='Output CSV file')
     parser.add_argument('--filter', help='Filter condition (e.g., "age>25")')
-    parser.add_argument('--sort', help='Column to sort by')
+    parser.add_argument('--sort',
+                        help='Comma-separated columns to sort by, prefix '
+                             'with - for descending (e.g. "date,-revenue")')
+    parser.add_argument('--limit', type=int,
+                        help='Keep only the first N rows; with --sort, '
+                             'the top N without a full sort')
     parser.add_argument('--columns', help='Comma-separated columns to select')
+    parser.add_argument('--group-by',
+                        help='Comma-separated columns to group by')
+    parser.add_argument('--agg',
+                        help='Comma-separated column:func aggregates '
+                             '(e.g. "revenue:sum,revenue:mean,qty:max")')
     parser.add_argument('--info', action='store_true', help='Show data info')
+    parser.add_argument('--chunksize', type=int,
+                        help='Stream the input in chunks of N rows '
+                             '(filter/columns/sort/aggregate)')
+    parser.add_argument('--memory-limit', type=int, default=256,
+                        help='Memory budget in MB for external sorting '
+                             '(default: 256)')
+    parser.add_argument('--cache', action='store_true',
+                        help='Load through the memory-mapped column cache')
+    parser.add_argument('--cache-dir', help='Column cache directory')
+    parser.add_argument('--parse-dates', action='store_true',
+                        help='Load ISO-8601 date columns as datetimes')
+    parser.add_argument('--categories', action='store_true',
+                        help='Load low-cardinality text columns as ordered '
+                             'categoricals')
+    parser.add_argument('--workers', type=int,
+                        help='Processes for parsing and streaming '
+                             'aggregation (default: CPU count)')
+    parser.add_argument('--lazy', action='store_true',
+                        help='Record operations and execute one optimized '
+                             'plan on save')
+    parser.add_argument('--explain', action='store_true',
+                        help='Print the optimized plan '
+                             '(with --lazy or --chunksize)')
 
     args = parser.parse_args()
 
-    # Process CSV
-    processor = CSVProcessor(args.input)
+    # Process CSV; a zone map index can only skip blocks for a lazy plan
+    lazy = args.lazy or bool(
+        args.filter and zone_map.load_index(args.input) is not None
+    )
+    processor = CSVProcessor(args.input, chunksize=args.chunksize,
+                             lazy=lazy,
+                             memory_limit_mb=args.memory_limit,
+                             workers=args.workers, cache=args.cache,
+                             cache_dir=args.cache_dir,
+                             parse_dates=args.parse_dates,
+                             categories=args.categories)
 
     if args.filter:
         processor.filter_rows(args.filter)
@@ -100,8 +471,40 @@ def main():
         cols = [c.strip() for c in args.columns.split(',')]
         processor.select_columns(cols)
 
+    if args.group_by or args.agg:
+        if not (args.group_by and args.agg):
+            parser.error('--group-by and --agg must be used together')
+        group_by = [c.strip() for c in args.group_by.split(',')]
+        agg_dict = {}
+        for spec in args.agg.split(','):
+            column, _, func = spec.strip().rpartition(':')
+            if not column:
+                parser.error(f'Invalid aggregate "{spec}", '
+                             'expected column:func')
+            agg_dict.setdefault(column, []).append(func)
+        agg_dict = {
+            column: funcs[0] if len(funcs) == 1 else funcs
+            for column, funcs in agg_dict.items()
+        }
+        processor.aggregate(
+            group_by[0] if len(group_by) == 1 else group_by, agg_dict
+        )
+
     if args.sort:
-        processor.sort_by(args.sort)
+        keys = [k.strip() for k in args.sort.split(',')]
+        columns = [k.lstrip('-') for k in keys]
+        ascending = [not k.startswith('-') for k in keys]
+        if len(columns) == 1:
+            columns, ascending = columns[0], ascending[0]
+        if args.limit is not None:
+            processor.top_n(columns, args.limit, ascending=ascending)
+        else:
+            processor.sort_by(columns, ascending=ascending)
+    elif args.limit is not None:
+        processor.limit(args.limit)
+
+    if args.explain:
+        processor.explain()
 
     if args.info:
         processor.show_info()
@@ -112,31 +515,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
-# Simplify data migration to enhance security - 2025-10-27 06:40:24
-# Improved: 2025-10-27 06:40:24
-# Additional configuration
-
-# Add deployment script in test suite - 2025-12-01 18:57:48
-async def async_operation():
-    """Async operation support"""
-    result = await fetch_data()
-    return process(result)
-
-# Adjust search functionality - 2025-12-04 06:59:26
-# Modified: 2025-12-04 06:59:26
-CONFIG_VALUE = 'new_value'
-
-# Add file upload feature - 2025-12-29 00:28:47
-def new_feature():
-    """New feature implementation"""
-    logger.info('Feature working')
-    return True
-
-# Add monitoring setup in file handler - 2026-02-13 16:03:32
-class NewFeature:
-    def __init__(self):
-        self.enabled = True
-    
-    def execute(self):
-        return 'Feature executed'
\ No newline at end of file
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+CSV Schema - Dtype sidecar with date and category candidates for CSV loads
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+
+import pandas as pd
+
+import compressed_io
+
+
+SIDECAR_SUFFIX = '.schema.json'
+
+# Sidecars of other versions are ignored and rewritten
+SCHEMA_VERSION = 2
+
+# Text columns with at most this many distinct values (and at most
+# CATEGORY_RATIO distinct values per non-null row) are recorded as
+# category candidates; they only load as categoricals on request
+MAX_CATEGORIES = 1000
+CATEGORY_RATIO = 0.5
+
+# Values sampled per column when looking for ISO-8601 date columns
+DATE_SAMPLE = 1000
+ISO_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}'
+                      r'([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?'
+                      r'(Z|[+-]\d{2}:?\d{2})?$')
+
+
+def sidecar_path(csv_path):
+    """Return the schema sidecar path for a CSV file"""
+    return str(csv_path) + SIDECAR_SUFFIX
+
+
+def fingerprint(csv_path):
+    """Size and mtime of a file, used to detect a stale sidecar"""
+    stat = os.stat(csv_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def string_dtype():
+    """The dtype ``pd.read_csv`` gives text columns in this pandas"""
+    if int(pd.__version__.split('.')[0]) >= 3:
+        return 'str'
+    return 'object'
+
+
+class SchemaBuilder:
+    """Accumulate dtype, cardinality and date evidence over chunks"""
+
+    def __init__(self):
+        """Initialize an empty builder"""
+        self.kinds = {}
+        self.distinct = {}
+        self.non_null = {}
+        self.date_ok = {}
+
+    def update(self, chunk):
+        """Fold one chunk into the running evidence"""
+        for column in chunk.columns:
+            series = chunk[column]
+            kind = self.kind_of(series)
+            previous = self.kinds.get(column)
+            self.kinds[column] = kind if previous is None else self.unify(
+                previous, kind
+            )
+            if kind != 'string':
+                continue
+
+            values = series.dropna()
+            self.non_null[column] = self.non_null.get(column, 0) + len(values)
+            seen = self.distinct.get(column, set())
+            if seen is not None:
+                seen.update(values.unique().tolist())
+                if len(seen) > MAX_CATEGORIES:
+                    seen = None
+            self.distinct[column] = seen
+
+            if self.date_ok.get(column, True) and len(values):
+                sample = values.head(DATE_SAMPLE).astype(str)
+                self.date_ok[column] = bool(
+                    sample.str.match(ISO_DATE).all()
+                )
+
+    @staticmethod
+    def kind_of(series):
+        """Map a pandas dtype to the sidecar's dtype names"""
+        dtype = series.dtype
+        if pd.api.types.is_bool_dtype(dtype):
+            return 'bool'
+        if pd.api.types.is_integer_dtype(dtype):
+            return 'int64'
+        if pd.api.types.is_float_dtype(dtype):
+            return 'float64'
+        if pd.api.types.is_string_dtype(series):
+            return 'string'
+        # Mixed values, e.g. booleans with gaps: left to inference
+        return 'object'
+
+    @staticmethod
+    def unify(a, b):
+        """Widen two chunk dtypes the way a single read_csv would"""
+        if a == b:
+            return a
+        if {a, b} <= {'int64', 'float64'}:
+            return 'float64'
+        if 'object' in (a, b):
+            return 'object'
+        return 'string'
+
+    def build(self, source=None):
+        """Return the schema dict
+
+        ``dtypes`` are the types a plain ``pd.read_csv`` infers; date
+        and category columns are only recorded as candidates, with the
+        sorted values of each category candidate.
+        """
+        dtypes = {}
+        categories = {}
+        dates = []
+        for column, kind in self.kinds.items():
+            if kind == 'string' and self.non_null.get(column):
+                seen = self.distinct.get(column)
+                if self.date_ok.get(column):
+                    dates.append(column)
+                elif seen is not None and (
+                    len(seen) <= CATEGORY_RATIO * self.non_null[column]
+                ):
+                    categories[column] = sorted(seen)
+            dtypes[column] = kind
+
+        return {
+            'version': SCHEMA_VERSION,
+            'source': source,
+            'dtypes': dtypes,
+            'categorical': list(categories),
+            'categories': categories,
+            'dates': dates,
+        }
+
+
+def infer_schema(csv_path, encoding='utf-8', chunksize=100000):
+    """Infer a schema with one chunked pass over the file"""
+    builder = SchemaBuilder()
+    for chunk in pd.read_csv(csv_path, encoding=encoding,
+                             chunksize=chunksize,
+                             compression=compressed_io.detect(csv_path)):
+        builder.update(chunk)
+    return builder.build(fingerprint(csv_path))
+
+
+def schema_from_frame(df, csv_path):
+    """Build a schema from an already loaded frame"""
+    builder = SchemaBuilder()
+    builder.update(df)
+    return builder.build(fingerprint(csv_path))
+
+
+def save_schema(csv_path, schema):
+    """Write the sidecar next to the CSV file"""
+    path = sidecar_path(csv_path)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(schema, f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def load_schema(csv_path):
+    """Return the stored schema, or None if there is no readable sidecar"""
+    try:
+        with open(sidecar_path(csv_path), encoding='utf-8') as f:
+            schema = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(schema, dict) or (
+        schema.get('version') != SCHEMA_VERSION
+    ):
+        return None
+    return schema
+
+
+def is_fresh(schema, csv_path):
+    """True if the sidecar was written for the file as it is now"""
+    return schema.get('source') == fingerprint(csv_path)
+
+
+def read_kwargs(schema, usecols=None, parse_dates=False, categories=False):
+    """Translate a schema into ``pd.read_csv`` keyword arguments
+
+    The dtypes match plain inference.  ``parse_dates`` also parses the
+    ISO date candidates, and ``categories`` loads the category
+    candidates as ordered categoricals (values in sorted order).
+    """
+    wanted = None if usecols is None or callable(usecols) else set(usecols)
+    candidates = schema.get('categories', {}) if categories else {}
+    date_columns = set(schema.get('dates', [])) if parse_dates else set()
+    dtype = {}
+    dates = []
+    for column, kind in schema['dtypes'].items():
+        if wanted is not None and column not in wanted:
+            continue
+        if column in date_columns:
+            dates.append(column)
+        elif column in candidates:
+            dtype[column] = pd.CategoricalDtype(candidates[column],
+                                                ordered=True)
+        elif kind == 'string':
+            dtype[column] = string_dtype()
+        elif kind != 'object':
+            dtype[column] = kind
+
+    kwargs = {'dtype': dtype}
+    if dates:
+        kwargs['parse_dates'] = dates
+    return kwargs
+
+
+def current_schema(csv_path, encoding='utf-8'):
+    """The fresh sidecar's schema, else one inferred in memory
+
+    Inference takes a chunked pass over the file; nothing is written.
+    """
+    schema = load_schema(csv_path)
+    if schema is not None and is_fresh(schema, csv_path):
+        return schema
+    return infer_schema(csv_path, encoding)
+
+
+def apply_candidates(df, schema, parse_dates=False, categories=False):
+    """Convert a plainly read frame the way ``read_kwargs`` reads it"""
+    if parse_dates:
+        for column in schema.get('dates', []):
+            try:
+                df[column] = pd.to_datetime(df[column], format='ISO8601')
+            except (ValueError, TypeError):
+                # Only a sample was checked; keep the column as text
+                pass
+    if categories:
+        for column, values in schema.get('categories', {}).items():
+            df[column] = df[column].astype(
+                pd.CategoricalDtype(values, ordered=True)
+            )
+    return df
+
+
+def read_csv(csv_path, parse_dates=False, categories=False, **kwargs):
+    """``pd.read_csv`` that reuses the schema sidecar
+
+    With a fresh sidecar (written by ``python csv_schema.py``) the file
+    is read with explicit dtypes, the same ones inference would give, so
+    a cached run returns what a cold one does.  Reads never write a
+    sidecar.  ``parse_dates`` and ``categories`` opt in to dates and
+    ordered categoricals (see ``read_kwargs``); without a fresh sidecar
+    their candidates come from the loaded frame, or for a chunked read
+    from an inference pass first.  Compressed files are decompressed as
+    they are read.
+    """
+    kwargs.setdefault('compression', compressed_io.detect(csv_path))
+    chunked = kwargs.get('chunksize') is not None
+    if chunked and (parse_dates or categories):
+        schema = current_schema(csv_path, kwargs.get('encoding', 'utf-8'))
+    else:
+        schema = load_schema(csv_path)
+
+    if schema is not None and is_fresh(schema, csv_path):
+        typed = dict(kwargs)
+        schema_kwargs = read_kwargs(schema, kwargs.get('usecols'),
+                                    parse_dates, categories)
+        schema_kwargs['dtype'].update(kwargs.get('dtype') or {})
+        typed.update(schema_kwargs)
+        try:
+            return pd.read_csv(csv_path, **typed)
+        except (ValueError, TypeError):
+            # Data no longer matches the sidecar; fall back to inference
+            pass
+
+    df = pd.read_csv(csv_path, **kwargs)
+    if not chunked and (parse_dates or categories):
+        apply_candidates(df, schema_from_frame(df, csv_path), parse_dates,
+                         categories)
+    return df
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(
+        description='Infer and save a dtype sidecar for a CSV file'
+    )
+    parser.add_argument('input', help='Input CSV file')
+    parser.add_argument('--encoding', default='utf-8',
+                        help='File encoding (default: utf-8)')
+    parser.add_argument('--chunksize', type=int, default=100000,
+                        help='Rows per chunk for the inference pass')
+
+    args = parser.parse_args()
+
+    try:
+        schema = infer_schema(args.input, args.encoding, args.chunksize)
+        path = save_schema(args.input, schema)
+    except Exception as e:
+        print(f"❌ Error inferring schema: {e}")
+        sys.exit(1)
+
+    print(f"✅ Saved schema to {path}")
+    for column, kind in schema['dtypes'].items():
+        if column in schema['dates']:
+            kind += ' (date candidate)'
+        elif column in schema['categories']:
+            kind += ' (category candidate)'
+        print(f"  {column}: {kind}")
+
+
+if __name__ == "__main__":
+    main()
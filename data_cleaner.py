@@ -3,164 +3,470 @@
 Data Cleaner - Clean and validate data
 """
 
-import pandas as pd
-import numpy as np
 import argparse
 import sys
+from pathlib import Path
+
+import cleaning_recipe
+import column_parallel
+import compact
+import compressed_io
+import data_profile
+import dedup
+import incremental
+import missing_values
+import near_dedup
+import outliers
+import parallel_reader
+import validation
+from column_cache import ColumnCache
 
 
 class DataCleaner:
     """Clean and validate data"""
 
-    def __init__(self, input_file):
-        """Initialize data cleaner"""
+    def __init__(self, input_file, cache=False, cache_dir=None,
+                 workers=None, column_parallel=False, parse_dates=False,
+                 categories=False):
+        """Initialize data cleaner
+
+        With ``column_parallel``, filling and outlier detection split the
+        numeric columns across ``workers`` processes.  ``parse_dates``
+        and ``categories`` load ISO-8601 text columns as datetimes and
+        low-cardinality text columns as ordered categoricals.
+        """
         self.input_file = input_file
+        self.cache = ColumnCache(cache_dir) if cache else None
+        self.options = {'parse_dates': parse_dates, 'categories': categories}
+        self.workers = workers
+        self.column_parallel = column_parallel
         self.df = None
+        self.profile = None
         self.load_data()
 
     def load_data(self):
-        """Load data file"""
+        """Load data file, using the schema sidecar for dtypes"""
         try:
-            self.df = pd.read_csv(self.input_file)
+            if self.cache is not None:
+                self.df = self.cache.read_csv(self.input_file,
+                                              workers=self.workers,
+                                              **self.options)
+            else:
+                self.df = parallel_reader.read_csv(self.input_file,
+                                                   workers=self.workers,
+                                                   **self.options)
             print(f"✅ Loaded {len(self.df)} rows")
-            self.show_stats()
         except Exception as e:
             print(f"❌ Error loading file: {e}")
             sys.exit(1)
 
-    def show_stats(self):
-        """Show data statistics"""
-        print("\n📊 Data Statistics:")
-        print(f"Total rows: {len(self.df)}")
-        print(f"Total columns: {len(self.df.columns)}")
-        print(f"Duplicates: {self.df.duplicated().sum()}")
-        print(f"Missing values: {self.df.isnull().sum().sum()}")
-
-    def remove_duplicates(self):
-        """Remove duplicate rows"""
-        before = len(self.df)
-        self.df = self.df.drop_duplicates()
-        removed = before - len(self.df)
+    def show_stats(self, sample=None):
+        """Show data statistics
+
+        The profile is computed in one fused pass on first use, cached,
+        and kept current by the cleaning steps.  With ``sample`` only that
+        many random rows are profiled (not cached).
+        """
+        if sample is not None:
+            profile = data_profile.profile_frame(self.df, sample)
+        else:
+            if self.profile is None:
+                self.profile = data_profile.profile_frame(self.df)
+            profile = self.profile.refresh(self.df)
+        print("\n📊 Data Statistics"
+              + (" (sampled)" if profile.approximate else "") + ":")
+        profile.report()
+
+    def compact(self):
+        """Shrink the frame in memory and report the saving
+
+        Numeric columns are downcast to the smallest dtype that holds
+        every value exactly; low-cardinality strings become categoricals.
+        """
+        before = compact.memory_mb(self.df)
+        changed = compact.compact_frame(self.df)
+        after = compact.memory_mb(self.df)
+        if self.profile is not None:
+            self.profile.retype(self.df, changed)
+        ratio = before / after if after else 1.0
+        print(f"✅ Compacted {len(changed)} columns: {before:.1f} MB → "
+              f"{after:.1f} MB ({ratio:.1f}x smaller)")
+
+    def validate(self, rules, quarantine_file='quarantine.csv'):
+        """Move rows that break a rule to ``quarantine_file``
+
+        ``rules`` is a rule-set file or a ``validation.Validator``.  The
+        quarantined rows list the rules they broke; violations and time
+        are reported per rule.
+        """
+        try:
+            validator = (validation.load_rules(rules)
+                         if isinstance(rules, (str, Path)) else rules)
+            valid, quarantined = validator.split(self.df)
+            with compressed_io.open_write(quarantine_file) as f:
+                quarantined.to_csv(f, index=False)
+        except Exception as e:
+            print(f"❌ Error validating: {e}")
+            return
+
+        if self.profile is not None:
+            self.profile.remove(
+                quarantined.drop(columns=validation.REASONS_COLUMN)
+            )
+        self.df = valid
+        validator.report()
+        print(f"✅ Quarantined {len(quarantined)} rows to {quarantine_file}")
+
+    def remove_duplicates(self, subset=None):
+        """Remove duplicate rows, comparing only ``subset`` if given
+
+        Rows are compared by vectorized 64-bit hashes instead of tuples.
+        """
+        duplicated = dedup.HashDeduper(subset).duplicated(self.df)
+        if self.profile is not None:
+            self.profile.remove(self.df[duplicated],
+                                duplicates=subset is None)
+        self.df = self.df[~duplicated]
+        removed = int(duplicated.sum())
         print(f"✅ Removed {removed} duplicate rows")
 
-    def fill_missing_values(self, method='mean'):
-        """Fill missing values"""
-        numeric_cols = self.df.select_dtypes(include=[np.number]).columns
+    def remove_near_duplicates(self, columns=None, threshold=0.8):
+        """Remove rows that nearly repeat an earlier row
 
-        if method == 'mean':
-            self.df[numeric_cols] = self.df[numeric_cols].fillna(
-                self.df[numeric_cols].mean()
-            )
-        elif method == 'median':
-            self.df[numeric_cols] = self.df[numeric_cols].fillna(
-                self.df[numeric_cols].median()
+        A row is dropped when its normalized ``columns`` (default: the
+        text columns) have an estimated shingle Jaccard similarity of at
+        least ``threshold`` with an earlier row that is kept; candidates
+        come from MinHash/LSH.
+        """
+        try:
+            duplicated = near_dedup.near_duplicated(
+                self.df, columns, threshold, workers=self.workers
             )
-        elif method == 'zero':
-            self.df[numeric_cols] = self.df[numeric_cols].fillna(0)
+        except (ValueError, KeyError) as e:
+            print(f"❌ Error removing near duplicates: {e}")
+            return
 
-        # Fill string columns with 'Unknown'
-        string_cols = self.df.select_dtypes(include=['object']).columns
-        self.df[string_cols] = self.df[string_cols].fillna('Unknown')
-
-        print(f"✅ Filled missing values using {method} method")
+        if self.profile is not None:
+            self.profile.remove(self.df[duplicated])
+        self.df = self.df[~duplicated]
+        print(f"✅ Removed {int(duplicated.sum())} near-duplicate rows")
 
-    def remove_outliers(self, columns=None, threshold=3):
-        """Remove outliers using z-score"""
-        if columns is None:
-            columns = self.df.select_dtypes(include=[np.number]).columns
+    def fill_missing_values(self, method='mean'):
+        """Fill missing values
 
-        before = len(self.df)
+        ``method`` is 'mean', 'zero', 'median' or a percentile such as
+        'p90'; medians and percentiles are exact.  Text columns are
+        filled with 'Unknown'.
+        """
+        try:
+            if self.column_parallel:
+                filled = column_parallel.fill_missing(self.df, method,
+                                                      self.workers)
+            else:
+                values = missing_values.fill_values(self.df, method)
+                filled = missing_values.fill_frame(self.df, values)
+        except ValueError as e:
+            print(f"❌ Error filling missing values: {e}")
+            return
+
+        if self.profile is not None:
+            self.profile.invalidate(filled)
+        print(f"✅ Filled missing values using {method} method")
 
-        for col in columns:
-            z_scores = np.abs(
-                (self.df[col] - self.df[col].mean()) / self.df[col].std()
-            )
-            self.df = self.df[z_scores < threshold]
+    def remove_outliers(self, columns=None, threshold=None, method='zscore'):
+        """Remove rows with an outlier in any of ``columns``
 
-        removed = before - len(self.df)
-        print(f"✅ Removed {removed} outlier rows")
+        ``method`` is 'zscore' (default threshold 3), 'iqr' (fence of 1.5
+        IQRs) or 'mad' (modified z-score 3.5).  Every column's bounds come
+        from the same unfiltered data and are combined into one mask, so
+        the result does not depend on column order.
+        """
+        try:
+            if self.column_parallel:
+                mask = column_parallel.outlier_mask(
+                    self.df, columns, method, threshold, self.workers
+                )
+            else:
+                bounds = outliers.outlier_bounds(self.df, columns, method,
+                                                 threshold)
+                mask = outliers.outlier_mask(self.df, bounds).to_numpy()
+        except (ValueError, KeyError) as e:
+            print(f"❌ Error removing outliers: {e}")
+            return
+
+        if self.profile is not None:
+            self.profile.remove(self.df[mask])
+        self.df = self.df[~mask]
+        print(f"✅ Removed {int(mask.sum())} outlier rows")
 
     def standardize_columns(self):
         """Standardize column names"""
-        self.df.columns = [
-            col.lower().strip().replace(' ', '_')
+        mapping = {
+            col: col.lower().strip().replace(' ', '_')
             for col in self.df.columns
-        ]
+        }
+        self.df.columns = [mapping[col] for col in self.df.columns]
+        if self.profile is not None:
+            self.profile.rename(mapping)
         print("✅ Standardized column names")
 
     def save(self, output_file):
         """Save cleaned data"""
         try:
-            self.df.to_csv(output_file, index=False)
+            with compressed_io.open_write(output_file) as f:
+                self.df.to_csv(f, index=False)
             print(f"✅ Saved to {output_file}")
         except Exception as e:
             print(f"❌ Error saving: {e}")
 
 
+def run_recipe(args, subset):
+    """Run a recipe file, or the cleaning flags, in fused streaming passes"""
+    try:
+        if args.recipe:
+            recipe = cleaning_recipe.load_recipe(args.recipe,
+                                                 args.chunksize)
+        else:
+            recipe = cleaning_recipe.Recipe.from_spec(
+                flag_steps(args, subset), args.chunksize
+            )
+        rows = recipe.run(args.input, args.output)
+    except Exception as e:
+        print(f"❌ Error running recipe: {e}")
+        sys.exit(1)
+
+    recipe.report()
+    report_validation(recipe)
+    print(f"✅ Saved {rows} rows to {args.output}")
+    print("\n✅ Cleaning complete!")
+
+
+def report_validation(recipe):
+    """Print the per-rule counts of a recipe's validate steps"""
+    for step in recipe.steps:
+        if isinstance(step, cleaning_recipe.ValidateStep):
+            step.validator.report()
+            print(f"✅ Quarantined {step.validator.quarantined} rows to "
+                  f"{step.quarantine}")
+
+
+def flag_steps(args, subset):
+    """Recipe steps equivalent to the cleaning flags"""
+    steps = []
+    if args.rules:
+        steps.append({'step': 'validate', 'rules': args.rules,
+                      'quarantine': args.quarantine})
+    if args.remove_duplicates:
+        steps.append({'step': 'remove_duplicates', 'subset': subset})
+    if args.fill_missing:
+        steps.append({'step': 'fill_missing_values',
+                      'method': args.fill_missing})
+    if args.remove_outliers:
+        steps.append({'step': 'remove_outliers',
+                      'method': args.outlier_method,
+                      'threshold': args.outlier_threshold})
+    if args.standardize:
+        steps.append({'step': 'standardize_columns'})
+    return steps
+
+
+def run_incremental(args, subset):
+    """Clean only the rows appended since the last incremental run"""
+    state_file = args.state_file or args.output + '.state'
+    try:
+        if args.recipe:
+            recipe = cleaning_recipe.load_recipe(args.recipe,
+                                                 args.chunksize)
+        else:
+            recipe = cleaning_recipe.Recipe.from_spec(
+                flag_steps(args, subset), args.chunksize
+            )
+        rows, written = incremental.clean_incremental(
+            args.input, args.output, recipe, state_file
+        )
+    except Exception as e:
+        print(f"❌ Error cleaning incrementally: {e}")
+        sys.exit(1)
+
+    if not rows:
+        print("✅ No new rows since the last run")
+        return
+    recipe.report()
+    report_validation(recipe)
+    print(f"✅ Appended {written} of {rows} new rows to {args.output}")
+    print("\n✅ Cleaning complete!")
+
+
+def fill_method(value):
+    """argparse type for --fill-missing"""
+    try:
+        missing_values.parse_method(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+
 def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(description='Data Cleaner')
     parser.add_argument('input', help='Input CSV file')
     parser.add_argument('--output', default='cleaned_data.csv',
                         help='Output file')
+    parser.add_argument('--rules',
+                        help='JSON/YAML validation rule set; failing rows '
+                             'go to --quarantine')
+    parser.add_argument('--quarantine', default='quarantine.csv',
+                        help='Quarantine file for rows failing --rules '
+                             '(default: quarantine.csv)')
     parser.add_argument('--remove-duplicates', action='store_true',
                         help='Remove duplicate rows')
-    parser.add_argument('--fill-missing', choices=['mean', 'median', 'zero'],
-                        help='Fill missing values')
+    parser.add_argument('--dedup-columns',
+                        help='Comma-separated columns that identify a '
+                             'duplicate (default: all)')
+    parser.add_argument('--remove-near-duplicates', action='store_true',
+                        help='Remove near-identical rows (MinHash/LSH on '
+                             '--dedup-columns, default: text columns)')
+    parser.add_argument('--near-threshold', type=float, default=0.8,
+                        help='Similarity at which rows count as near '
+                             'duplicates (default: 0.8)')
+    parser.add_argument('--fill-missing', type=fill_method,
+                        metavar='{mean,median,zero,pNN}',
+                        help='Fill missing values with the mean, median, '
+                             'zero or a percentile such as p90')
     parser.add_argument('--remove-outliers', action='store_true',
                         help='Remove outliers')
+    parser.add_argument('--outlier-method', default='zscore',
+                        choices=list(outliers.THRESHOLDS),
+                        help='Outlier method (default: zscore)')
+    parser.add_argument('--outlier-threshold', type=float,
+                        help='Z-score/MAD cut-off or IQR fence multiplier '
+                             '(default: 3, 3.5 for mad, 1.5 for iqr)')
+    parser.add_argument('--chunksize', type=int,
+                        help='Stream chunks of N rows: the cleaning flags '
+                             'run as a fused recipe')
+    parser.add_argument('--recipe',
+                        help='JSON/YAML list of cleaning steps, run in '
+                             'fused streaming passes with per-step timing')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only clean rows appended since the last '
+                             'run and append them to the output')
+    parser.add_argument('--state-file',
+                        help='State for --incremental '
+                             '(default: OUTPUT.state)')
+    parser.add_argument('--compact', action='store_true',
+                        help='Downcast numerics and categorize strings '
+                             'after loading to save memory')
     parser.add_argument('--standardize', action='store_true',
                         help='Standardize column names')
+    parser.add_argument('--stats', action='store_true',
+                        help='Profile the data before and after cleaning')
+    parser.add_argument('--stats-sample', type=int,
+                        help='Profile only N random rows (with --stats)')
+    parser.add_argument('--cache', action='store_true',
+                        help='Load through the memory-mapped column cache')
+    parser.add_argument('--cache-dir', help='Column cache directory')
+    parser.add_argument('--parse-dates', action='store_true',
+                        help='Load ISO-8601 date columns as datetimes')
+    parser.add_argument('--categories', action='store_true',
+                        help='Load low-cardinality text columns as ordered '
+                             'categoricals')
+    parser.add_argument('--workers', type=int,
+                        help='Processes for parsing and near-duplicate '
+                             'signatures (default: CPU count)')
+    parser.add_argument('--column-parallel', action='store_true',
+                        help='Fill and detect outliers in column ranges '
+                             'across --workers processes over shared '
+                             'memory (for wide tables)')
 
     args = parser.parse_args()
 
+    subset = ([c.strip() for c in args.dedup_columns.split(',')]
+              if args.dedup_columns else None)
+
+    if args.column_parallel and (args.incremental or args.recipe
+                                 or args.chunksize):
+        parser.error('--column-parallel works on the in-memory table, not '
+                     'with --incremental, --recipe or --chunksize')
+    if (args.parse_dates or args.categories) and (
+        args.incremental or args.recipe or args.chunksize
+    ):
+        parser.error('--parse-dates and --categories apply to the '
+                     'in-memory table, not to --incremental, --recipe or '
+                     '--chunksize')
+
+    if args.incremental:
+        if args.compact or args.remove_near_duplicates or args.stats:
+            parser.error('--incremental does not support --compact, '
+                         '--remove-near-duplicates or --stats')
+        if args.recipe and (args.rules or args.remove_duplicates
+                            or args.fill_missing or args.remove_outliers
+                            or args.standardize):
+            parser.error('--recipe replaces the individual cleaning flags')
+        if not args.recipe and not (
+            args.rules or args.remove_duplicates or args.fill_missing
+            or args.remove_outliers or args.standardize
+        ):
+            parser.error('--incremental needs cleaning steps')
+        run_incremental(args, subset)
+        return
+
+    if args.recipe:
+        if (args.remove_duplicates or args.remove_near_duplicates
+                or args.fill_missing or args.remove_outliers
+                or args.standardize or args.rules):
+            parser.error('--recipe replaces the individual cleaning flags')
+        run_recipe(args, subset)
+        return
+
+    if args.chunksize:
+        if (args.compact or args.remove_near_duplicates or args.stats
+                or not (args.rules or args.remove_duplicates
+                        or args.fill_missing or args.remove_outliers
+                        or args.standardize)):
+            parser.error('--chunksize only supports --rules, '
+                         '--remove-duplicates, --fill-missing, '
+                         '--remove-outliers and --standardize')
+        run_recipe(args, subset)
+        return
+
     # Clean data
-    cleaner = DataCleaner(args.input)
+    cleaner = DataCleaner(args.input, cache=args.cache,
+                          cache_dir=args.cache_dir, workers=args.workers,
+                          column_parallel=args.column_parallel,
+                          parse_dates=args.parse_dates,
+                          categories=args.categories)
+
+    if args.compact:
+        cleaner.compact()
+
+    if args.stats:
+        cleaner.show_stats(args.stats_sample)
+
+    if args.rules:
+        cleaner.validate(args.rules, args.quarantine)
 
     if args.remove_duplicates:
-        cleaner.remove_duplicates()
+        cleaner.remove_duplicates(subset)
+
+    if args.remove_near_duplicates:
+        cleaner.remove_near_duplicates(subset, args.near_threshold)
 
     if args.fill_missing:
         cleaner.fill_missing_values(args.fill_missing)
 
     if args.remove_outliers:
-        cleaner.remove_outliers()
+        cleaner.remove_outliers(threshold=args.outlier_threshold,
+                                method=args.outlier_method)
 
     if args.standardize:
         cleaner.standardize_columns()
 
+    if args.stats:
+        cleaner.show_stats(args.stats_sample)
+
     cleaner.save(args.output)
     print("\n✅ Cleaning complete!")
 
 
 if __name__ == "__main__":
     main()
-
-# Upgrade file upload - 2025-11-11 13:57:53
-# Enhanced: 2025-11-11 13:57:53
-"""Documentation updated"""
-
-# Clean test coverage in cache layer following best practices - 2025-11-26 09:40:16
-# Enhanced: 2025-11-26 09:40:16
-"""Documentation updated"""
-
-# Add code structure in core system to prevent memory leaks - 2025-12-02 11:48:39
-def new_feature():
-    """New feature implementation"""
-    logger.info('Feature working')
-    return True
-
-# Correct user interface in router - 2025-12-02 22:38:06
-# Added validation to prevent edge case
-if not input_value:
-    return default_value
-return process(input_value)
-
-# Adjust data migration in deployment pipeline - 2025-12-05 15:33:17
-# Modified: 2025-12-05 15:33:17
-CONFIG_VALUE = 'new_value'
-
-# Consolidate user interface in database layer - 2026-01-01 15:17:52
-# Updated: 2026-01-01 15:17:52
-def updated_function():
-    pass
\ No newline at end of file
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Dedup - Out-of-core duplicate row removal with compact row hashes
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import compressed_io
+import csv_schema
+
+
+# Spill partitions are chosen by this many leading bits of the row hash
+PARTITION_BITS = 6
+
+# hash_pandas_object's default key, and a second key for 128-bit hashes
+HASH_KEYS = ('0123456789123456', 'fedcba9876543210')
+
+HASH128 = np.dtype([('high', '<u8'), ('low', '<u8')])
+
+# Hash input for a missing numeric value, whatever its dtype
+NAN_KEY = np.array([np.nan]).view(np.int64)[0]
+
+
+def canonical(series):
+    """Hash input for a column on which 3 and 3.0 agree
+
+    Chunks of one file may parse a numeric column as int in one chunk and
+    float in another; both are mapped to the same int64 keys.
+    """
+    dtype = series.dtype
+    if (not pd.api.types.is_numeric_dtype(dtype)
+            or pd.api.types.is_bool_dtype(dtype)):
+        return series
+    if pd.api.types.is_integer_dtype(dtype):
+        missing = series.isna().to_numpy()
+        keys = series.to_numpy(dtype=np.int64, na_value=0)
+        return np.where(missing, NAN_KEY, keys)
+
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    keys = values.view(np.int64).copy()
+    with np.errstate(invalid='ignore'):
+        integral = (np.abs(values) < 2.0 ** 63) & (values == np.trunc(values))
+    keys[integral] = values[integral].astype(np.int64)
+    keys[np.isnan(values)] = NAN_KEY
+    return keys
+
+
+def row_hashes(df, subset=None, bits=64):
+    """Vectorized 64-bit (uint64) or 128-bit (HASH128) hash of each row"""
+    columns = list(df.columns) if subset is None else list(subset)
+    frame = pd.DataFrame(
+        {i: canonical(df[column]) for i, column in enumerate(columns)},
+        index=df.index
+    )
+    high = pd.util.hash_pandas_object(frame, index=False,
+                                      hash_key=HASH_KEYS[0]).to_numpy()
+    if bits == 64:
+        return high
+    if bits != 128:
+        raise ValueError("bits must be 64 or 128")
+    hashes = np.empty(len(high), dtype=HASH128)
+    hashes['high'] = high
+    hashes['low'] = pd.util.hash_pandas_object(
+        frame, index=False, hash_key=HASH_KEYS[1]
+    ).to_numpy()
+    return hashes
+
+
+def prefix(hashes):
+    """Spill partition of each hash"""
+    high = hashes['high'] if hashes.dtype == HASH128 else hashes
+    return (high >> np.uint64(64 - PARTITION_BITS)).astype(np.intp)
+
+
+class HashSet:
+    """Set of row hashes held as sorted NumPy runs
+
+    New hashes are added as a sorted run; runs are merged whenever the
+    previous one is less than twice as long, so there are O(log n) runs
+    and each membership test is a binary search per run.
+    """
+
+    def __init__(self):
+        """Initialize an empty set"""
+        self.runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+
+    @property
+    def nbytes(self):
+        """Memory held by the set"""
+        return sum(run.nbytes for run in self.runs)
+
+    def contains(self, hashes):
+        """Boolean array: which of ``hashes`` are in the set"""
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self.runs:
+            pos = np.searchsorted(run, hashes)
+            pos[pos == len(run)] = 0
+            found |= run[pos] == hashes
+        return found
+
+    def add_sorted(self, run):
+        """Add sorted hashes that are not in the set yet"""
+        if not len(run):
+            return
+        self.runs.append(run)
+        while len(self.runs) > 1 and (
+            len(self.runs[-2]) < 2 * len(self.runs[-1])
+        ):
+            last = self.runs.pop()
+            merged = np.concatenate([self.runs.pop(), last])
+            merged.sort(kind='stable')
+            self.runs.append(merged)
+
+    def first_seen(self, hashes):
+        """Mark first occurrences of hashes not seen before, and add them"""
+        unique, first = np.unique(hashes, return_index=True)
+        new = ~self.contains(unique)
+        mask = np.zeros(len(hashes), dtype=bool)
+        mask[first[new]] = True
+        self.add_sorted(unique[new])
+        return mask
+
+
+class HashDeduper:
+    """Keep the first occurrence of each row across a stream of chunks
+
+    Rows are reduced to 64-bit (or, with ``bits=128``, 128-bit) hashes of
+    ``subset`` (default: all columns), and seen hashes live in a
+    ``HashSet``.  Once the set outgrows ``memory_limit_mb`` it is spilled
+    to disk partitions by hash prefix, the remaining rows' hashes and
+    positions follow it there, each partition is resolved on its own, and
+    the rest of the input is read a second time to emit the kept rows in
+    their original order.
+    """
+
+    def __init__(self, subset=None, bits=64, memory_limit_mb=256,
+                 tmp_dir=None):
+        """Initialize deduper"""
+        self.subset = subset
+        self.bits = bits
+        self.memory_limit = int(memory_limit_mb * 1024 * 1024)
+        self.tmp_dir = tmp_dir
+        self.rows = 0
+        self.removed = 0
+        self.spilled = False
+
+    def hashes(self, chunk):
+        """Row hashes of a chunk"""
+        return row_hashes(chunk, self.subset, self.bits)
+
+    def duplicated(self, df):
+        """Boolean mask of repeated rows of one in-memory frame"""
+        return ~HashSet().first_seen(self.hashes(df))
+
+    def dedup_chunks(self, read_chunks):
+        """Yield the chunks from ``read_chunks()`` without duplicate rows
+
+        ``read_chunks`` is called once more if the hash set spills, to
+        re-read the rows after the spill point.
+        """
+        seen = HashSet()
+        chunks = iter(read_chunks())
+        for chunk in chunks:
+            mask = seen.first_seen(self.hashes(chunk))
+            self.rows += len(chunk)
+            self.removed += int(len(chunk) - mask.sum())
+            yield chunk[mask]
+            if seen.nbytes > self.memory_limit:
+                break
+        else:
+            return
+
+        self.spilled = True
+        with tempfile.TemporaryDirectory(dir=self.tmp_dir) as tmp:
+            start = self.rows
+            self.partition(seen, chunks, tmp)
+            del seen
+            kept = self.resolve(tmp)
+            self.removed += self.rows - start - sum(len(k) for k in kept)
+            yield from self.replay(read_chunks(), start, kept)
+
+    def record_dtype(self):
+        """On-disk record: row hash and row position (-1: already kept)"""
+        hash_dtype = HASH128 if self.bits == 128 else np.dtype('<u8')
+        return np.dtype([('hash', hash_dtype), ('pos', '<i8')])
+
+    def write_partitions(self, tmp, hashes, positions):
+        """Append hash/position records to their prefix partitions"""
+        records = np.empty(len(hashes), dtype=self.record_dtype())
+        records['hash'] = hashes
+        records['pos'] = positions
+        parts = prefix(hashes)
+        order = np.argsort(parts, kind='stable')
+        records, parts = records[order], parts[order]
+        bounds = np.searchsorted(parts, np.arange(2 ** PARTITION_BITS + 1))
+        for part in np.unique(parts):
+            path = os.path.join(tmp, f"part_{part:03d}.bin")
+            with open(path, 'ab') as f:
+                records[bounds[part]:bounds[part + 1]].tofile(f)
+
+    def partition(self, seen, chunks, tmp):
+        """Spill the set, then every remaining row's hash and position"""
+        for run in seen.runs:
+            self.write_partitions(tmp, run, -1)
+        seen.runs = []
+        for chunk in chunks:
+            positions = np.arange(self.rows, self.rows + len(chunk))
+            self.write_partitions(tmp, self.hashes(chunk), positions)
+            self.rows += len(chunk)
+
+    def resolve(self, tmp):
+        """Sorted positions of the first occurrences, one array per part"""
+        kept = []
+        for name in sorted(os.listdir(tmp)):
+            path = os.path.join(tmp, name)
+            records = np.fromfile(path, dtype=self.record_dtype())
+            os.remove(path)
+            records = records[np.argsort(records, order=['hash', 'pos'],
+                                         kind='stable')]
+            hashes = records['hash']
+            first = np.ones(len(records), dtype=bool)
+            first[1:] = hashes[1:] != hashes[:-1]
+            positions = records['pos'][first]
+            positions = np.sort(positions[positions >= 0])
+            kept_path = os.path.join(tmp, name + '.kept.npy')
+            np.save(kept_path, positions)
+            kept.append(np.load(kept_path, mmap_mode='r'))
+        return kept
+
+    @staticmethod
+    def replay(chunks, start, kept):
+        """Re-read the input and yield the kept rows from ``start`` on"""
+        pos = 0
+        for chunk in chunks:
+            end = pos + len(chunk)
+            if end > start:
+                positions = np.concatenate([
+                    part[np.searchsorted(part, pos):
+                         np.searchsorted(part, end)]
+                    for part in kept
+                ])
+                positions.sort()
+                yield chunk.iloc[positions - pos]
+            pos = end
+
+
+def drop_duplicates(df, subset=None, bits=64):
+    """Hash-based equivalent of ``df.drop_duplicates(subset)``"""
+    return df[~HashDeduper(subset, bits).duplicated(df)]
+
+
+def dedup_csv(input_file, output_file, subset=None, chunksize=100000,
+              memory_limit_mb=256, encoding='utf-8', bits=64,
+              parse_dates=False):
+    """Stream a CSV into ``output_file`` without duplicate rows
+
+    Returns ``(rows, removed)``.
+    """
+    deduper = HashDeduper(subset, bits, memory_limit_mb)
+
+    def read_chunks():
+        return csv_schema.read_csv(input_file, encoding=encoding,
+                                   chunksize=chunksize,
+                                   parse_dates=parse_dates)
+
+    written = 0
+    with compressed_io.open_write(output_file, encoding) as f:
+        for chunk in deduper.dedup_chunks(read_chunks):
+            chunk.to_csv(f, index=False, header=(written == 0))
+            written += 1
+        if written == 0:
+            pd.read_csv(input_file, encoding=encoding, nrows=0).to_csv(
+                f, index=False
+            )
+    return deduper.rows, deduper.removed
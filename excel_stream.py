@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Excel Stream - Read and write .xlsx in row batches with bounded memory
+"""
+
+import itertools
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+
+
+# Rows per worksheet, header included
+MAX_ROWS = 1048576
+
+MAX_TITLE = 31
+
+# Workbook of this process, opened once by open_shared so sheet
+# conversions in a pool worker do not re-parse it per sheet
+shared_workbook = None
+
+
+def header_names(cells):
+    """Column names like ``pd.read_excel``: blanks become 'Unnamed: i'
+    and repeated names get '.1', '.2' suffixes"""
+    names = []
+    counts = {}
+    for i, cell in enumerate(cells):
+        name = f"Unnamed: {i}" if cell is None else cell
+        base = name
+        while name in counts:
+            counts[base] += 1
+            name = f"{base}.{counts[base]}"
+        counts[name] = 0
+        names.append(name)
+    return names
+
+
+def filled_width(row):
+    """Number of cells up to the last non-empty one"""
+    width = len(row)
+    while width and row[width - 1] is None:
+        width -= 1
+    return width
+
+
+def data_rows(rows, width):
+    """Rows padded or cut to ``width``; trailing blank rows are dropped
+
+    Cells past ``width`` cannot become columns once the first chunk is
+    out, so they are dropped with a warning.
+    """
+    blank = 0
+    warned = False
+    for number, row in enumerate(rows, 2):
+        filled = filled_width(row)
+        if not filled:
+            blank += 1
+            continue
+        if filled > width and not warned:
+            print(f"⚠️  Row {number} has cells past column {width}, the "
+                  "width of the first rows; extra cells are dropped "
+                  "(load the whole sheet to keep them)")
+            warned = True
+        for _ in range(blank):
+            yield (None,) * width
+        blank = 0
+        yield row[:width] + (None,) * (width - len(row))
+
+
+def sheet_names(path):
+    """Worksheet titles of a workbook, in order"""
+    workbook = load_workbook(path, read_only=True)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+
+def open_shared(path):
+    """Open ``path`` read-only as this process's shared workbook"""
+    global shared_workbook
+    close_shared()
+    shared_workbook = load_workbook(path, read_only=True, data_only=True)
+    return shared_workbook
+
+
+def close_shared():
+    """Close the shared workbook, if one is open"""
+    global shared_workbook
+    if shared_workbook is not None:
+        shared_workbook.close()
+        shared_workbook = None
+
+
+def sheet_chunks(workbook, chunksize=100000, sheet=0):
+    """DataFrames of up to ``chunksize`` rows of a sheet of an open
+    read-only workbook; ``sheet`` is an index or a title"""
+    worksheet = (workbook.worksheets[sheet] if isinstance(sheet, int)
+                 else workbook[sheet])
+    # Some writers record a wrong sheet size; read every row
+    worksheet.reset_dimensions()
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return
+    # Columns from the header and the first chunk, like pandas
+    start = list(itertools.islice(rows, chunksize))
+    width = max([len(header)] + [filled_width(row) for row in start])
+    header = header + (None,) * (width - len(header))
+    columns = header_names(header[:width])
+    rows = data_rows(itertools.chain(start, rows), width)
+    first = True
+    while True:
+        batch = list(itertools.islice(rows, chunksize))
+        # A header-only sheet still yields its (empty) columns
+        if batch or first:
+            yield pd.DataFrame.from_records(batch, columns=columns)
+        if len(batch) < chunksize:
+            return
+        first = False
+
+
+def read_chunks(path, chunksize=100000, sheet=0):
+    """DataFrames of up to ``chunksize`` rows of one worksheet
+
+    ``sheet`` is an index or a title; the first row is the header.  The
+    workbook is opened read-only, so rows are parsed as they are read
+    instead of building the whole workbook in memory.
+    """
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from sheet_chunks(workbook, chunksize, sheet)
+    finally:
+        workbook.close()
+
+
+def read_excel(path, sheet=0):
+    """One worksheet as a DataFrame; .xls files go through pandas
+
+    The whole sheet is one chunk, so its columns cover its widest row.
+    """
+    if str(path).lower().endswith('.xls'):
+        return pd.read_excel(path, sheet_name=sheet)
+    chunks = list(read_chunks(path, MAX_ROWS, sheet))
+    if not chunks:
+        return pd.DataFrame()
+    return chunks[0]
+
+
+class ExcelWriter:
+    """Write DataFrame chunks to a write-only .xlsx workbook
+
+    Rows are streamed to disk as they are appended.  A sheet that
+    reaches MAX_ROWS continues on a new sheet ('Sheet1 (2)', ...) with
+    the header repeated.
+    """
+
+    def __init__(self, path, sheet='Sheet1'):
+        """Start a workbook at ``path``"""
+        self.path = path
+        self.title = sheet
+        self.workbook = Workbook(write_only=True)
+        self.worksheet = None
+        self.sheets = 0
+        self.sheet_rows = 0
+        self.columns = None
+        self.rows = 0
+
+    def new_sheet(self):
+        """Continue on the next sheet, starting with the header"""
+        self.sheets += 1
+        title = self.title
+        if self.sheets > 1:
+            suffix = f" ({self.sheets})"
+            title = title[:MAX_TITLE - len(suffix)] + suffix
+        self.worksheet = self.workbook.create_sheet(title)
+        self.worksheet.append(self.columns)
+        self.sheet_rows = 1
+
+    def write(self, chunk):
+        """Append the rows of ``chunk``"""
+        if self.columns is None:
+            self.columns = [str(column) for column in chunk.columns]
+            self.new_sheet()
+        # Missing values become empty cells
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            if self.sheet_rows == MAX_ROWS:
+                self.new_sheet()
+            self.worksheet.append(row)
+            self.sheet_rows += 1
+        self.rows += len(chunk)
+
+    def close(self):
+        """Write the workbook; an empty one gets an empty sheet"""
+        if self.worksheet is None:
+            self.workbook.create_sheet(self.title)
+        self.workbook.save(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
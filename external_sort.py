@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+External Sort - Out-of-core merge sort for CSV data larger than RAM
+"""
+
+import os
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import compressed_io
+
+
+# Runs are spilled in small pickled blocks so the merge can refill each
+# run's buffer in pieces that fit the memory budget
+BLOCKS_PER_RUN = 64
+
+# Maximum number of runs merged at once; more runs get merged in passes
+MAX_FAN_IN = 64
+
+
+class ExternalSorter:
+    """Sort a stream of DataFrame chunks within a fixed memory budget
+
+    Chunks are accumulated until the budget is reached, sorted and spilled
+    to a temporary directory as runs, then k-way merged into the output.
+    ``by`` and ``ascending`` accept the same values as
+    ``DataFrame.sort_values``, including multi-column keys with mixed order.
+    """
+
+    def __init__(self, by, ascending=True, memory_limit_mb=256,
+                 tmp_dir=None):
+        """Initialize external sorter"""
+        self.by = by
+        self.ascending = ascending
+        self.memory_limit = int(memory_limit_mb * 1024 * 1024)
+        self.tmp_dir = tmp_dir
+        self.run_rows = 0
+        self.runs = 0
+
+    def sort_frame(self, df):
+        """Sort a single in-memory frame with the configured key"""
+        return df.sort_values(by=self.by, ascending=self.ascending,
+                              kind='mergesort', ignore_index=True)
+
+    def sort_chunks(self, chunks, output_file, encoding='utf-8'):
+        """Sort an iterable of chunks into ``output_file`` as CSV
+
+        Returns the number of rows written.
+        """
+        with tempfile.TemporaryDirectory(dir=self.tmp_dir) as tmp:
+            run_paths, tail, columns = self.build_runs(chunks, tmp)
+
+            with compressed_io.open_write(output_file, encoding) as f:
+                if not run_paths:
+                    # Everything fit in memory: no spill, no merge
+                    if tail is None:
+                        tail = pd.DataFrame(columns=columns or [])
+                    self.sort_frame(tail).to_csv(f, index=False)
+                    return len(tail)
+
+                if tail is not None:
+                    run_paths.append(self.spill(self.sort_frame(tail), tmp))
+
+                while len(run_paths) > MAX_FAN_IN:
+                    run_paths = self.merge_pass(run_paths, tmp)
+
+                rows = 0
+                for piece in self.merge(run_paths):
+                    piece.to_csv(f, index=False, header=(rows == 0))
+                    rows += len(piece)
+                return rows
+
+    def build_runs(self, chunks, tmp):
+        """Accumulate chunks and spill sorted runs once over budget
+
+        Returns the spilled run paths, the unspilled remainder and the
+        column names seen.
+        """
+        run_paths = []
+        buffer = []
+        buffered = 0
+        columns = None
+
+        for chunk in chunks:
+            if columns is None:
+                columns = list(chunk.columns)
+            if chunk.empty:
+                continue
+            buffer.append(chunk)
+            buffered += int(chunk.memory_usage(deep=True).sum())
+
+            if buffered >= self.memory_limit:
+                run = self.sort_frame(pd.concat(buffer, ignore_index=True))
+                run_paths.append(self.spill(run, tmp))
+                buffer = []
+                buffered = 0
+
+        tail = pd.concat(buffer, ignore_index=True) if buffer else None
+        return run_paths, tail, columns
+
+    def spill(self, run, tmp):
+        """Write a sorted run to disk as a sequence of pickled blocks"""
+        path = os.path.join(tmp, f"run_{self.runs:06d}.pkl")
+        self.runs += 1
+        self.run_rows = max(self.run_rows, len(run))
+        self.write_run(path, [run])
+        return path
+
+    def write_run(self, path, pieces):
+        """Write sorted pieces to a run file in bounded-size blocks"""
+        block_rows = max(1, self.run_rows // BLOCKS_PER_RUN)
+        with open(path, 'wb') as f:
+            for piece in pieces:
+                for start in range(0, len(piece), block_rows):
+                    pickle.dump(piece.iloc[start:start + block_rows], f,
+                                protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def read_run(path):
+        """Yield the blocks of a run file"""
+        with open(path, 'rb') as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+
+    def merge_pass(self, run_paths, tmp):
+        """Merge runs in groups of MAX_FAN_IN into fewer, longer runs"""
+        merged = []
+        for start in range(0, len(run_paths), MAX_FAN_IN):
+            group = run_paths[start:start + MAX_FAN_IN]
+            path = os.path.join(tmp, f"run_{self.runs:06d}.pkl")
+            self.runs += 1
+            self.write_run(path, self.merge(group))
+            for old in group:
+                os.remove(old)
+            merged.append(path)
+        return merged
+
+    def merge(self, run_paths):
+        """K-way merge sorted runs, yielding sorted pieces
+
+        Each run keeps a buffered block.  After sorting the buffers
+        together, every row up to the earliest block-final row of a run
+        that may still have more data is safe to emit; that run is then
+        refilled.
+        """
+        readers = [self.read_run(path) for path in run_paths]
+        refill_rows = max(1, self.run_rows // (len(readers) + 1))
+        active = set(range(len(readers)))
+        need = list(active)
+
+        buffer = None
+        run_ids = np.empty(0, dtype=np.int64)
+        is_last = np.empty(0, dtype=bool)
+
+        while True:
+            pieces = [] if buffer is None else [buffer]
+            id_parts = [run_ids]
+            last_parts = [is_last]
+            for r in need:
+                block = self.take(readers[r], refill_rows)
+                if block is None:
+                    active.discard(r)
+                    continue
+                pieces.append(block)
+                ids = np.full(len(block), r, dtype=np.int64)
+                last = np.zeros(len(block), dtype=bool)
+                last[-1] = True
+                id_parts.append(ids)
+                last_parts.append(last)
+
+            if not pieces:
+                return
+
+            combined = pd.concat(pieces, ignore_index=True)
+            run_ids = np.concatenate(id_parts)
+            is_last = np.concatenate(last_parts)
+
+            order = combined.sort_values(
+                by=self.by, ascending=self.ascending, kind='mergesort'
+            ).index.to_numpy()
+            combined = combined.take(order).reset_index(drop=True)
+            run_ids = run_ids[order]
+            is_last = is_last[order]
+
+            bounds = np.flatnonzero(
+                is_last & np.isin(run_ids, list(active))
+            )
+            if len(bounds) == 0:
+                if len(combined):
+                    yield combined
+                return
+
+            cut = bounds[0] + 1
+            yield combined.iloc[:cut]
+            need = sorted(set(run_ids[:cut][is_last[:cut]].tolist()))
+            buffer = combined.iloc[cut:].reset_index(drop=True)
+            run_ids = run_ids[cut:]
+            is_last = is_last[cut:]
+
+    @staticmethod
+    def take(reader, rows):
+        """Read at least ``rows`` rows worth of blocks from a run reader"""
+        blocks = []
+        taken = 0
+        for block in reader:
+            blocks.append(block)
+            taken += len(block)
+            if taken >= rows:
+                break
+        if not blocks:
+            return None
+        return pd.concat(blocks, ignore_index=True)
+
+
+def external_sort(input_file, output_file, by, ascending=True,
+                  memory_limit_mb=256, chunksize=100000, encoding='utf-8',
+                  tmp_dir=None):
+    """Sort a CSV file that may not fit in memory
+
+    Returns the number of rows written.
+    """
+    sorter = ExternalSorter(by, ascending=ascending,
+                            memory_limit_mb=memory_limit_mb, tmp_dir=tmp_dir)
+    chunks = pd.read_csv(input_file, encoding=encoding, chunksize=chunksize)
+    return sorter.sort_chunks(chunks, output_file, encoding=encoding)
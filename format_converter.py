@@ -1,48 +1,396 @@
 #!/usr/bin/env python3
 """
-Format Converter - Convert between CSV, JSON, and Excel
+Format Converter - Convert between CSV, JSON, JSON Lines, Excel, Parquet,
+Feather, and Arrow IPC
 """
 
-import pandas as pd
 import argparse
+import os
+import pickle
 import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import pandas as pd
+
+import columnar
+import compressed_io
+import csv_schema
+import excel_stream
+import json_stream
+import parallel_reader
+from query_plan import referenced_columns
+
+
+# Formats converted chunk by chunk in bounded memory
+STREAMING = (('.csv', '.json', '.xlsx') + json_stream.LINES_SUFFIXES
+             + columnar.SUFFIXES)
+
+# Formats that may be wrapped in .gz, .bz2, .xz or .zst; .xlsx and the
+# columnar formats compress internally
+COMPRESSIBLE = ('.csv', '.json') + json_stream.LINES_SUFFIXES
+
+
+def file_format(path):
+    """Format suffix of a path, looking through a compression suffix"""
+    suffix = compressed_io.data_suffix(path)
+    if suffix not in COMPRESSIBLE and compressed_io.detect(path,
+                                                           magic=False):
+        raise ValueError(f"{Path(path).name}: only CSV and JSON files can "
+                         "be compressed")
+    return suffix
+
+
+def source_columns(input_file):
+    """Header of a CSV or columnar file; None for other formats"""
+    if columnar.is_columnar(input_file):
+        return columnar.column_names(input_file)
+    if file_format(input_file) == '.csv':
+        return list(pd.read_csv(
+            input_file, nrows=0,
+            compression=compressed_io.detect(input_file)
+        ).columns)
+    return None
+
+
+def needed_columns(input_file, usecols, condition):
+    """Columns to read: ``usecols`` plus those ``condition`` uses"""
+    if usecols is None or not condition:
+        return usecols
+    header = source_columns(input_file)
+    if header is None:
+        return None
+    return usecols + [column
+                      for column in referenced_columns(condition, header)
+                      if column not in usecols]
+
+
+def select(chunks, usecols=None, condition=None):
+    """Rows of each chunk matching ``condition``, only ``usecols``"""
+    for chunk in chunks:
+        if condition:
+            chunk = chunk.query(condition)
+        if usecols is not None:
+            chunk = chunk[usecols]
+        yield chunk
+
+
+def read_chunks(input_file, chunksize, keys=None, usecols=None,
+                condition=None):
+    """DataFrame chunks of any streaming format
+
+    ``keys`` are the JSON record keys (see ``stream_convert``).  Only
+    ``usecols`` of the rows matching ``condition`` are returned; CSV and
+    columnar files parse only the needed columns, and Parquet skips row
+    groups whose statistics rule the condition out.
+    """
+    suffix = file_format(input_file)
+    columns = needed_columns(input_file, usecols, condition)
+    if json_stream.is_json(input_file):
+        chunks = json_stream.read_chunks(input_file, chunksize, keys)
+    elif suffix == '.xlsx':
+        chunks = excel_stream.read_chunks(input_file, chunksize)
+    elif columnar.is_columnar(input_file):
+        chunks = columnar.read_chunks(input_file, chunksize, columns,
+                                      condition)
+    else:
+        chunks = csv_schema.read_csv(input_file, chunksize=chunksize,
+                                     usecols=columns, parse_dates=False)
+    if usecols is None and not condition:
+        return chunks
+    return select(chunks, usecols, condition)
+
+
+def stable_dtypes(input_file, chunksize):
+    """Whole-file column types of a CSV, for columnar output
+
+    Columnar output needs the same column types in every chunk, which
+    per-chunk inference does not guarantee.  The types come from a
+    fresh sidecar, or else from one extra pass that is not saved.
+    """
+    schema = csv_schema.load_schema(input_file)
+    if schema is None or not csv_schema.is_fresh(schema, input_file):
+        schema = csv_schema.infer_schema(input_file, chunksize=chunksize)
+    return schema['dtypes']
+
+
+def write_chunks(chunks, output_file, compression=None,
+                 row_group_size=None, workers=None, dtypes=None):
+    """Write chunks in the format of ``output_file``; returns rows
+
+    ``compression``, ``row_group_size`` and the pinned column ``dtypes``
+    apply to Parquet, Feather and Arrow IPC output.  CSV and JSON output named .gz, .bz2, .xz or
+    .zst is compressed in blocks on ``workers`` threads.
+    """
+    suffix = file_format(output_file)
+    if suffix == '.csv':
+        rows = 0
+        with compressed_io.open_write(output_file,
+                                      workers=workers) as f:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(f, index=False, header=(i == 0))
+                rows += len(chunk)
+        return rows
+
+    if suffix == '.xlsx':
+        writer = excel_stream.ExcelWriter(output_file)
+    elif columnar.is_columnar(output_file):
+        writer = columnar.ColumnarWriter(output_file, compression,
+                                         row_group_size, dtypes)
+    else:
+        lines = suffix in json_stream.LINES_SUFFIXES
+        writer = json_stream.JSONWriter(output_file, lines, workers)
+    with writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    if suffix == '.xlsx' and writer.sheets > 1:
+        print(f"⚠️  {writer.rows} rows exceed one sheet; split across "
+              f"{writer.sheets} sheets")
+    return writer.rows
+
+
+def stream_convert(input_file, output_file, chunksize=100000,
+                   usecols=None, condition=None, compression=None,
+                   row_group_size=None, workers=None):
+    """Convert between the streaming formats chunk by chunk
+
+    Memory stays bounded by ``chunksize`` rows.  JSON columns come from
+    the first chunk's keys; if later records add keys, the keys are
+    collected in an extra pass and the conversion starts over.  Returns
+    the rows written.
+    """
+    if columnar.is_columnar(output_file) and (
+        file_format(input_file) == '.csv'
+    ):
+        dtypes = stable_dtypes(input_file, chunksize)
+    else:
+        dtypes = None
+    keys = None
+    while True:
+        try:
+            return write_chunks(
+                read_chunks(input_file, chunksize, keys, usecols,
+                            condition),
+                output_file, compression, row_group_size, workers, dtypes
+            )
+        except json_stream.NewColumns:
+            print("⚠️  Later records add keys; collecting all keys first")
+            keys = json_stream.record_keys(input_file, chunksize)
+
+
+def shared_sheet_chunks(sheet, chunksize, usecols, condition):
+    """Chunks of one sheet of the process's shared workbook"""
+    return select(excel_stream.sheet_chunks(excel_stream.shared_workbook,
+                                            chunksize, sheet),
+                  usecols, condition)
+
+
+def sheet_to_file(sheet, output_file, chunksize, usecols, condition,
+                  compression, row_group_size, threads):
+    """Convert one sheet into its own output file; returns the rows"""
+    return write_chunks(shared_sheet_chunks(sheet, chunksize, usecols,
+                                            condition),
+                        output_file, compression, row_group_size, threads)
+
+
+def sheet_to_part(sheet, part, chunksize, usecols, condition):
+    """Pickle the chunks of one sheet to ``part``
+
+    Returns ``(rows, columns)``.
+    """
+    rows = 0
+    columns = []
+    with open(part, 'wb') as f:
+        for chunk in shared_sheet_chunks(sheet, chunksize, usecols,
+                                         condition):
+            pickle.dump(chunk, f, protocol=pickle.HIGHEST_PROTOCOL)
+            rows += len(chunk)
+            columns = list(chunk.columns)
+    return rows, columns
+
+
+def read_part(part):
+    """Yield the chunks pickled by ``sheet_to_part``"""
+    with open(part, 'rb') as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+def combined_chunks(parts, sheets, columns, sheet_column):
+    """Chunks of all sheets in order, with a ``sheet_column`` first"""
+    empty = True
+    for part, sheet in zip(parts, sheets):
+        for chunk in read_part(part):
+            if not len(chunk):
+                continue
+            chunk = chunk.reindex(columns=columns)
+            chunk.insert(0, sheet_column, sheet)
+            empty = False
+            yield chunk
+    if empty:
+        yield pd.DataFrame(columns=[sheet_column] + columns)
+
+
+def map_sheets(input_file, work, sheets, targets, workers, *args):
+    """``work(sheet, target, *args)`` for every sheet, results in order
+
+    With one worker the sheets are read from the shared workbook that
+    is already open; otherwise every pool process opens the workbook
+    once, in its initializer, and converts whole sheets from it.
+    """
+    repeated = [[arg] * len(sheets) for arg in args]
+    if workers <= 1:
+        return list(map(work, sheets, targets, *repeated))
+    # Workers open their own copy; do not share the parent's file handle
+    excel_stream.close_shared()
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=excel_stream.open_shared,
+                             initargs=(str(input_file),)) as executor:
+        return list(executor.map(work, sheets, targets, *repeated))
 
-def convert_file(input_file, output_file):
-    """Convert file between formats"""
-    input_path = Path(input_file)
-    output_path = Path(output_file)
 
-    input_ext = input_path.suffix.lower()
-    output_ext = output_path.suffix.lower()
+def convert_sheets(input_file, output_file, sheets=None, workers=None,
+                   chunksize=100000, sheet_column='sheet', usecols=None,
+                   condition=None, compression=None, row_group_size=None):
+    """Convert several sheets of an .xlsx workbook on a process pool
+
+    ``sheets`` are titles (default: every sheet).  If ``output_file``
+    contains '{sheet}', each sheet goes to its own file with the title
+    filled in; otherwise all rows go to ``output_file`` in sheet order,
+    with ``sheet_column`` naming the sheet each row came from.  Returns
+    ``[(sheet, output, rows)]``.
+    """
+    titles = excel_stream.open_shared(input_file).sheetnames
+    try:
+        if sheets is None:
+            sheets = titles
+        missing = [sheet for sheet in sheets if sheet not in titles]
+        if missing:
+            raise ValueError(f"{input_file} has no sheet "
+                             f"{', '.join(missing)}")
+        workers = min(workers or os.cpu_count() or 1, len(sheets))
+        # Processes already use every core; compress on one thread each
+        threads = None if workers <= 1 else 1
+
+        if '{sheet}' in str(output_file):
+            outputs = [str(output_file).replace('{sheet}', sheet)
+                       for sheet in sheets]
+            rows = map_sheets(input_file, sheet_to_file, sheets, outputs,
+                              workers, chunksize, usecols, condition,
+                              compression, row_group_size, threads)
+            return list(zip(sheets, outputs, rows))
+
+        output_dir = Path(output_file).parent
+        with tempfile.TemporaryDirectory(dir=output_dir) as tmp:
+            parts = [os.path.join(tmp, f"sheet_{i:04d}.pkl")
+                     for i in range(len(sheets))]
+            results = map_sheets(input_file, sheet_to_part, sheets, parts,
+                                 workers, chunksize, usecols, condition)
+            columns = []
+            for _, sheet_columns in results:
+                columns += [column for column in sheet_columns
+                            if column not in columns]
+            if sheet_column in columns:
+                raise ValueError(f"The sheets already have a "
+                                 f"'{sheet_column}' column; choose another "
+                                 "--sheet-column")
+            write_chunks(combined_chunks(parts, sheets, columns,
+                                         sheet_column),
+                         output_file, compression, row_group_size)
+        return [(sheet, str(output_file), rows)
+                for sheet, (rows, _) in zip(sheets, results)]
+    finally:
+        excel_stream.close_shared()
+
+
+def convert_file(input_file, output_file, workers=None, chunksize=100000,
+                 usecols=None, condition=None, compression=None,
+                 row_group_size=None, sheets=None, sheet_column='sheet'):
+    """Convert file between formats
+
+    CSV, JSON arrays, JSON Lines (.jsonl/.ndjson), .xlsx, Parquet,
+    Feather and Arrow IPC convert between each other in streaming chunks
+    of ``chunksize`` records.  With ``chunksize`` 0, and for .xls input,
+    the whole table is loaded first; large CSV inputs are then parsed in
+    parallel across ``workers`` processes.  ``usecols`` and
+    ``condition`` (a ``DataFrame.query`` string) select columns and
+    rows; ``compression`` and ``row_group_size`` configure columnar
+    output.  CSV and JSON files may be compressed (.gz, .bz2, .xz,
+    .zst): input is decompressed as it is read, output compressed in
+    parallel blocks on ``workers`` threads.
+
+    ``sheets`` ('all' or a list of titles) converts several sheets of
+    an .xlsx input across ``workers`` processes (see
+    ``convert_sheets``); by default only the first sheet is read.
+    """
+    input_ext = compressed_io.data_suffix(input_file)
+    output_ext = compressed_io.data_suffix(output_file)
 
     print(f"Converting {input_ext} → {output_ext}")
 
     try:
+        file_format(input_file)
+        file_format(output_file)
+        if sheets is not None:
+            if input_ext != '.xlsx':
+                print("❌ Converting several sheets needs an .xlsx input")
+                return False
+            if output_ext not in STREAMING:
+                print(f"❌ Unsupported output format: {output_ext}")
+                return False
+            converted = convert_sheets(
+                input_file, output_file,
+                None if sheets == 'all' else sheets, workers,
+                chunksize or 100000, sheet_column, usecols, condition,
+                compression, row_group_size
+            )
+            for sheet, output, rows in converted:
+                print(f"✅ Sheet '{sheet}': {rows} rows → {output}")
+            print(f"✅ Converted {len(converted)} sheets")
+            return True
+
+        if chunksize and input_ext in STREAMING and (
+            output_ext in STREAMING
+        ):
+            rows = stream_convert(input_file, output_file, chunksize,
+                                  usecols, condition, compression,
+                                  row_group_size, workers)
+            parser = (f" ({json_stream.BACKEND} parser)"
+                      if json_stream.is_json(input_file) else "")
+            print(f"✅ Streamed {rows} rows in chunks of {chunksize}"
+                  f"{parser}")
+            print(f"✅ Saved to {output_file}")
+            return True
+
         # Read input file
+        columns = needed_columns(input_file, usecols, condition)
         if input_ext == '.csv':
-            df = pd.read_csv(input_file)
-        elif input_ext == '.json':
-            df = pd.read_json(input_file)
+            df = parallel_reader.read_csv(input_file, workers=workers,
+                                          usecols=columns,
+                                          parse_dates=False)
+        elif json_stream.is_json(input_file):
+            df = json_stream.read_json(input_file)
         elif input_ext in ['.xlsx', '.xls']:
-            df = pd.read_excel(input_file)
+            df = excel_stream.read_excel(input_file)
+        elif columnar.is_columnar(input_file):
+            df = columnar.read_frame(input_file, columns, condition)
         else:
             print(f"❌ Unsupported input format: {input_ext}")
             return False
+        df = next(select([df], usecols, condition))
 
         print(f"✅ Loaded {len(df)} rows, {len(df.columns)} columns")
 
         # Write output file
-        if output_ext == '.csv':
-            df.to_csv(output_file, index=False)
-        elif output_ext == '.json':
-            df.to_json(output_file, orient='records', indent=2)
-        elif output_ext == '.xlsx':
-            df.to_excel(output_file, index=False, engine='openpyxl')
-        else:
+        if output_ext not in STREAMING:
             print(f"❌ Unsupported output format: {output_ext}")
             return False
+        write_chunks([df], output_file, compression, row_group_size,
+                     workers)
 
         print(f"✅ Saved to {output_file}")
         return True
@@ -55,14 +403,56 @@ def convert_file(input_file, output_file):
 def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(
-        description='Convert between CSV, JSON, and Excel formats'
+        description='Convert between CSV, JSON, JSON Lines, Excel, '
+                    'Parquet, Feather, and Arrow IPC formats'
     )
     parser.add_argument('input', help='Input file')
     parser.add_argument('output', help='Output file')
+    parser.add_argument('--workers', type=int,
+                        help='Processes for parsing CSV with --chunksize 0 '
+                             'or converting --sheets, threads for '
+                             'compressing .gz/.bz2/.xz/.zst output '
+                             '(default: CPU count)')
+    parser.add_argument('--chunksize', type=int, default=100000,
+                        help='Records per chunk when streaming between '
+                             'CSV, JSON, JSON Lines and .xlsx (default: '
+                             '100000; 0 loads the whole table)')
+    parser.add_argument('--columns',
+                        help='Comma-separated columns to keep; Parquet, '
+                             'Feather, Arrow and CSV inputs read only these')
+    parser.add_argument('--filter',
+                        help='Keep rows matching a condition (e.g. '
+                             '"age>25"); skips Parquet row groups whose '
+                             'statistics rule it out')
+    parser.add_argument('--compression', choices=columnar.CODECS,
+                        help='Parquet/Feather/Arrow codec (default: snappy '
+                             'for Parquet, lz4 for Feather, none for Arrow)')
+    parser.add_argument('--row-group-size', type=int,
+                        help='Rows per Parquet row group or Arrow record '
+                             'batch (default: one per chunk)')
+    parser.add_argument('--sheets',
+                        help="Convert these comma-separated sheets of an "
+                             ".xlsx input, or 'all', in parallel; an output "
+                             "containing {sheet} gets one file per sheet, "
+                             "otherwise one file with a sheet column")
+    parser.add_argument('--sheet-column', default='sheet',
+                        help='Column naming the source sheet when --sheets '
+                             'go to one file (default: sheet)')
 
     args = parser.parse_args()
 
-    success = convert_file(args.input, args.output)
+    usecols = ([c.strip() for c in args.columns.split(',')]
+               if args.columns else None)
+    sheets = args.sheets
+    if sheets is not None and sheets != 'all':
+        sheets = [s.strip() for s in sheets.split(',')]
+
+    success = convert_file(args.input, args.output, workers=args.workers,
+                           chunksize=args.chunksize, usecols=usecols,
+                           condition=args.filter,
+                           compression=args.compression,
+                           row_group_size=args.row_group_size,
+                           sheets=sheets, sheet_column=args.sheet_column)
 
     if success:
         print("\n✅ Conversion complete!")
@@ -73,33 +463,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
-# Configure authentication flow in router to fix edge cases - 2025-10-27 12:07:00
-if data is None:
-    raise ValueError('Data cannot be None')
-return validate_data(data)
-
-# Integrate deployment script in main module - 2025-11-04 16:29:56
-# Improved: 2025-11-04 16:29:56
-# Additional configuration
-
-# Resolve notification system issue - 2025-11-11 07:11:59
-# Added validation to prevent edge case
-if not input_value:
-    return default_value
-return process(input_value)
-
-# Improve test coverage in utility functions for better error recovery - 2025-11-14 23:54:43
-# Extracted to separate function
-def helper_function():
-    return complex_operation()
-
-# Clean file upload in auth service to fix edge cases - 2025-12-12 11:49:08
-def handle_error(error):
-    """Handle error gracefully"""
-    logger.error(f'Error: {error}')
-    return None
-
-# Remove race condition in file handler - 2026-02-14 16:49:10
-# Modified: 2026-02-14 16:49:10
-CONFIG_VALUE = 'new_value'
\ No newline at end of file
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Incremental - Clean only the rows appended to a CSV since the last run
+"""
+
+import copy
+import hashlib
+import io
+import os
+import pickle
+
+import pandas as pd
+
+import parallel_reader
+
+
+STATE_VERSION = 3
+
+# Bytes just before the processed offset that must be unchanged for the
+# input to count as appended to
+CHECK_BYTES = 4096
+
+SCAN_BLOCK = parallel_reader.SCAN_BLOCK
+
+
+class ByteRange(io.RawIOBase):
+    """Read-only view of bytes ``[start, end)`` of a file"""
+
+    def __init__(self, path, start, end):
+        """Open the file at ``start``"""
+        super().__init__()
+        self.file = open(path, 'rb')
+        self.file.seek(start)
+        self.left = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self.left)
+        if size <= 0:
+            return 0
+        read = self.file.readinto(memoryview(buffer)[:size])
+        self.left -= read
+        return read
+
+    def close(self):
+        self.file.close()
+        super().close()
+
+
+def complete_end(path, start):
+    """Offset just past the last complete record at or after ``start``
+
+    ``start`` must be a record boundary.  A record is complete once its
+    newline (outside quotes) is written, so a line still being appended
+    is left for the next run.  Only the bytes after ``start`` are read.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        quotes = 0
+        while True:
+            block = f.read(SCAN_BLOCK)
+            if not block:
+                break
+            quotes += block.count(b'"')
+
+        end = size
+        while end > start:
+            position = max(start, end - SCAN_BLOCK)
+            f.seek(position)
+            block = f.read(end - position)
+            i = len(block)
+            while True:
+                newline = block.rfind(b'\n', 0, i)
+                if newline == -1:
+                    break
+                # ``quotes`` counts the quotes in [start, position + i)
+                quotes -= block.count(b'"', newline + 1, i)
+                if quotes % 2 == 0:
+                    return position + newline + 1
+                i = newline
+            quotes -= block.count(b'"', 0, i)
+            end = position
+    return start
+
+
+def final_end(path, end):
+    """End of file if ``[end, EOF)`` holds a final unterminated record
+
+    The bytes after the last complete record count as one when they are
+    not blank and their quotes are balanced; otherwise returns ``end``.
+    """
+    with open(path, 'rb') as f:
+        f.seek(end)
+        tail = f.read()
+    if not tail.strip() or tail.count(b'"') % 2:
+        return end
+    return end + len(tail)
+
+
+def tail_digest(path, end):
+    """Hash of the header and the bytes just before ``end``"""
+    header_end, _ = parallel_reader.split_ranges(path, 1)
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        digest.update(f.read(header_end))
+        start = max(header_end, end - CHECK_BYTES)
+        f.seek(start)
+        digest.update(f.read(end - start))
+    return digest.hexdigest()
+
+
+def load_state(state_file):
+    """Saved state, or None before the first run"""
+    if not os.path.exists(state_file):
+        return None
+    with open(state_file, 'rb') as f:
+        state = pickle.load(f)
+    if state.get('version') != STATE_VERSION:
+        raise ValueError(f"{state_file} was written by another version; "
+                         "delete it to start over")
+    return state
+
+
+def save_state(state_file, state):
+    """Write the state atomically"""
+    tmp = state_file + '.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, state_file)
+
+
+def clean_incremental(input_file, output_file, recipe, state_file,
+                      encoding='utf-8'):
+    """Run ``recipe`` over the rows appended since the last run
+
+    The state file holds the processed byte offset and row count, a
+    digest that detects a rewritten (not appended) input, the size of
+    the output, the parse settings, and the recipe's dedup set and
+    running statistics.  New rows are deduplicated against all earlier
+    rows and filled/filtered with statistics over all rows so far, then
+    appended to the output.  Earlier output rows are not revisited, and
+    a run without new complete rows changes nothing.
+
+    A last line without a trailing newline is processed too, but only
+    provisionally: the state keeps a ``rollback`` to just before it,
+    and once the input changes the next run returns to that point
+    (output, dedup set and statistics included) and reads the line
+    again with whatever was appended to it.  Returns
+    ``(new_rows, written)``.
+    """
+    state = load_state(state_file)
+    if state is None:
+        names, kwargs, _ = parallel_reader.range_kwargs(input_file,
+                                                        encoding)
+        start, _ = parallel_reader.split_ranges(input_file, 1)
+        state = {
+            'version': STATE_VERSION, 'offset': start, 'rows': 0,
+            'names': names, 'kwargs': kwargs, 'spec': recipe.spec,
+            'digest': None, 'output_size': None, 'steps': None,
+            'rollback': None,
+        }
+    else:
+        if state['spec'] != recipe.spec:
+            raise ValueError("The cleaning steps changed since the last "
+                             f"run; delete {state_file} to start over")
+        if state['rollback'] is not None and (
+            os.path.getsize(input_file) != state['offset']
+            or tail_digest(input_file, state['offset']) != state['digest']
+        ):
+            # The unterminated last line may have grown: read it again
+            state.update(state['rollback'], rollback=None)
+        if (os.path.getsize(input_file) < state['offset']
+                or tail_digest(input_file, state['offset'])
+                != state['digest']):
+            raise ValueError(f"{input_file} was rewritten, not appended "
+                             f"to; delete {state_file} to start over")
+        if not os.path.exists(output_file):
+            raise ValueError(f"{output_file} is missing; delete "
+                             f"{state_file} to start over")
+        # Drop whatever an interrupted run appended after the last save
+        with open(output_file, 'r+b') as f:
+            f.truncate(state['output_size'])
+
+    def run(start, end):
+        """Clean ``[start, end)`` and advance the state past it"""
+        def read_chunks():
+            return pd.read_csv(
+                io.BufferedReader(ByteRange(input_file, start, end)),
+                header=None, names=state['names'],
+                chunksize=recipe.chunksize, **state['kwargs']
+            )
+
+        first = state['output_size'] is None
+        if not first:
+            recipe.restore(state['steps'])
+        written = recipe.run(input_file, output_file, encoding,
+                             read_chunks, append=not first)
+        state.update(
+            offset=end, rows=state['rows'] + recipe.rows,
+            digest=tail_digest(input_file, end),
+            output_size=os.path.getsize(output_file),
+            steps=recipe.state(),
+        )
+        return recipe.rows, written
+
+    start = state['offset']
+    end = complete_end(input_file, start)
+    last = final_end(input_file, end)
+    new_rows = written = 0
+    if end > start:
+        new_rows, written = run(start, end)
+    if last > end:
+        rollback = copy.deepcopy({
+            key: state[key]
+            for key in ('offset', 'rows', 'digest', 'output_size', 'steps')
+        })
+        rows, out = run(end, last)
+        new_rows += rows
+        written += out
+        state['rollback'] = rollback
+    if last > start:
+        save_state(state_file, state)
+    return new_rows, written
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+JSON Stream - Read and write JSON arrays and JSON Lines in record batches
+"""
+
+import itertools
+import json
+import re
+
+import pandas as pd
+
+import compressed_io
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Parser for JSON Lines batches; orjson is optional and several times
+# faster than the standard library
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+LINES_SUFFIXES = ('.jsonl', '.ndjson')
+
+READ_BLOCK = 1 << 20
+
+# Longest token (a number or literal) a read block may cut through
+TOKEN_MARGIN = 64
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class NewColumns(ValueError):
+    """Records after the first batch have keys the output lacks"""
+
+
+def loads(data):
+    """Parse one JSON document with the fastest available backend"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def is_json(path):
+    """True for .json, .jsonl and .ndjson paths, compressed or not"""
+    return compressed_io.data_suffix(path) in ('.json',) + LINES_SUFFIXES
+
+
+def is_lines(path):
+    """True when ``path`` holds JSON Lines rather than one document
+
+    .jsonl and .ndjson always do; a .json file does unless its first
+    non-blank character opens an array.
+    """
+    if compressed_io.data_suffix(path) in LINES_SUFFIXES:
+        return True
+    with compressed_io.open_read(path) as f:
+        while True:
+            block = f.read(4096)
+            if not block:
+                return True
+            block = block.lstrip().removeprefix(b'\xef\xbb\xbf').lstrip()
+            if block:
+                return not block.startswith(b'[')
+
+
+def iter_lines(path, batch_size=100000):
+    """Lists of records from a JSON Lines file
+
+    Each batch is parsed in one backend call; a batch that fails is
+    re-parsed line by line to report the bad line.
+    """
+    with compressed_io.open_read(path) as f:
+        number = 0
+        while True:
+            lines = list(itertools.islice(f, batch_size))
+            if not lines:
+                return
+            first = number + 1
+            number += len(lines)
+            lines = [line for line in lines if line.strip()]
+            if not lines:
+                continue
+            if first == 1:
+                lines[0] = lines[0].removeprefix(b'\xef\xbb\xbf')
+            try:
+                yield loads(b'[' + b','.join(lines) + b']')
+            except ValueError:
+                for i, line in enumerate(lines):
+                    try:
+                        loads(line)
+                    except ValueError as e:
+                        raise ValueError(f"{path}: bad JSON record near "
+                                         f"line {first + i}: {e}")
+                raise
+
+
+def iter_array(path, block=READ_BLOCK):
+    """Elements of a top-level JSON array, parsed incrementally
+
+    Only the current element and one read block are held in memory.
+    """
+    decoder = json.JSONDecoder()
+    with compressed_io.open_read(path, encoding='utf-8-sig') as f:
+        buffer = ''
+        pos = 0
+        eof = False
+
+        def fill(size=block):
+            nonlocal buffer, pos, eof
+            data = f.read(size)
+            eof = not data
+            buffer = buffer[pos:] + data
+            pos = 0
+
+        def skip():
+            """Skip whitespace, reading on; the next char or '' at EOF"""
+            nonlocal pos
+            while True:
+                pos = WHITESPACE.match(buffer, pos).end()
+                if pos < len(buffer) or eof:
+                    return buffer[pos:pos + 1]
+                fill()
+
+        fill()
+        if skip() != '[':
+            raise ValueError(f"{path} does not hold a JSON array")
+        pos += 1
+        if skip() == ']':
+            return
+        while True:
+            if not skip():
+                raise ValueError(f"{path}: the JSON array is cut off")
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                # Only an error at the end of the buffer (or in a string
+                # running past it) can be a value cut off by the read
+                if eof or not (e.pos >= len(buffer) - TOKEN_MARGIN
+                               or e.msg.startswith('Unterminated string')):
+                    raise ValueError(f"{path}: bad JSON in the array: "
+                                     f"{e.msg}")
+                end = len(buffer)
+            # A value that reaches the end of the buffer may be cut off
+            if end == len(buffer) and not eof:
+                fill(max(block, len(buffer)))
+                continue
+            yield value
+            pos = end
+            separator = skip()
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError(f"{path}: expected ',' or ']' in the "
+                                 "JSON array")
+            pos += 1
+
+
+def iter_records(path, batch_size=100000):
+    """Lists of up to ``batch_size`` records from a JSON or JSON Lines file"""
+    if is_lines(path):
+        yield from iter_lines(path, batch_size)
+        return
+    elements = iter_array(path)
+    while True:
+        batch = list(itertools.islice(elements, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def record_keys(path, batch_size=100000):
+    """All record keys of a file, in order of first appearance"""
+    keys = {}
+    for batch in iter_records(path, batch_size):
+        for record in batch:
+            keys.update(dict.fromkeys(record))
+    return list(keys)
+
+
+def read_chunks(path, chunksize=100000, columns=None):
+    """DataFrames of up to ``chunksize`` records each
+
+    Without ``columns`` the columns are the keys of the first batch, and
+    a later record with another key raises NewColumns; pass the full set
+    from ``record_keys`` to read such files.  Records must be objects.
+    """
+    for batch in iter_records(path, chunksize):
+        try:
+            keys = set().union(*map(dict.keys, batch))
+        except TypeError:
+            raise ValueError(f"{path} must hold JSON objects (records)")
+        if columns is None:
+            chunk = pd.DataFrame.from_records(batch)
+            columns = list(chunk.columns)
+        else:
+            extra = keys.difference(columns)
+            if extra:
+                raise NewColumns(f"{path} has keys missing from the first "
+                                 f"records: {', '.join(sorted(extra))}")
+            chunk = pd.DataFrame.from_records(batch, columns=columns)
+        yield chunk
+
+
+def read_json(path, chunksize=100000):
+    """A whole JSON or JSON Lines file as one DataFrame"""
+    columns = None
+    while True:
+        try:
+            chunks = list(read_chunks(path, chunksize, columns))
+        except NewColumns:
+            columns = record_keys(path, chunksize)
+            continue
+        if not chunks:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(chunks, ignore_index=True)
+
+
+class JSONWriter:
+    """Write DataFrame chunks as one JSON array or as JSON Lines
+
+    Arrays are written like ``to_json(orient='records', indent=2)`` of
+    the whole frame; JSON Lines one compact record per line.  A .gz,
+    .bz2, .xz or .zst path is compressed on ``workers`` threads.
+    """
+
+    def __init__(self, path, lines=False, workers=None):
+        """Open ``path`` for writing"""
+        self.file = compressed_io.open_write(path, workers=workers)
+        self.lines = lines
+        self.rows = 0
+
+    def write(self, chunk):
+        """Append the records of ``chunk``"""
+        if self.lines:
+            if len(chunk):
+                self.file.write(chunk.to_json(orient='records', lines=True))
+        elif len(chunk):
+            text = chunk.to_json(orient='records', indent=2)
+            self.file.write(',\n' if self.rows else '[\n')
+            self.file.write(text[1:-1].strip('\n'))
+        self.rows += len(chunk)
+
+    def close(self):
+        """Finish the document"""
+        if not self.lines:
+            self.file.write('\n]' if self.rows else '[\n\n]')
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
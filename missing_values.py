@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Missing Values - Fill values for gaps, in memory or over streamed chunks
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+import compressed_io
+import csv_schema
+from quantile_sketch import KLLSketch
+
+
+# Fill for missing text and category values
+UNKNOWN = 'Unknown'
+
+PERCENTILE = re.compile(r'^p(\d{1,2}(\.\d+)?|100)$')
+
+
+def parse_method(method):
+    """Validate a fill method: 'mean', 'zero', 'median' or e.g. 'p90'
+
+    Returns the method name, or the quantile in [0, 1] for 'median' and
+    percentiles.
+    """
+    if method in ('mean', 'zero'):
+        return method
+    if method == 'median':
+        return 0.5
+    match = PERCENTILE.match(str(method))
+    if match is None:
+        raise ValueError(f"Unknown fill method '{method}' (use mean, "
+                         "median, zero or a percentile such as p90)")
+    return float(match.group(1)) / 100
+
+
+def numeric_columns(df):
+    """Numeric, non-boolean columns of a frame"""
+    return [
+        column for column in df.select_dtypes(include=[np.number]).columns
+        if not pd.api.types.is_bool_dtype(df[column].dtype)
+    ]
+
+
+class FillScan:
+    """First pass of a fill: per-column sums or quantile sketches
+
+    Mean fills keep a running count and sum per column; median and
+    percentile fills keep one mergeable KLL sketch per column, so the
+    pass runs in bounded memory at any size.
+    """
+
+    def __init__(self, method='mean', columns=None):
+        """Initialize scan"""
+        self.method = parse_method(method)
+        self.columns = None if columns is None else list(columns)
+        self.counts = {}
+        self.sums = {}
+        self.sketches = {}
+
+    def update(self, chunk):
+        """Fold one chunk into the running statistics"""
+        if self.columns is None:
+            self.columns = numeric_columns(chunk)
+        if self.method == 'zero':
+            return
+        for column in self.columns:
+            values = chunk[column].to_numpy(dtype=float, na_value=np.nan)
+            if self.method == 'mean':
+                valid = values[~np.isnan(values)]
+                self.counts[column] = self.counts.get(column, 0) + len(valid)
+                self.sums[column] = self.sums.get(column, 0.0) + valid.sum()
+            else:
+                self.sketches.setdefault(column, KLLSketch()).update(values)
+
+    def values(self):
+        """Fill value per numeric column (NaN when a column has no data)"""
+        result = {}
+        for column in self.columns or []:
+            if self.method == 'zero':
+                result[column] = 0
+            elif self.method == 'mean':
+                count = self.counts.get(column, 0)
+                result[column] = (self.sums[column] / count if count
+                                  else np.nan)
+            else:
+                sketch = self.sketches.get(column, KLLSketch())
+                result[column] = sketch.quantile(self.method)
+        return result
+
+
+def fill_values(df, method='mean', columns=None):
+    """Fill value per numeric column of an in-memory frame
+
+    The whole frame is at hand, so medians and percentiles are exact
+    (``Series.quantile``); sketches are only for streamed input.
+    """
+    quantile = parse_method(method)
+    if quantile in ('mean', 'zero'):
+        scan = FillScan(method, columns)
+        scan.update(df)
+        return scan.values()
+    if columns is None:
+        columns = numeric_columns(df)
+    return {column: df[column].quantile(quantile) for column in columns}
+
+
+def fill_frame(df, values):
+    """Fill gaps in place: numerics from ``values``, text with UNKNOWN
+
+    Returns the columns that were filled.
+    """
+    filled = []
+    for column, value in values.items():
+        series = df[column]
+        if pd.isna(value) or not series.hasnans:
+            continue
+        if (pd.api.types.is_integer_dtype(series.dtype)
+                and value != int(value)):
+            # A fractional fill for a nullable integer column needs floats
+            df[column] = series.astype(float).fillna(value)
+        elif series.dtype.kind == 'f':
+            # Keep compacted float32 columns float32
+            df[column] = series.fillna(series.dtype.type(value))
+        else:
+            df[column] = series.fillna(value)
+        filled.append(column)
+
+    for column in df.select_dtypes(
+        include=['object', 'string', 'category']
+    ).columns:
+        series = df[column]
+        if not series.hasnans:
+            continue
+        if isinstance(series.dtype, pd.CategoricalDtype) and (
+            UNKNOWN not in series.cat.categories
+        ):
+            series = series.cat.add_categories(UNKNOWN)
+        df[column] = series.fillna(UNKNOWN)
+        filled.append(column)
+    return filled
+
+
+def fill_missing_stream(input_file, output_file, method='mean',
+                        columns=None, chunksize=100000, encoding='utf-8'):
+    """Fill missing values of a CSV in two streaming passes
+
+    Pass one computes the fill values (sketched percentiles for 'median'
+    and 'pNN'), pass two fills and writes chunk by chunk.  Returns
+    ``(rows, values)``.
+    """
+    scan = FillScan(method, columns)
+    for chunk in csv_schema.read_csv(input_file, encoding=encoding,
+                                     chunksize=chunksize):
+        scan.update(chunk)
+    values = scan.values()
+
+    rows = 0
+    with compressed_io.open_write(output_file, encoding) as f:
+        for i, chunk in enumerate(csv_schema.read_csv(
+            input_file, encoding=encoding, chunksize=chunksize
+        )):
+            fill_frame(chunk, values)
+            chunk.to_csv(f, index=False, header=(i == 0))
+            rows += len(chunk)
+        if rows == 0:
+            pd.read_csv(input_file, encoding=encoding, nrows=0).to_csv(
+                f, index=False
+            )
+    return rows, values
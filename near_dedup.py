@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Near Dedup - MinHash/LSH detection of near-identical records
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+# Characters per shingle (at most 8, packed into one uint64)
+SHINGLE_SIZE = 3
+
+# MinHash permutations per signature
+NUM_PERM = 64
+
+# Rows per signature block, the unit of work sent to the process pool
+SIGNATURE_BLOCK = 50000
+
+# Members of an LSH bucket that every other member is verified against
+BUCKET_CAP = 64
+
+
+def normalize(df, columns=None):
+    """One comparable string per row: lower-case, no punctuation
+
+    ``columns`` defaults to the text columns (or all columns if there
+    are none); their values are joined with spaces.
+    """
+    if columns is None:
+        columns = list(df.select_dtypes(
+            include=['object', 'string', 'category']
+        ).columns) or list(df.columns)
+
+    def as_text(column):
+        return df[column].astype(object).fillna('').astype(str)
+
+    text = as_text(columns[0])
+    for column in columns[1:]:
+        text = text + ' ' + as_text(column)
+    return (text.str.lower()
+                .str.replace(r'[^\w\s]', '', regex=True)
+                .str.replace(r'\s+', ' ', regex=True)
+                .str.strip())
+
+
+def shingles(texts, k=SHINGLE_SIZE):
+    """Character k-grams of every text, packed into uint64 values
+
+    Returns ``(values, starts)``: the shingles of text ``i`` are
+    ``values[starts[i]:starts[i + 1]]``.  Texts shorter than ``k`` are
+    padded, so every text has at least one shingle.
+    """
+    encoded = [text.encode('utf-8').ljust(k) for text in texts]
+    lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64,
+                          count=len(encoded))
+    buffer = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    ends = np.cumsum(lengths)
+    counts = lengths - k + 1
+    starts = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(counts, out=starts[1:])
+
+    # Position of each shingle in the buffer, skipping windows that would
+    # cross into the next text
+    row = np.repeat(np.arange(len(encoded)), counts)
+    positions = (np.arange(starts[-1]) - starts[row]
+                 + (ends - lengths)[row])
+    values = np.zeros(len(positions), dtype=np.uint64)
+    for j in range(k):
+        values = (values << np.uint64(8)) | buffer[positions + j]
+    return values, starts
+
+
+def permutations(num_perm=NUM_PERM, seed=1):
+    """Odd multipliers and offsets of the multiply-shift hash family"""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2 ** 63, num_perm, dtype=np.uint64) * 2 + 1
+    b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+    return a, b
+
+
+def minhash(texts, num_perm=NUM_PERM, k=SHINGLE_SIZE, seed=1):
+    """(len(texts), num_perm) uint32 MinHash signatures
+
+    Each permutation hashes every shingle of the block at once and takes
+    the per-text minimum with one ``reduceat``.
+    """
+    values, starts = shingles(texts, k)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    if not len(texts):
+        return signatures
+    a, b = permutations(num_perm, seed)
+    for j in range(num_perm):
+        hashed = (values * a[j] + b[j]) >> np.uint64(32)
+        signatures[:, j] = np.minimum.reduceat(hashed, starts[:-1])
+    return signatures
+
+
+def signatures(texts, num_perm=NUM_PERM, k=SHINGLE_SIZE, workers=None):
+    """MinHash signatures of all texts, one block per pool task"""
+    texts = list(texts)
+    blocks = [texts[i:i + SIGNATURE_BLOCK]
+              for i in range(0, len(texts), SIGNATURE_BLOCK)]
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(blocks) < 2:
+        parts = [minhash(block, num_perm, k) for block in blocks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(
+                minhash, blocks, [num_perm] * len(blocks),
+                [k] * len(blocks)
+            ))
+    if not parts:
+        return np.empty((0, num_perm), dtype=np.uint32)
+    return np.concatenate(parts)
+
+
+def lsh_params(threshold, num_perm=NUM_PERM):
+    """Bands and rows per band for a similarity threshold
+
+    Pairs with Jaccard similarity ``s`` share a bucket with probability
+    ``1 - (1 - s ** rows) ** bands``, which turns steeply around
+    ``(1 / bands) ** (1 / rows)``; the steepest split that turns at or
+    below ``threshold`` is chosen, favouring recall.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1.0 / bands) ** (1.0 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+def candidate_pairs(sigs, bands, rows, cap=BUCKET_CAP):
+    """Row pairs that share an LSH bucket in at least one band
+
+    Every member of a bucket is paired with each of the bucket's first
+    ``cap`` rows, so buckets of up to ``cap`` rows are checked in full
+    and a larger one costs O(m * cap) pairs, not O(m^2).
+    """
+    pairs = []
+    for band in range(bands):
+        keys = pd.util.hash_pandas_object(
+            pd.DataFrame(sigs[:, band * rows:(band + 1) * rows]),
+            index=False
+        ).to_numpy()
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        new_bucket = np.ones(len(keys), dtype=bool)
+        new_bucket[1:] = keys[1:] != keys[:-1]
+        start = np.maximum.accumulate(
+            np.where(new_bucket, np.arange(len(keys)), 0)
+        )
+        rank = np.arange(len(keys)) - start
+        for j in range(cap):
+            later = rank > j
+            if not later.any():
+                break
+            pairs.append(np.column_stack([order[start[later] + j],
+                                          order[later]]))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    pairs = np.sort(np.concatenate(pairs), axis=1)
+    # One int64 key per pair makes removing repeats a 1-D unique
+    keys = np.unique(pairs[:, 0] * np.int64(len(sigs)) + pairs[:, 1])
+    return np.column_stack([keys // len(sigs), keys % len(sigs)])
+
+
+def similar_pairs(sigs, pairs, threshold):
+    """Candidate pairs whose estimated Jaccard similarity passes"""
+    similarity = np.empty(len(pairs))
+    for start in range(0, len(pairs), SIGNATURE_BLOCK):
+        block = pairs[start:start + SIGNATURE_BLOCK]
+        similarity[start:start + len(block)] = (
+            sigs[block[:, 0]] == sigs[block[:, 1]]
+        ).mean(axis=1)
+    return pairs[similarity >= threshold]
+
+
+def dropped_rows(n, pairs):
+    """Which rows are dropped when each row is checked against kept rows
+
+    Rows are taken in order: a row is dropped if a pair links it to an
+    earlier row that is kept, so similarity does not chain through rows
+    that are themselves dropped.  Rows are settled in rounds, one per
+    link in the longest such chain.
+    """
+    # 1: kept, -1: dropped, 0: not settled yet
+    state = np.zeros(n, dtype=np.int8)
+    if not len(pairs):
+        return state < 0
+    earlier, later = pairs[:, 0], pairs[:, 1]
+    state[np.bincount(later, minlength=n) == 0] = 1
+    while True:
+        open_rows = state == 0
+        if not open_rows.any():
+            return state < 0
+        known = state[earlier]
+        hit = np.zeros(n, dtype=bool)
+        hit[later[known == 1]] = True
+        waiting = np.bincount(later[known == 0], minlength=n) > 0
+        state[open_rows & hit] = -1
+        state[open_rows & ~hit & ~waiting] = 1
+
+
+def near_duplicated(df, columns=None, threshold=0.8, num_perm=NUM_PERM,
+                    workers=None):
+    """Boolean mask of rows that nearly repeat an earlier kept row
+
+    Rows are normalized, shingled and MinHashed.  Rows with identical
+    signatures are collapsed to their first occurrence; LSH banding
+    proposes candidate pairs among the rest in time linear in the rows,
+    only candidates are verified (by estimated Jaccard similarity of
+    their shingles), and a row is dropped if it is similar to an
+    earlier row that is kept.
+    """
+    if not 0 < threshold <= 1:
+        raise ValueError("threshold must be in (0, 1]")
+    sigs = signatures(normalize(df, columns), num_perm, workers=workers)
+    duplicated = np.ones(len(df), dtype=bool)
+    if not len(sigs):
+        return duplicated
+    _, first = np.unique(sigs, axis=0, return_index=True)
+    first.sort()
+    sigs = sigs[first]
+    bands, rows = lsh_params(threshold, num_perm)
+    pairs = similar_pairs(sigs, candidate_pairs(sigs, bands, rows),
+                          threshold)
+    duplicated[first] = dropped_rows(len(sigs), pairs)
+    return duplicated
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Outliers - Per-column outlier bounds, in memory or over streamed chunks
+"""
+
+import numpy as np
+import pandas as pd
+
+import compressed_io
+import csv_schema
+from quantile_sketch import KLLSketch
+
+
+# Default threshold per method: z-score and MAD-based modified z-score
+# cut-offs, and the IQR fence multiplier
+THRESHOLDS = {'zscore': 3.0, 'iqr': 1.5, 'mad': 3.5}
+
+# Scales MAD to the standard deviation of a normal distribution
+MAD_SCALE = 0.6745
+
+
+def numeric_columns(df):
+    """Numeric, non-boolean columns of a frame"""
+    return [
+        column for column in df.select_dtypes(include=[np.number]).columns
+        if not pd.api.types.is_bool_dtype(df[column].dtype)
+    ]
+
+
+def check_method(method, threshold):
+    """Validate ``method`` and return the threshold to use"""
+    if method not in THRESHOLDS:
+        raise ValueError(f"Unknown outlier method '{method}' "
+                         f"(supported: {', '.join(THRESHOLDS)})")
+    return THRESHOLDS[method] if threshold is None else float(threshold)
+
+
+def quantile_fence(method, threshold, first, second):
+    """``(spread, low, high)`` from the quartiles (IQR method) or from
+    the median and MAD (MAD method)"""
+    if method == 'iqr':
+        spread = second - first
+        return (spread, first - threshold * spread,
+                second + threshold * spread)
+    spread = second
+    return (spread, first - threshold * spread / MAD_SCALE,
+            first + threshold * spread / MAD_SCALE)
+
+
+def bounds_from_quantiles(values, method, threshold):
+    """Bounds for the IQR or MAD method from a frame of values"""
+    result = {}
+    for column in values.columns:
+        series = values[column].dropna().astype(float)
+        if series.empty:
+            continue
+        if method == 'iqr':
+            first, second = series.quantile([0.25, 0.75])
+        else:
+            first = series.median()
+            second = (series - first).abs().median()
+        spread, low, high = quantile_fence(method, threshold, first, second)
+        if spread > 0:
+            result[column] = (low, high)
+    return result
+
+
+def bounds_from_moments(count, mean, m2, threshold):
+    """Z-score bounds from per-column count, mean and M2 Series"""
+    std = np.sqrt(m2 / (count - 1)).where(count > 1)
+    result = {}
+    for column in mean.index:
+        if std[column] > 0:
+            result[column] = (mean[column] - threshold * std[column],
+                              mean[column] + threshold * std[column])
+    return result
+
+
+def outlier_bounds(df, columns=None, method='zscore', threshold=None):
+    """Exact ``{column: (low, high)}`` bounds computed from a whole frame
+
+    Columns without spread (constant, or a MAD of zero) get no bounds.
+    """
+    threshold = check_method(method, threshold)
+    columns = numeric_columns(df) if columns is None else list(columns)
+    values = df[columns]
+    if method != 'zscore':
+        return bounds_from_quantiles(values, method, threshold)
+    count = values.count()
+    return bounds_from_moments(count, values.mean(),
+                               values.var() * (count - 1), threshold)
+
+
+def outlier_mask(df, bounds):
+    """Boolean Series, True for rows with any value outside its bounds
+
+    Values equal to a bound are outliers; missing values never are.
+    """
+    mask = np.zeros(len(df), dtype=bool)
+    for column, (low, high) in bounds.items():
+        values = df[column].to_numpy(dtype=float, na_value=np.nan)
+        with np.errstate(invalid='ignore'):
+            mask |= (values <= low) | (values >= high)
+    return pd.Series(mask, index=df.index)
+
+
+class OutlierScan:
+    """First pass of streaming outlier removal
+
+    Folds chunks into per-column running count/mean/M2 (Welford updates,
+    merged per chunk with Chan's formula) for the z-score method, or one
+    KLL sketch per column for the quantile-based IQR and MAD methods
+    (the MAD comes from the distances of the sketch's items to its
+    median), and turns them into per-column bounds.  Memory is a few KB
+    per column whatever the row count.
+    """
+
+    def __init__(self, columns=None, method='zscore', threshold=None):
+        """Initialize scan"""
+        self.threshold = check_method(method, threshold)
+        self.method = method
+        self.columns = None if columns is None else list(columns)
+        self.count = self.mean = self.m2 = None
+        self.sketches = {}
+
+    def update(self, chunk):
+        """Fold one chunk into the running statistics"""
+        if self.columns is None:
+            self.columns = numeric_columns(chunk)
+        if self.method != 'zscore':
+            for column in self.columns:
+                self.sketches.setdefault(column, KLLSketch()).update(
+                    chunk[column].to_numpy(dtype=float, na_value=np.nan)
+                )
+            return
+
+        values = chunk[self.columns].astype(float)
+        count = values.count()
+        mean = values.mean().fillna(0.0)
+        m2 = ((values - mean) ** 2).sum()
+        if self.count is None:
+            self.count, self.mean, self.m2 = count, mean, m2
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        weight = (count / total).fillna(0.0)
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * weight
+        self.mean = self.mean + delta * weight
+        self.count = total
+
+    def bounds(self):
+        """Per-column ``(low, high)`` bounds from the statistics so far"""
+        if self.method == 'zscore':
+            if self.count is None:
+                return {}
+            return bounds_from_moments(self.count, self.mean, self.m2,
+                                       self.threshold)
+        result = {}
+        for column, sketch in self.sketches.items():
+            if not len(sketch):
+                continue
+            if self.method == 'iqr':
+                first, second = sketch.quantile([0.25, 0.75])
+            else:
+                first = sketch.median()
+                second = sketch.deviation(first)
+            spread, low, high = quantile_fence(self.method, self.threshold,
+                                               first, second)
+            if spread > 0:
+                result[column] = (low, high)
+        return result
+
+
+def remove_outliers_stream(input_file, output_file, columns=None,
+                           method='zscore', threshold=None, chunksize=100000,
+                           encoding='utf-8'):
+    """Remove outlier rows from a CSV in two streaming passes
+
+    Pass one computes the bounds, pass two filters chunk by chunk, so
+    memory stays at one chunk (plus a quantile sketch per column for
+    IQR/MAD, whose bounds are then estimates).  Returns ``(rows, removed)``.
+    """
+    scan = OutlierScan(columns, method, threshold)
+    for chunk in csv_schema.read_csv(input_file, encoding=encoding,
+                                     chunksize=chunksize):
+        scan.update(chunk)
+    bounds = scan.bounds()
+
+    rows = removed = 0
+    with compressed_io.open_write(output_file, encoding) as f:
+        for i, chunk in enumerate(csv_schema.read_csv(
+            input_file, encoding=encoding, chunksize=chunksize
+        )):
+            mask = outlier_mask(chunk, bounds)
+            chunk[~mask].to_csv(f, index=False, header=(i == 0))
+            rows += len(chunk)
+            removed += int(mask.sum())
+        if rows == 0:
+            pd.read_csv(input_file, encoding=encoding, nrows=0).to_csv(
+                f, index=False
+            )
+    return rows, removed
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Parallel Reader - Multi-process CSV parsing by byte-range splitting
+"""
+
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import compressed_io
+import csv_schema
+
+
+# Files smaller than this are parsed in-process; pool start-up and
+# pickling the parts back would cost more than they save
+PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+
+# Ranges per worker, so one slow range does not leave cores idle
+RANGES_PER_WORKER = 2
+
+SCAN_BLOCK = 16 * 1024 * 1024
+
+# Encodings in which b'\n' and b'"' can only appear as those characters
+SPLITTABLE_ENCODINGS = ('utf-8', 'utf8', 'utf-8-sig', 'ascii', 'latin-1',
+                        'latin1', 'iso-8859-1', 'cp1252')
+
+
+def quotes_before(path, offsets):
+    """Count quote characters before each of the sorted ``offsets``"""
+    counts = []
+    total = 0
+    position = 0
+    with open(path, 'rb') as f:
+        for offset in offsets:
+            while position < offset:
+                block = f.read(min(SCAN_BLOCK, offset - position))
+                if not block:
+                    break
+                total += block.count(b'"')
+                position += len(block)
+            counts.append(total)
+    return counts
+
+
+def next_record_start(f, offset, in_quotes):
+    """Return the offset just past the first record-ending newline
+
+    ``in_quotes`` is the quote state at ``offset``; newlines inside a
+    quoted field are skipped.
+    """
+    f.seek(offset)
+    position = offset
+    while True:
+        block = f.read(1024 * 1024)
+        if not block:
+            return position
+        i = 0
+        quote = block.find(b'"')
+        while True:
+            newline = block.find(b'\n', i)
+            while quote != -1 and (newline == -1 or quote < newline):
+                in_quotes = not in_quotes
+                quote = block.find(b'"', quote + 1)
+            if newline == -1:
+                break
+            if not in_quotes:
+                return position + newline + 1
+            i = newline + 1
+        position += len(block)
+
+
+def split_ranges(path, parts):
+    """Split a CSV into ``parts`` byte ranges that start on record bounds
+
+    Returns ``(header_end, ranges)``.  A range boundary is moved forward
+    to the next newline that is not inside a quoted field, using the
+    parity of the quote count before it.
+    """
+    if compressed_io.detect(path):
+        raise ValueError(f"{path} is compressed; decompress it first to "
+                         "split it into byte ranges")
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header_end = next_record_start(f, 0, False)
+        body = size - header_end
+        targets = [header_end + body * i // parts for i in range(1, parts)]
+        quotes = quotes_before(path, targets)
+
+        bounds = [header_end]
+        for target, count in zip(targets, quotes):
+            start = next_record_start(f, target, count % 2 == 1)
+            if start > bounds[-1]:
+                bounds.append(start)
+        if size > bounds[-1]:
+            bounds.append(size)
+
+    return header_end, list(zip(bounds[:-1], bounds[1:]))
+
+
+def parse_range(path, start, end, names, kwargs):
+    """Parse the records in ``[start, end)`` of a CSV file"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return pd.read_csv(io.BytesIO(data), header=None, names=names, **kwargs)
+
+
+def reconcile(parts, parse_again):
+    """Make column dtypes agree across independently parsed parts
+
+    Columns some part parsed as text are re-parsed as text everywhere
+    (as one read_csv would have), and categoricals share one category
+    set so that concatenation keeps them categorical.
+    """
+    if len(parts) < 2:
+        return parts
+    for column in parts[0].columns:
+        dtypes = [part[column].dtype for part in parts]
+        if all(isinstance(d, pd.CategoricalDtype) for d in dtypes):
+            categories = sorted(set().union(
+                *(d.categories.tolist() for d in dtypes)
+            ))
+            for part in parts:
+                part[column] = part[column].cat.set_categories(categories)
+            continue
+
+        numeric = [pd.api.types.is_numeric_dtype(d)
+                   and not pd.api.types.is_bool_dtype(d) for d in dtypes]
+        if any(numeric) and not all(numeric):
+            for i, is_numeric in enumerate(numeric):
+                if is_numeric:
+                    parts[i][column] = parse_again(i, column)
+    return parts
+
+
+def range_kwargs(path, encoding='utf-8', usecols=None, parse_dates=False,
+                 categories=False):
+    """Header names and ``read_csv`` kwargs for parsing byte ranges
+
+    Returns ``(names, kwargs, fresh)`` where ``fresh`` says whether the
+    dtypes came from an up-to-date schema sidecar.
+    """
+    names = list(pd.read_csv(path, encoding=encoding, nrows=0).columns)
+    schema = csv_schema.load_schema(path)
+    fresh = schema is not None and csv_schema.is_fresh(schema, path)
+
+    kwargs = {'encoding': 'utf-8' if encoding == 'utf-8-sig' else encoding}
+    if usecols is not None:
+        kwargs['usecols'] = list(usecols)
+    if fresh:
+        kwargs.update(csv_schema.read_kwargs(schema, usecols, parse_dates,
+                                             categories))
+    return names, kwargs, fresh
+
+
+def parse_ranges(path, ranges, names, kwargs, workers=None):
+    """Parse byte ranges on a process pool and return the parts in order
+
+    Part dtypes are reconciled so the parts can be concatenated.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(ranges) < 2:
+        parts = [parse_range(path, start, end, names, kwargs)
+                 for start, end in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(
+                parse_range,
+                [path] * len(ranges),
+                [start for start, _ in ranges],
+                [end for _, end in ranges],
+                [names] * len(ranges),
+                [kwargs] * len(ranges),
+            ))
+
+    def parse_again(i, column):
+        start, end = ranges[i]
+        text = dict(kwargs)
+        text['dtype'] = {**kwargs.get('dtype', {}),
+                         column: csv_schema.string_dtype()}
+        return parse_range(path, start, end, names, text)[column]
+
+    return reconcile(parts, parse_again)
+
+
+def read_csv(path, workers=None, encoding='utf-8', usecols=None,
+             parse_dates=False, categories=False, min_bytes=None):
+    """Parse a CSV file across a process pool
+
+    The file is split into newline-aligned byte ranges (quoted newlines
+    are respected), the ranges are parsed in parallel and concatenated in
+    order.  Dtypes come from a fresh schema sidecar when there is one;
+    ``parse_dates`` and ``categories`` are as in ``csv_schema.read_csv``.
+    Small files (under ``min_bytes``, default PARALLEL_MIN_BYTES), one
+    worker, or encodings that cannot be split on bytes fall back to a
+    single ``read_csv``, as do compressed files, which are streamed
+    through the decompressor.
+    """
+    workers = workers or os.cpu_count() or 1
+    if min_bytes is None:
+        min_bytes = PARALLEL_MIN_BYTES
+    if (workers <= 1 or os.path.getsize(path) < min_bytes
+            or encoding.lower() not in SPLITTABLE_ENCODINGS
+            or compressed_io.detect(path)):
+        return csv_schema.read_csv(path, encoding=encoding, usecols=usecols,
+                                   parse_dates=parse_dates,
+                                   categories=categories)
+
+    _, ranges = split_ranges(path, workers * RANGES_PER_WORKER)
+    if not ranges:
+        return csv_schema.read_csv(path, encoding=encoding, usecols=usecols,
+                                   parse_dates=parse_dates,
+                                   categories=categories)
+
+    names, kwargs, fresh = range_kwargs(path, encoding, usecols, parse_dates,
+                                        categories)
+    parts = parse_ranges(path, ranges, names, kwargs, workers)
+    df = pd.concat(parts, ignore_index=True)
+    if not fresh and (parse_dates or categories):
+        csv_schema.apply_candidates(
+            df, csv_schema.schema_from_frame(df, path), parse_dates,
+            categories
+        )
+    return df
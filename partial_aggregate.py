@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Partial Aggregate - Chunked, mergeable group-by aggregation
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+import pandas as pd
+
+
+# Moments each aggregate needs per group; all of them merge across chunks
+MOMENTS = {
+    'count': ('count',),
+    'sum': ('sum',),
+    'min': ('min',),
+    'max': ('max',),
+    'mean': ('count', 'sum'),
+    'var': ('count', 'sum', 'm2'),
+    'std': ('count', 'sum', 'm2'),
+}
+
+# Number of chunk partials buffered before folding them into the total
+COMBINE_EVERY = 16
+
+
+class PartialAggregator:
+    """Group-by aggregation split into per-chunk partials and a merge
+
+    Each chunk is reduced to per-group moments (count, sum, min, max and
+    the sum of squared deviations ``m2``), partials are merged with the
+    parallel variance formula, and ``finalize`` turns the merged moments
+    into the same frame ``df.groupby(group_by).agg(agg_dict)`` returns.
+    """
+
+    def __init__(self, group_by, agg_dict):
+        """Initialize aggregator and validate the requested functions"""
+        self.group_by = group_by
+        self.agg_dict = agg_dict
+        self.keys = group_by if isinstance(group_by, list) else [group_by]
+        self.moments = {}
+
+        for column, funcs in agg_dict.items():
+            for func in self.funcs(funcs):
+                if func not in MOMENTS:
+                    raise ValueError(
+                        f"Aggregate '{func}' cannot be merged across chunks "
+                        f"(supported: {', '.join(MOMENTS)})"
+                    )
+                needed = self.moments.setdefault(column, [])
+                for moment in MOMENTS[func]:
+                    if moment not in needed:
+                        needed.append(moment)
+
+    @staticmethod
+    def funcs(value):
+        """Normalize an agg_dict value to a list of function names"""
+        return list(value) if isinstance(value, (list, tuple)) else [value]
+
+    def partial(self, chunk):
+        """Reduce one chunk to per-group moments"""
+        grouped = chunk.groupby(self.keys, observed=True)
+        parts = {}
+        for column, moments in self.moments.items():
+            values = grouped[column]
+            for moment in moments:
+                if moment == 'm2':
+                    parts[(column, moment)] = (
+                        values.var(ddof=0) * values.count()
+                    ).fillna(0.0)
+                else:
+                    parts[(column, moment)] = values.agg(moment)
+        return pd.DataFrame(parts)
+
+    def combine(self, partials):
+        """Merge several partials into one"""
+        stacked = pd.concat(partials)
+
+        def by_group(key):
+            return stacked[key].groupby(level=self.keys)
+
+        merged = {}
+        for column, moments in self.moments.items():
+            for moment in moments:
+                if moment in ('count', 'sum'):
+                    merged[(column, moment)] = by_group(
+                        (column, moment)
+                    ).sum()
+                elif moment in ('min', 'max'):
+                    merged[(column, moment)] = by_group(
+                        (column, moment)
+                    ).agg(moment)
+
+            if 'm2' in moments:
+                # Chan et al.: M2 = sum(M2_i) + sum(n_i * (mean_i - mean)^2)
+                n_i = stacked[(column, 'count')]
+                mean_i = stacked[(column, 'sum')] / n_i.where(n_i > 0)
+                mean = (by_group((column, 'sum')).transform('sum')
+                        / by_group((column, 'count')).transform('sum'))
+                spread = (n_i * (mean_i - mean) ** 2).fillna(0.0)
+                merged[(column, 'm2')] = (
+                    stacked[(column, 'm2')] + spread
+                ).groupby(level=self.keys).sum()
+
+        return pd.DataFrame(merged)
+
+    def finalize(self, partial):
+        """Turn merged moments into the final aggregate frame"""
+        flat = all(isinstance(v, str) for v in self.agg_dict.values())
+        result = {}
+        for column, funcs in self.agg_dict.items():
+            for func in self.funcs(funcs):
+                count = partial.get((column, 'count'))
+                total = partial.get((column, 'sum'))
+                if func in ('count', 'sum', 'min', 'max'):
+                    values = partial[(column, func)]
+                elif func == 'mean':
+                    values = total / count.where(count > 0)
+                else:
+                    values = (partial[(column, 'm2')]
+                              / (count - 1).where(count > 1))
+                    if func == 'std':
+                        values = np.sqrt(values)
+                result[column if flat else (column, func)] = values
+
+        result = pd.DataFrame(result)
+        if len(self.keys) == 1:
+            result.index = result.index.get_level_values(0)
+        result.index.names = self.keys
+        return result.sort_index().reset_index()
+
+
+def aggregate_chunks(chunks, group_by, agg_dict, workers=None):
+    """Aggregate an iterable of DataFrame chunks across a process pool
+
+    ``workers`` defaults to the CPU count; 1 aggregates in-process.  At
+    most ``2 * workers`` chunks are in flight at any time.
+    """
+    aggregator = PartialAggregator(group_by, agg_dict)
+    workers = workers or os.cpu_count() or 1
+    total = None
+    pending = []
+
+    def fold(partials):
+        nonlocal total
+        if total is not None:
+            partials = [total] + partials
+        total = aggregator.combine(partials)
+
+    if workers <= 1:
+        for chunk in chunks:
+            pending.append(aggregator.partial(chunk))
+            if len(pending) >= COMBINE_EVERY:
+                fold(pending)
+                pending = []
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight = set()
+            for chunk in chunks:
+                in_flight.add(executor.submit(aggregator.partial, chunk))
+                if len(in_flight) >= 2 * workers:
+                    done, in_flight = wait(in_flight,
+                                           return_when=FIRST_COMPLETED)
+                    pending.extend(f.result() for f in done)
+                if len(pending) >= COMBINE_EVERY:
+                    fold(pending)
+                    pending = []
+            pending.extend(f.result() for f in in_flight)
+
+    if pending or total is None:
+        if not pending:
+            raise ValueError("No data to aggregate")
+        fold(pending)
+    return aggregator.finalize(total)
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Query Plan - Deferred CSVProcessor operations with pushdown optimization
+"""
+
+import re
+
+import pandas as pd
+
+from top_n import top_n
+
+
+IDENTIFIER = re.compile(r'`([^`]+)`|([A-Za-z_]\w*)')
+
+# Aggregate functions whose result does not depend on row order
+ORDER_INSENSITIVE = ('sum', 'mean', 'min', 'max', 'count', 'std', 'var',
+                     'nunique')
+
+
+def referenced_columns(condition, columns):
+    """Return the columns of ``columns`` referenced by a query condition"""
+    names = set()
+    for quoted, bare in IDENTIFIER.findall(condition):
+        names.add(quoted or bare)
+    return [c for c in columns if c in names]
+
+
+def query(df, condition):
+    """``df.query`` that compares categorical columns by their values
+
+    pandas refuses ``<``/``>`` between a categorical and a value that
+    is not one of its categories; such columns are compared as plain
+    values instead.
+    """
+    try:
+        return df.query(condition)
+    except TypeError:
+        columns = [
+            column for column in referenced_columns(condition, df.columns)
+            if isinstance(df[column].dtype, pd.CategoricalDtype)
+        ]
+        if not columns:
+            raise
+        plain = df.assign(**{
+            column: df[column].astype(df[column].cat.categories.dtype)
+            for column in columns
+        })
+        return df[plain.eval(condition)]
+
+
+def as_list(value):
+    """Wrap a single column name in a list"""
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+def order_insensitive(agg_dict):
+    """True if every aggregate in ``agg_dict`` ignores row order
+
+    'first', 'last', 'nth' and callables see the rows in order, so a
+    sort before them matters.
+    """
+    specs = agg_dict.values() if isinstance(agg_dict, dict) else [agg_dict]
+    return all(func in ORDER_INSENSITIVE
+               for spec in specs for func in as_list(spec))
+
+
+class QueryPlan:
+    """Ordered list of filter/select/sort/limit/aggregate steps
+
+    Steps are recorded as ``(op, arg)`` tuples and only run when the plan
+    is applied to a DataFrame.  ``columns`` is the header of the source
+    and is used to resolve which columns a filter condition touches.
+    """
+
+    STREAMABLE = ('filter', 'select')
+
+    def __init__(self, columns):
+        """Initialize an empty plan over a source with ``columns``"""
+        self.columns = list(columns)
+        self.steps = []
+
+    def __len__(self):
+        return len(self.steps)
+
+    def add(self, op, arg):
+        """Record a step"""
+        self.steps.append((op, arg))
+
+    def optimize(self):
+        """Return an equivalent, cheaper list of steps
+
+        Filters are pushed ahead of sorts and of selections that keep the
+        columns they reference, selections are pushed ahead of sorts that
+        keep their keys, adjacent filters are merged, a selection of a
+        subset of the one before it replaces it, and sorts made redundant
+        by a later sort or an order-insensitive aggregate are dropped.  A
+        limit right after a sort becomes a top-N step, so the full sort
+        never runs.  Nothing moves across an aggregate or a limit.
+        """
+        steps = []
+        for op, arg in self.steps:
+            if op == 'filter':
+                pos = len(steps)
+                while pos > 0:
+                    prev_op, prev_arg = steps[pos - 1]
+                    if prev_op == 'sort':
+                        pos -= 1
+                    elif prev_op == 'select' and all(
+                        c in prev_arg
+                        for c in referenced_columns(arg, self.columns)
+                    ):
+                        pos -= 1
+                    else:
+                        break
+                if pos > 0 and steps[pos - 1][0] == 'filter':
+                    merged = f"({steps[pos - 1][1]}) and ({arg})"
+                    steps[pos - 1] = ('filter', merged)
+                else:
+                    steps.insert(pos, ('filter', arg))
+            elif op == 'select':
+                # Project before a sort whose keys survive the selection
+                pos = len(steps)
+                while pos > 0 and steps[pos - 1][0] in ('sort', 'topn'):
+                    keys = as_list(steps[pos - 1][1][0])
+                    if not all(c in arg for c in keys):
+                        break
+                    pos -= 1
+                # Kept apart otherwise, so a column the earlier one
+                # dropped still raises KeyError
+                if pos > 0 and steps[pos - 1][0] == 'select' and all(
+                    c in steps[pos - 1][1] for c in arg
+                ):
+                    steps[pos - 1] = ('select', list(arg))
+                else:
+                    steps.insert(pos, ('select', list(arg)))
+            elif op in ('sort', 'aggregate'):
+                # A sort is pointless if the next ordering-relevant step
+                # re-sorts the rows, or groups them with aggregates that
+                # do not care about their order
+                redundant = op == 'sort' or order_insensitive(arg[1])
+                for i in range(len(steps) - 1, -1, -1):
+                    if steps[i][0] in self.STREAMABLE:
+                        continue
+                    if steps[i][0] == 'sort' and redundant:
+                        del steps[i]
+                    break
+                steps.append((op, arg))
+            elif op == 'limit':
+                # Limits commute with projections, so look past them for
+                # a sort (or an earlier limit) to fold into
+                pos = len(steps)
+                while pos > 0 and steps[pos - 1][0] == 'select':
+                    pos -= 1
+                prev_op, prev_arg = steps[pos - 1] if pos else (None, None)
+                if prev_op == 'sort':
+                    steps[pos - 1] = ('topn', (*prev_arg, arg))
+                elif prev_op == 'topn':
+                    column, ascending, n = prev_arg
+                    steps[pos - 1] = ('topn', (column, ascending,
+                                               min(n, arg)))
+                elif prev_op == 'limit':
+                    steps[pos - 1] = ('limit', min(prev_arg, arg))
+                else:
+                    steps.insert(pos, ('limit', arg))
+            else:
+                steps.append((op, arg))
+        return steps
+
+    def required_columns(self):
+        """Return the source columns the plan needs, or None for all"""
+        needed = None
+        for op, arg in reversed(self.optimize()):
+            if op == 'select':
+                needed = set(arg)
+            elif op == 'aggregate':
+                group_by, agg_dict = arg
+                # A function name or list applies to every column
+                needed = (set(as_list(group_by)) | set(agg_dict)
+                          if isinstance(agg_dict, dict) else None)
+            elif needed is not None and op == 'filter':
+                needed.update(referenced_columns(arg, self.columns))
+            elif needed is not None and op in ('sort', 'topn'):
+                needed.update(as_list(arg[0]))
+
+        if needed is None or set(self.columns) <= needed:
+            return None
+        # Unknown names are left for the step itself to report
+        return [c for c in self.columns if c in needed]
+
+    def split(self):
+        """Split optimized steps into a streamable prefix and the rest"""
+        steps = self.optimize()
+        for i, (op, _) in enumerate(steps):
+            if op not in self.STREAMABLE:
+                return steps[:i], steps[i:]
+        return steps, []
+
+    def explain(self, source):
+        """Describe the optimized plan"""
+        usecols = self.required_columns()
+        scan = ', '.join(usecols) if usecols is not None else 'all'
+        lines = [
+            "== Optimized Plan ==",
+            f"Scan: {source} (columns: {scan})",
+        ]
+        for op, arg in self.optimize():
+            if op == 'filter':
+                lines.append(f"Filter: {arg}")
+            elif op == 'select':
+                lines.append(f"Select: {', '.join(arg)}")
+            elif op in ('sort', 'topn'):
+                column, ascending = arg[:2]
+                keys = as_list(column)
+                orders = as_list(ascending)
+                if len(orders) == 1:
+                    orders = orders * len(keys)
+                label = "Sort: " if op == 'sort' else f"Top {arg[2]} by "
+                lines.append(label + ', '.join(
+                    f"{key} ({'ascending' if asc else 'descending'})"
+                    for key, asc in zip(keys, orders)
+                ))
+            elif op == 'limit':
+                lines.append(f"Limit: {arg}")
+            elif op == 'aggregate':
+                group_by, agg_dict = arg
+                lines.append(f"Aggregate: by {group_by} {agg_dict}")
+        return '\n'.join(lines)
+
+    @staticmethod
+    def apply(df, steps):
+        """Run ``steps`` against a DataFrame and return the result"""
+        for op, arg in steps:
+            if op == 'filter':
+                df = query(df, arg)
+            elif op == 'select':
+                df = df[arg]
+            elif op == 'sort':
+                column, ascending = arg
+                df = df.sort_values(by=column, ascending=ascending)
+            elif op == 'topn':
+                column, ascending, n = arg
+                df = top_n(df, column, n, ascending=ascending)
+            elif op == 'limit':
+                df = df.head(arg)
+            elif op == 'aggregate':
+                group_by, agg_dict = arg
+                df = df.groupby(
+                    group_by, observed=True
+                ).agg(agg_dict).reset_index()
+        return df
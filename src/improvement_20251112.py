@@ -19,16 +19,3 @@ class ImprovedClass:
 if __name__ == "__main__":
     obj = ImprovedClass()
     obj.improved_method()
-
-
-# Correct test coverage in main module - 2025-11-28 17:10:03
-def handle_error(error):
-    """Handle error gracefully"""
-    logger.error(f'Error: {error}')
-    return None
-
-# Correct API endpoint issue - 2025-12-22 00:01:42
-# Added validation to prevent edge case
-if not input_value:
-    return default_value
-return process(input_value)
\ No newline at end of file
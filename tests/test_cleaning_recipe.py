@@ -0,0 +1,86 @@
+"""Tests for fused cleaning recipes"""
+
+import numpy as np
+import pandas as pd
+
+from cleaning_recipe import Recipe
+from data_cleaner import DataCleaner
+from incremental import clean_incremental
+from validation import Validator
+
+
+RULES = {'rules': [
+    {'type': 'range', 'column': 'Age', 'min': 0, 'max': 120},
+    {'type': 'unique', 'column': 'id'},
+]}
+
+
+def write_input(tmp_path, rows=3000, seed=0):
+    """A CSV with rule violations, repeated rows, gaps and outliers"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'id': rng.integers(0, 2500, rows),
+        'Age': rng.integers(-5, 130, rows).astype(float),
+        'v': rng.normal(0, 1, rows),
+        'g': rng.choice(['a', 'b'], rows),
+    })
+    df.loc[rng.random(rows) < 0.1, 'v'] = np.nan
+    df.loc[rng.random(rows) < 0.01, 'v'] = 50.0
+    df = pd.concat([df, df.iloc[:200]], ignore_index=True)
+    path = tmp_path / 'in.csv'
+    df.to_csv(path, index=False)
+    return path
+
+
+def test_recipe_matches_in_memory_cleaner(tmp_path):
+    source = write_input(tmp_path)
+    recipe = Recipe.from_spec([
+        {'step': 'validate', 'rules': RULES,
+         'quarantine': str(tmp_path / 'q_stream.csv')},
+        'remove_duplicates',
+        {'step': 'fill_missing_values', 'method': 'mean'},
+        {'step': 'remove_outliers', 'method': 'zscore'},
+        'standardize_columns',
+    ], chunksize=400)
+    recipe.run(str(source), str(tmp_path / 'stream.csv'))
+
+    cleaner = DataCleaner(str(source), workers=1)
+    cleaner.validate(Validator.from_spec(RULES),
+                     str(tmp_path / 'q_memory.csv'))
+    cleaner.remove_duplicates()
+    cleaner.fill_missing_values('mean')
+    cleaner.remove_outliers()
+    cleaner.standardize_columns()
+    cleaner.save(str(tmp_path / 'memory.csv'))
+
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'stream.csv'),
+                                  pd.read_csv(tmp_path / 'memory.csv'))
+    assert ((tmp_path / 'q_stream.csv').read_text()
+            == (tmp_path / 'q_memory.csv').read_text())
+    assert recipe.steps[0].validator.quarantined > 0
+
+
+def test_incremental_validation_appends_quarantine(tmp_path):
+    source = write_input(tmp_path, seed=1)
+    lines = source.read_text().splitlines(keepends=True)
+    source.write_text(''.join(lines[:1500]))
+
+    def run(output, quarantine, state):
+        recipe = Recipe.from_spec([
+            {'step': 'validate', 'rules': RULES,
+             'quarantine': str(tmp_path / quarantine)},
+            'remove_duplicates',
+        ], chunksize=300)
+        clean_incremental(str(source), str(tmp_path / output), recipe,
+                          str(tmp_path / state))
+
+    run('out.csv', 'q.csv', 'state')
+    with open(source, 'a') as f:
+        f.write(''.join(lines[1500:]))
+    run('out.csv', 'q.csv', 'state')
+    run('full.csv', 'q_full.csv', 'state_full')
+
+    assert ((tmp_path / 'out.csv').read_text()
+            == (tmp_path / 'full.csv').read_text())
+    assert ((tmp_path / 'q.csv').read_text()
+            == (tmp_path / 'q_full.csv').read_text())
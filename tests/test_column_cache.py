@@ -0,0 +1,66 @@
+"""Tests for the memory-mapped column cache"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from column_cache import ColumnCache
+
+
+def cached(tmp_path, df):
+    """Store ``df`` as the cache entry of a CSV and load it back"""
+    source = tmp_path / 'd.csv'
+    df.to_csv(source, index=False)
+    cache = ColumnCache(tmp_path / 'cache')
+    entry = cache.store(source, df)
+    return cache.load(source), entry
+
+
+def test_round_trip_keeps_values(tmp_path):
+    df = pd.DataFrame({
+        's': ['b', None, 'a\x00', 'é', 'x' * 10000] * 4,
+        'n': range(20),
+        'f': np.linspace(0, 1, 20),
+        'k': pd.Categorical([3, 1, 2, 1, 3] * 4),
+        't': pd.date_range('2026-01-01', periods=20, tz='UTC'),
+    })
+
+    result, _ = cached(tmp_path, df)
+
+    text = result['s'].astype(object)
+    assert text.isna().tolist() == df['s'].isna().tolist()
+    assert text.dropna().tolist() == df['s'].dropna().tolist()
+    # copy() turns the memory maps into plain arrays for the comparison
+    pd.testing.assert_frame_equal(result[['n', 'f', 'k', 't']].copy(),
+                                  df[['n', 'f', 'k', 't']],
+                                  check_index_type=False)
+
+
+def test_strings_load_as_mapped_codes(tmp_path):
+    values = [f"v{i}" for i in range(5000)]
+    values[7] = 'y' * 4000
+    df = pd.DataFrame({'h': values})
+
+    result, entry = cached(tmp_path, df)
+
+    base = result['h'].array.codes
+    while base is not None and not isinstance(base, np.memmap):
+        base = base.base
+    assert base is not None
+    assert result['h'].tolist() == values
+    # One long value costs its own bytes, not a fixed width per value
+    assert sum(os.path.getsize(f) for f in entry.iterdir()) < 100000
+    assert not any(f.suffix == '.pkl' for f in entry.iterdir())
+
+
+def test_unmappable_column_is_not_cached(tmp_path):
+    df = pd.DataFrame({'b': pd.Series([True, None, False], dtype=object)})
+    source = tmp_path / 'd.csv'
+    df.to_csv(source, index=False)
+    cache = ColumnCache(tmp_path / 'cache')
+
+    result = cache.read_csv(source)
+
+    assert result['b'].tolist() == pd.read_csv(source)['b'].tolist()
+    assert cache.entries() == []
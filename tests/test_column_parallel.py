@@ -0,0 +1,59 @@
+"""Tests for column-parallel cleaning over shared memory"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import column_parallel
+import missing_values
+import outliers
+
+
+def make_frame(rows=800, columns=9, seed=0):
+    """A wide float table with gaps and outliers, plus other dtypes"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(0, 1, (rows, columns)),
+                      columns=[f"c{j}" for j in range(columns)])
+    df = df.mask(rng.random(df.shape) < 0.1)
+    df.iloc[rng.integers(0, rows, 20), rng.integers(0, columns, 20)] = 25.0
+    df['n'] = pd.array(rng.integers(0, 9, rows), dtype='Int64')
+    df.loc[rng.random(rows) < 0.1, 'n'] = pd.NA
+    df['s'] = rng.choice(['a', 'b', None], rows)
+    return df
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+@pytest.mark.parametrize('method', ['mean', 'median', 'zero', 'p90'])
+def test_fill_matches_single_process(method, workers):
+    df = make_frame()
+    expected = df.copy()
+    values = missing_values.fill_values(expected, method)
+    expected_filled = missing_values.fill_frame(expected, values)
+
+    filled = column_parallel.fill_missing(df, method, workers)
+
+    pd.testing.assert_frame_equal(df, expected)
+    assert sorted(filled) == sorted(expected_filled)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+@pytest.mark.parametrize('method', ['zscore', 'iqr', 'mad'])
+def test_outliers_match_single_process(method, workers):
+    df = make_frame(seed=1)
+    bounds = outliers.outlier_bounds(df, None, method, None)
+    expected = outliers.outlier_mask(df, bounds).to_numpy()
+
+    mask = column_parallel.outlier_mask(df, method=method, workers=workers)
+
+    assert mask.tolist() == expected.tolist()
+    assert mask.any()
+
+
+def test_shared_block_is_released():
+    df = make_frame(rows=10, columns=2)
+    block = column_parallel.SharedBlock(df, ['c0', 'c1'])
+    name = block.shm.name
+    block.close()
+
+    with pytest.raises(FileNotFoundError):
+        column_parallel.shared_memory.SharedMemory(name=name)
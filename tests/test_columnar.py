@@ -0,0 +1,91 @@
+"""Tests for Parquet, Feather and Arrow IPC conversion"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+import pyarrow.parquet as pq  # noqa: E402
+
+import columnar  # noqa: E402
+import format_converter  # noqa: E402
+
+
+def write_csv(tmp_path, rows=1000, seed=0):
+    """Sorted ids, text, and a column whose gaps start late in the file"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'id': np.arange(rows),
+        'x': rng.normal(0, 1, rows).round(6),
+        'n': rng.integers(0, 100, rows).astype(float),
+        'name': rng.choice(['a', 'b', 'c'], rows),
+        'flag': rng.random(rows) < 0.5,
+    })
+    # Integral until row 900, so early chunks parse 'n' as int64
+    df.loc[900::7, 'n'] = np.nan
+    path = tmp_path / 'in.csv'
+    df.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize('suffix', ['.parquet', '.feather', '.arrow'])
+def test_csv_round_trip(tmp_path, suffix):
+    source = write_csv(tmp_path)
+    middle = tmp_path / ('mid' + suffix)
+
+    format_converter.stream_convert(source, middle, chunksize=128)
+    format_converter.stream_convert(middle, tmp_path / 'out.csv',
+                                    chunksize=300)
+
+    expected = pd.read_csv(source)
+    if suffix == '.parquet':
+        stored = pd.read_parquet(middle)
+    else:
+        stored = pd.read_feather(middle)
+    pd.testing.assert_frame_equal(stored, expected, check_dtype=False)
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'out.csv'),
+                                  expected)
+
+
+@pytest.mark.parametrize('suffix', ['.parquet', '.arrow'])
+def test_projection_and_filter(tmp_path, suffix):
+    source = write_csv(tmp_path, seed=1)
+    middle = tmp_path / ('mid' + suffix)
+    format_converter.stream_convert(source, middle, chunksize=1000,
+                                    row_group_size=100)
+    condition = 'id >= 850 and name != "a"'
+
+    for chunksize in (0, 64):
+        output = tmp_path / f"out{chunksize}.csv"
+        assert format_converter.convert_file(
+            middle, output, chunksize=chunksize, usecols=['name', 'x'],
+            condition=condition
+        )
+        expected = pd.read_csv(source).query(condition)[['name', 'x']]
+        pd.testing.assert_frame_equal(pd.read_csv(output),
+                                      expected.reset_index(drop=True))
+
+
+def test_parquet_row_groups_are_pruned(tmp_path):
+    source = write_csv(tmp_path, seed=2)
+    middle = tmp_path / 'mid.parquet'
+    format_converter.stream_convert(source, middle, chunksize=1000,
+                                    row_group_size=100,
+                                    compression='gzip')
+
+    metadata = pq.ParquetFile(middle).metadata
+    assert metadata.num_row_groups == 10
+    assert metadata.row_group(0).column(0).compression == 'GZIP'
+    chunks = list(columnar.read_chunks(middle, 1000, ['id'], 'id > 649'))
+    # Only the groups holding ids 600-999 are read
+    assert sum(len(chunk) for chunk in chunks) == 400
+
+
+def test_empty_input_keeps_columns(tmp_path):
+    source = tmp_path / 'in.csv'
+    source.write_text('a,b\n')
+
+    for suffix in ('.parquet', '.feather'):
+        middle = tmp_path / ('mid' + suffix)
+        format_converter.stream_convert(source, middle)
+        assert list(columnar.read_frame(middle).columns) == ['a', 'b']
@@ -0,0 +1,115 @@
+"""Tests for block-parallel compressed output"""
+
+import bz2
+import gzip
+import lzma
+import zlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import compressed_io
+import format_converter
+
+OPENERS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+
+
+def make_text(lines=3000, seed=0):
+    """CSV-like text with some unicode, several blocks long"""
+    rng = np.random.default_rng(seed)
+    words = rng.choice(['alpha', 'beta', 'gamma', 'déjà', '∑'], lines)
+    numbers = rng.integers(0, 10 ** 6, lines)
+    return ''.join(f"{i},{word},{number}\n"
+                   for i, (word, number) in enumerate(zip(words, numbers)))
+
+
+def gzip_members(path):
+    """Number of concatenated gzip members in a file"""
+    data = path.read_bytes()
+    members = 0
+    while data:
+        decompressor = zlib.decompressobj(wbits=31)
+        decompressor.decompress(data)
+        data = decompressor.unused_data
+        members += 1
+    return members
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    """Blocks of 1000 bytes, so short texts span many members"""
+    monkeypatch.setattr(compressed_io, 'BLOCK_SIZE', 1000)
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+@pytest.mark.parametrize('suffix', ['.gz', '.bz2', '.xz'])
+def test_blocks_decompress_to_the_text(tmp_path, small_blocks, suffix,
+                                       workers):
+    text = make_text()
+    path = tmp_path / ('out.csv' + suffix)
+
+    with compressed_io.open_write(path, workers=workers) as f:
+        # Writes of varied sizes straddle the block boundaries
+        for start in range(0, len(text), 777):
+            f.write(text[start:start + 777])
+
+    with OPENERS[suffix](path, 'rt', encoding='utf-8', newline='') as f:
+        assert f.read() == text
+    with compressed_io.open_read(path, encoding='utf-8') as f:
+        assert f.read() == text
+    if suffix == '.gz':
+        size = len(text.encode('utf-8'))
+        assert gzip_members(path) == -(-size // 1000)
+
+
+@pytest.mark.parametrize('suffix', ['.gz', '.bz2'])
+def test_append_adds_members(tmp_path, small_blocks, suffix):
+    first, second = make_text(500), make_text(700, seed=1)
+    path = tmp_path / ('out.csv' + suffix)
+
+    with compressed_io.open_write(path, workers=2) as f:
+        f.write(first)
+    with compressed_io.open_write(path, append=True, workers=2) as f:
+        f.write(second)
+
+    with OPENERS[suffix](path, 'rt', encoding='utf-8', newline='') as f:
+        assert f.read() == first + second
+
+
+def test_output_is_the_same_for_any_worker_count(tmp_path, small_blocks):
+    text = make_text()
+    outputs = []
+    for workers in (1, 2, 4):
+        path = tmp_path / f"out{workers}.csv.gz"
+        with compressed_io.open_write(path, workers=workers) as f:
+            f.write(text)
+        outputs.append(path.read_bytes())
+
+    assert outputs[0] == outputs[1] == outputs[2]
+
+
+@pytest.mark.parametrize('suffix', ['.gz', '.bz2'])
+def test_converted_csv_matches_pandas(tmp_path, small_blocks, suffix):
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({'id': np.arange(2000),
+                       'x': rng.normal(0, 1, 2000).round(5),
+                       'name': rng.choice(['a', 'b', 'ü'], 2000)})
+    source = tmp_path / 'in.json'
+    df.to_json(source, orient='records')
+    path = tmp_path / ('out.csv' + suffix)
+
+    assert format_converter.convert_file(source, path, workers=2,
+                                         chunksize=300)
+
+    pd.testing.assert_frame_equal(pd.read_csv(path), df)
+
+
+def test_codec_detected_from_magic(tmp_path):
+    for suffix, codec in (('.gz', 'gzip'), ('.bz2', 'bz2'), ('.xz', 'xz')):
+        path = tmp_path / ('out.csv' + suffix)
+        with compressed_io.open_write(path) as f:
+            f.write('a\n1\n')
+        renamed = path.rename(tmp_path / f"{codec}.data")
+        assert compressed_io.detect(renamed) == codec
+        assert compressed_io.detect(renamed, magic=False) is None
@@ -0,0 +1,64 @@
+"""Tests for the schema sidecar and its opt-in candidates"""
+
+import os
+
+import pandas as pd
+
+import csv_schema
+import parallel_reader
+
+
+def write_csv(tmp_path):
+    """A file with a category candidate, a date column and numbers"""
+    path = tmp_path / 'd.csv'
+    pd.DataFrame({
+        'g': ['b', 'a', 'c', 'a'] * 50,
+        'ts': ['2026-05-01', '2026-06-01', '2026-06-02', '2026-07-01'] * 50,
+        'n': range(200),
+        'x': [0.5, None, 1.5, 2.0] * 50,
+    }).to_csv(path, index=False)
+    return path
+
+
+def test_reads_do_not_write_a_sidecar(tmp_path):
+    path = write_csv(tmp_path)
+
+    csv_schema.read_csv(path)
+    csv_schema.read_csv(path, parse_dates=True, categories=True)
+    parallel_reader.read_csv(path, workers=2, min_bytes=0,
+                             parse_dates=True)
+
+    assert os.listdir(tmp_path) == ['d.csv']
+
+
+def test_sidecar_read_equals_plain_read(tmp_path):
+    path = write_csv(tmp_path)
+    cold = pd.read_csv(path)
+
+    csv_schema.save_schema(path, csv_schema.infer_schema(path))
+
+    pd.testing.assert_frame_equal(csv_schema.read_csv(path), cold)
+    chunks = csv_schema.read_csv(path, chunksize=30)
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True),
+                                  cold)
+
+
+def test_candidates_on_request(tmp_path):
+    path = write_csv(tmp_path)
+
+    df = csv_schema.read_csv(path, parse_dates=True, categories=True)
+
+    assert isinstance(df['g'].dtype, pd.CategoricalDtype)
+    assert df['g'].cat.categories.tolist() == ['a', 'b', 'c']
+    assert pd.api.types.is_datetime64_any_dtype(df['ts'])
+    assert df['n'].dtype == 'int64'
+
+    # Chunks share one set of categories, with or without a sidecar
+    for sidecar in (False, True):
+        if sidecar:
+            csv_schema.save_schema(path, csv_schema.infer_schema(path))
+        chunks = list(csv_schema.read_csv(path, chunksize=30,
+                                          parse_dates=True,
+                                          categories=True))
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True),
+                                      df)
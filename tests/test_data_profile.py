@@ -0,0 +1,110 @@
+"""Tests for the one-pass data profile and its HyperLogLog sketch"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_profile
+from data_profile import DataProfile, HyperLogLog
+
+
+# Three standard errors of a precision-14 sketch
+HLL_BOUND = 3 * 1.04 / np.sqrt(2 ** data_profile.HLL_PRECISION)
+
+
+@pytest.mark.parametrize('distinct', [10, 1000, 30000, 300000])
+def test_hll_estimate_within_error_bound(distinct):
+    values = pd.Series(np.arange(distinct) * 7919)
+    sketch = HyperLogLog()
+    # Every value twice, so repeats must not count
+    sketch.add(data_profile.value_hashes(values))
+    sketch.add(data_profile.value_hashes(values[::-1]))
+
+    error = abs(sketch.estimate() - distinct) / distinct
+
+    assert error <= HLL_BOUND
+
+
+def test_hll_merge_counts_the_union():
+    left, right, whole = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    a = data_profile.value_hashes(pd.Series(np.arange(0, 60000)))
+    b = data_profile.value_hashes(pd.Series(np.arange(40000, 100000)))
+    left.add(a)
+    right.add(b)
+    whole.add(np.concatenate([a, b]))
+
+    left.merge(right)
+
+    assert np.array_equal(left.registers, whole.registers)
+    assert abs(left.estimate() - 100000) / 100000 <= HLL_BOUND
+
+
+def make_frame(rows=5000, seed=0):
+    """Numbers, text and dates with gaps and repeated rows"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'n': rng.integers(0, 500, rows),
+        'x': rng.normal(0, 1, rows).round(1),
+        'g': rng.choice(['a', 'b', 'c', 'd'], rows),
+        't': pd.Timestamp('2026-01-01') + pd.to_timedelta(
+            rng.integers(0, 100, rows), unit='D'),
+    })
+    df.loc[rng.random(rows) < 0.1, 'x'] = np.nan
+    df.loc[rng.random(rows) < 0.1, 'g'] = None
+    return df
+
+
+def assert_matches_pandas(profile, df):
+    """Exact statistics equal pandas'; distinct counts within the bound"""
+    summary = profile.summary()
+    assert profile.rows == len(df)
+    assert profile.duplicates() == int(df.duplicated().sum())
+    for column in df.columns:
+        row = summary.loc[column]
+        assert row['nulls'] == df[column].isna().sum()
+        distinct = df[column].nunique()
+        assert abs(row['distinct'] - distinct) <= max(1, HLL_BOUND
+                                                      * distinct)
+        if column != 'g':
+            assert row['min'] == df[column].min()
+            assert row['max'] == df[column].max()
+        if column in ('n', 'x'):
+            assert row['mean'] == pytest.approx(df[column].mean())
+
+
+def test_chunked_profile_matches_pandas():
+    df = make_frame()
+    profile = DataProfile()
+    for start in range(0, len(df), 700):
+        profile.update(df.iloc[start:start + 700])
+
+    assert_matches_pandas(profile, df)
+
+
+def test_incremental_update_matches_fresh_profile():
+    df = make_frame(seed=1)
+    profile = data_profile.profile_frame(df)
+
+    duplicated = df.duplicated()
+    profile.remove(df[duplicated], duplicates=True)
+    df = df[~duplicated]
+    assert_matches_pandas(profile.refresh(df), df)
+
+    dropped = df['x'].isna()
+    profile.remove(df[dropped])
+    df = df[~dropped]
+    assert_matches_pandas(profile.refresh(df), df)
+
+    df = df.assign(n=df['n'].clip(upper=100))
+    profile.invalidate(['n'])
+    assert_matches_pandas(profile.refresh(df), df)
+
+
+def test_profile_csv_matches_pandas(tmp_path):
+    df = make_frame(seed=2).drop(columns='t')
+    path = tmp_path / 'd.csv'
+    df.to_csv(path, index=False)
+
+    profile = data_profile.profile_csv(path, chunksize=600)
+
+    assert_matches_pandas(profile, pd.read_csv(path))
@@ -0,0 +1,75 @@
+"""Tests for hash-based duplicate removal"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dedup
+
+
+def make_frame(rows=4000, seed=0):
+    """Rows with many repeats, gaps and a mostly-integral float column"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'k': rng.integers(0, 40, rows),
+        'g': rng.choice(['a', 'b', 'c'], rows),
+        'x': rng.integers(0, 5, rows).astype(float),
+    })
+    df.loc[rng.random(rows) < 0.05, 'x'] = np.nan
+    df.loc[rng.random(rows) < 0.05, 'g'] = None
+    return df
+
+
+def chunks(df, rows):
+    """``df`` in pieces of ``rows`` rows, re-readable like a CSV"""
+    return lambda: (df.iloc[i:i + rows] for i in range(0, len(df), rows))
+
+
+@pytest.mark.parametrize('bits', [64, 128])
+@pytest.mark.parametrize('subset', [None, ['k', 'g']])
+def test_spilled_partitions_match_drop_duplicates(bits, subset):
+    df = make_frame()
+    deduper = dedup.HashDeduper(subset, bits, memory_limit_mb=0.001)
+
+    result = pd.concat(list(deduper.dedup_chunks(chunks(df, 300))))
+
+    assert deduper.spilled
+    expected = df.drop_duplicates(subset)
+    pd.testing.assert_frame_equal(result, expected)
+    assert deduper.removed == len(df) - len(expected)
+
+
+def test_in_memory_matches_drop_duplicates():
+    df = make_frame(seed=1)
+    deduper = dedup.HashDeduper(memory_limit_mb=256)
+
+    result = pd.concat(list(deduper.dedup_chunks(chunks(df, 300))))
+
+    assert not deduper.spilled
+    pd.testing.assert_frame_equal(result, df.drop_duplicates())
+
+
+def test_int_and_float_chunks_hash_alike():
+    ints = pd.DataFrame({'k': [1, 2, 3]})
+    floats = pd.DataFrame({'k': [3.0, 2.0, np.nan, 4.5]})
+
+    deduper = dedup.HashDeduper()
+    kept = [chunk['k'].tolist()
+            for chunk in deduper.dedup_chunks(lambda: iter([ints, floats]))]
+
+    assert kept[0] == [1, 2, 3]
+    assert kept[1][1:] == [4.5] and np.isnan(kept[1][0])
+
+
+def test_dedup_csv_matches_drop_duplicates(tmp_path):
+    df = make_frame(seed=2)
+    source = tmp_path / 'in.csv'
+    df.to_csv(source, index=False)
+
+    rows, removed = dedup.dedup_csv(source, tmp_path / 'out.csv',
+                                    chunksize=250, memory_limit_mb=0.001)
+
+    expected = pd.read_csv(source).drop_duplicates()
+    result = pd.read_csv(tmp_path / 'out.csv')
+    pd.testing.assert_frame_equal(result, expected.reset_index(drop=True))
+    assert (rows, removed) == (len(df), len(df) - len(expected))
@@ -0,0 +1,105 @@
+"""Tests for streaming .xlsx reads and writes"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import Workbook, load_workbook
+
+import excel_stream
+import format_converter
+
+
+def make_frame(rows=300, seed=0):
+    """Numbers, text and gaps"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'id': np.arange(rows),
+        'x': rng.normal(0, 1, rows).round(4),
+        'name': rng.choice(['a', 'b', 'ç'], rows),
+    })
+    df.loc[rng.random(rows) < 0.1, 'x'] = np.nan
+    df.loc[rng.random(rows) < 0.1, 'name'] = None
+    return df
+
+
+def write_rows(path, rows):
+    """A one-sheet workbook with ``rows`` as they are"""
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    workbook.save(path)
+
+
+def test_round_trip_matches_read_excel(tmp_path):
+    df = make_frame()
+    path = tmp_path / 'out.xlsx'
+
+    with excel_stream.ExcelWriter(path) as writer:
+        for start in range(0, len(df), 70):
+            writer.write(df.iloc[start:start + 70])
+
+    expected = pd.read_excel(path)
+    pd.testing.assert_frame_equal(expected, df, check_dtype=False)
+    chunks = list(excel_stream.read_chunks(path, chunksize=40))
+    assert max(len(chunk) for chunk in chunks) == 40
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True),
+                                  expected, check_dtype=False)
+
+
+def test_header_names_match_pandas(tmp_path):
+    path = tmp_path / 'in.xlsx'
+    write_rows(path, [['a', None, 'a', 'b', 'a'], [1, 2, 3, 4, 5]])
+
+    df = excel_stream.read_excel(path)
+
+    assert list(df.columns) == list(pd.read_excel(path).columns)
+
+
+def test_wider_later_row(tmp_path, capsys):
+    path = tmp_path / 'in.xlsx'
+    write_rows(path, [['a', 'b'], [1, 2], [3, 4], [None, None],
+                      [5, 6, 7], [8, 9]])
+
+    whole = excel_stream.read_excel(path)
+    chunks = list(excel_stream.read_chunks(path, chunksize=2))
+
+    pd.testing.assert_frame_equal(whole, pd.read_excel(path),
+                                  check_dtype=False)
+    streamed = pd.concat(chunks, ignore_index=True)
+    assert list(streamed.columns) == ['a', 'b']
+    pd.testing.assert_frame_equal(streamed, whole[['a', 'b']],
+                                  check_dtype=False)
+    assert 'Row 5 has cells past column 2' in capsys.readouterr().out
+
+
+def test_full_sheet_continues_on_the_next(tmp_path, monkeypatch):
+    monkeypatch.setattr(excel_stream, 'MAX_ROWS', 50)
+    df = make_frame(rows=120)
+    path = tmp_path / 'out.xlsx'
+
+    with excel_stream.ExcelWriter(path) as writer:
+        writer.write(df)
+
+    assert load_workbook(path).sheetnames == ['Sheet1', 'Sheet1 (2)',
+                                              'Sheet1 (3)']
+    sheets = pd.read_excel(path, sheet_name=None)
+    pd.testing.assert_frame_equal(
+        pd.concat(sheets.values(), ignore_index=True), df,
+        check_dtype=False
+    )
+
+
+@pytest.mark.parametrize('chunksize', [0, 45])
+def test_csv_round_trip(tmp_path, chunksize):
+    df = make_frame(seed=1)
+    df.to_csv(tmp_path / 'in.csv', index=False)
+
+    assert format_converter.convert_file(tmp_path / 'in.csv',
+                                         tmp_path / 'mid.xlsx',
+                                         chunksize=chunksize)
+    assert format_converter.convert_file(tmp_path / 'mid.xlsx',
+                                         tmp_path / 'out.csv',
+                                         chunksize=chunksize)
+
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'out.csv'),
+                                  pd.read_csv(tmp_path / 'in.csv'))
@@ -0,0 +1,25 @@
+"""Tests for incremental cleaning"""
+
+from cleaning_recipe import Recipe
+from incremental import clean_incremental
+
+
+def clean(tmp_path):
+    """One incremental dedup run over in.csv; returns the output text"""
+    recipe = Recipe.from_spec(['remove_duplicates'])
+    clean_incremental(str(tmp_path / 'in.csv'), str(tmp_path / 'out.csv'),
+                      recipe, str(tmp_path / 'state'))
+    return (tmp_path / 'out.csv').read_text()
+
+
+def test_last_line_without_newline(tmp_path):
+    source = tmp_path / 'in.csv'
+    source.write_text('a,b\n1,x\n2,y\n1,x\n3,z')
+
+    assert clean(tmp_path) == 'a,b\n1,x\n2,y\n3,z\n'
+    assert clean(tmp_path) == 'a,b\n1,x\n2,y\n3,z\n'
+
+    # The unterminated line was still being written
+    with open(source, 'a') as f:
+        f.write('3\n3,z\n')
+    assert clean(tmp_path) == 'a,b\n1,x\n2,y\n3,z3\n3,z\n'
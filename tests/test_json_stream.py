@@ -0,0 +1,96 @@
+"""Tests for streaming JSON and JSON Lines"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import format_converter
+import json_stream
+
+
+def make_frame(rows=500, seed=0):
+    """Numbers, text with escapes and unicode, gaps and booleans"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'id': np.arange(rows),
+        'x': rng.normal(0, 1e6, rows).round(3),
+        'name': rng.choice(['plain', 'quo"te', 'back\\slash', 'naïve',
+                            'line\nbreak', '[{,}]'], rows),
+        'flag': rng.random(rows) < 0.5,
+    })
+    df.loc[rng.random(rows) < 0.1, 'x'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('lines', [False, True])
+def test_writer_matches_to_json(tmp_path, lines):
+    df = make_frame()
+    path = tmp_path / ('out.jsonl' if lines else 'out.json')
+
+    with json_stream.JSONWriter(path, lines) as writer:
+        for start in range(0, len(df), 64):
+            writer.write(df.iloc[start:start + 64])
+
+    if lines:
+        expected = df.to_json(orient='records', lines=True)
+    else:
+        expected = df.to_json(orient='records', indent=2)
+    assert path.read_text() == expected
+
+
+def test_array_parsed_across_block_boundaries(tmp_path):
+    records = [{'a': i, 'b': 'x' * (i % 13) + '"\\u00e9',
+                'c': [1.5e10, None], 'd': {'e': True}} for i in range(200)]
+    path = tmp_path / 'in.json'
+    path.write_text(json.dumps(records, indent=1))
+
+    for block in (1, 7, 64, 1 << 20):
+        assert list(json_stream.iter_array(path, block)) == records
+
+
+@pytest.mark.parametrize('suffix', ['.json', '.jsonl', '.json.gz'])
+def test_csv_round_trip(tmp_path, suffix):
+    df = make_frame(seed=1)
+    source = tmp_path / 'in.csv'
+    df.to_csv(source, index=False)
+    middle = tmp_path / ('mid' + suffix)
+
+    format_converter.stream_convert(source, middle, chunksize=70)
+    format_converter.stream_convert(middle, tmp_path / 'out.csv',
+                                    chunksize=90)
+
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'out.csv'),
+                                  pd.read_csv(source))
+    lines = suffix == '.jsonl'
+    expected = pd.read_csv(source)
+    pd.testing.assert_frame_equal(
+        json_stream.read_json(middle, chunksize=50),
+        pd.read_json(middle, lines=lines, orient='records',
+                     dtype=dict(expected.dtypes))
+    )
+
+
+def test_later_keys_are_collected(tmp_path):
+    path = tmp_path / 'in.jsonl'
+    records = [{'a': i} for i in range(10)] + [{'a': 10, 'b': 'new'}]
+    # A BOM and blank lines are skipped
+    text = '\n\n'.join(map(json.dumps, records))
+    path.write_text('\ufeff' + text + '\n')
+
+    with pytest.raises(json_stream.NewColumns):
+        list(json_stream.read_chunks(path, chunksize=4))
+    df = json_stream.read_json(path, chunksize=4)
+
+    # Chunks without 'b' hold it as object, so compare values only
+    pd.testing.assert_frame_equal(df, pd.DataFrame.from_records(records),
+                                  check_dtype=False)
+
+
+def test_bad_line_is_reported(tmp_path):
+    path = tmp_path / 'in.jsonl'
+    path.write_text('{"a": 1}\n{"a": 2}\n{"a": \n')
+
+    with pytest.raises(ValueError, match='line 3'):
+        json_stream.read_json(path)
@@ -0,0 +1,98 @@
+"""Tests for MinHash/LSH near-duplicate removal"""
+
+import numpy as np
+import pandas as pd
+
+import near_dedup
+
+
+WORDS = ('alpha bravo charlie delta echo foxtrot golf hotel india juliet '
+         'kilo lima').split()
+
+
+def jaccard(a, b):
+    """Exact Jaccard similarity of two texts' shingle sets"""
+    def grams(text):
+        text = text.ljust(near_dedup.SHINGLE_SIZE)
+        return {text[i:i + near_dedup.SHINGLE_SIZE]
+                for i in range(len(text) - near_dedup.SHINGLE_SIZE + 1)}
+    a, b = grams(a), grams(b)
+    return len(a & b) / len(a | b)
+
+
+def test_similarity_does_not_chain_through_dropped_rows():
+    # Each row swaps one more word than the one before it
+    substitutes = ('mike november oscar papa quebec romeo sierra tango '
+                   'uniform').split()
+    words, texts = list(WORDS), []
+    for i in range(9):
+        texts.append(' '.join(words))
+        words[i] = substitutes[i]
+    threshold = 0.7
+
+    dropped = near_dedup.near_duplicated(pd.DataFrame({'t': texts}),
+                                         threshold=threshold, workers=1)
+
+    assert not dropped[0]
+    kept = []
+    for i, text in enumerate(texts):
+        best = max((jaccard(texts[k], text) for k in kept), default=0.0)
+        if dropped[i]:
+            # MinHash with 64 permutations errs by about 0.06
+            assert best >= threshold - 0.15
+        else:
+            assert best < threshold + 0.15
+            kept.append(i)
+    # Rows far from row 0 are kept, not linked to it through the chain
+    assert len(kept) > 1
+
+
+def test_every_bucket_member_is_verified():
+    # Rows 0-3 share band 0, and 1 and 3 match on one more column
+    sigs = np.array([[7, 7, 1, 1], [7, 7, 2, 2], [7, 7, 3, 3],
+                     [7, 7, 2, 5], [8, 8, 4, 4]], dtype=np.uint32)
+
+    pairs = near_dedup.candidate_pairs(sigs, bands=2, rows=2)
+
+    assert [1, 3] in pairs.tolist()
+    assert near_dedup.similar_pairs(sigs, pairs, 0.7).tolist() == [[1, 3]]
+
+
+def test_large_buckets_are_capped():
+    sigs = np.zeros((10, 1), dtype=np.uint32)
+
+    pairs = near_dedup.candidate_pairs(sigs, bands=1, rows=1, cap=3)
+
+    # Each of the first 3 rows is paired with every row after it
+    assert len(pairs) == 9 + 8 + 7
+    assert pairs[:, 0].max() == 2
+
+
+def test_recall_and_precision():
+    rng = np.random.default_rng(0)
+    vocabulary = [''.join(rng.choice(list('abcdefghijklmnop'), 6))
+                  for _ in range(2000)]
+    originals = [' '.join(rng.choice(vocabulary, 8)) for _ in range(400)]
+    copies = []
+    for text in originals[:150]:
+        # One character changed
+        i = int(rng.integers(len(text)))
+        copies.append(text[:i] + 'z' + text[i + 1:])
+    df = pd.DataFrame({'t': originals + copies})
+
+    dropped = near_dedup.near_duplicated(df, threshold=0.8, workers=1)
+
+    assert not dropped[:400].any()
+    similar = [jaccard(original, copy) >= 0.85
+               for original, copy in zip(originals, copies)]
+    found = dropped[400:][similar]
+    assert found.mean() >= 0.95
+
+
+def test_exact_copies_keep_the_first():
+    df = pd.DataFrame({'t': ['Acme Corp', 'Beta LLC', 'ACME corp.',
+                             'Beta LLC', 'Gamma Inc']})
+
+    dropped = near_dedup.near_duplicated(df, threshold=0.9, workers=1)
+
+    assert dropped.tolist() == [False, False, True, True, False]
@@ -0,0 +1,56 @@
+"""Tests for chunked partial aggregation"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from partial_aggregate import aggregate_chunks
+
+
+def make_frame(rows=3000, seed=0):
+    """Two keys, a value column with gaps and a single-row group"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'g': rng.choice(['a', 'b', 'c', 'd'], rows),
+        'h': rng.integers(0, 3, rows),
+        'v': rng.normal(10, 3, rows),
+        'w': rng.integers(-5, 5, rows).astype(float),
+    })
+    df.loc[rng.random(rows) < 0.1, 'v'] = np.nan
+    return pd.concat([df, pd.DataFrame({'g': ['z'], 'h': [0],
+                                        'v': [1.0], 'w': [2.0]})],
+                     ignore_index=True)
+
+
+def chunks(df, rows):
+    """``df`` in pieces of ``rows`` rows"""
+    return [df.iloc[i:i + rows] for i in range(0, len(df), rows)]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_matches_groupby_agg(workers):
+    df = make_frame()
+    agg = {'v': ['count', 'sum', 'min', 'max', 'mean', 'var', 'std'],
+           'w': 'mean'}
+
+    result = aggregate_chunks(chunks(df, 170), ['g', 'h'], agg,
+                              workers=workers)
+
+    expected = df.groupby(['g', 'h']).agg(agg).reset_index()
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False,
+                                  check_column_type=False)
+
+
+def test_single_key_flat_columns():
+    df = make_frame(seed=1)
+    agg = {'v': 'std', 'w': 'sum'}
+
+    result = aggregate_chunks(chunks(df, 64), 'g', agg, workers=1)
+
+    expected = df.groupby('g').agg(agg).reset_index()
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_order_dependent_aggregate_rejected():
+    with pytest.raises(ValueError):
+        aggregate_chunks(chunks(make_frame(), 100), 'g', {'v': 'first'})
@@ -0,0 +1,57 @@
+"""Tests for query plan optimization"""
+
+import pandas as pd
+import pytest
+
+from query_plan import QueryPlan
+
+
+def make_plan(*steps):
+    """A plan over columns g and v with ``steps`` recorded"""
+    plan = QueryPlan(['g', 'v'])
+    for op, arg in steps:
+        plan.add(op, arg)
+    return plan
+
+
+def test_sort_kept_before_first():
+    df = pd.DataFrame({'g': ['a', 'a', 'b', 'b'], 'v': [2, 1, 4, 3]})
+    plan = make_plan(('sort', ('v', True)),
+                     ('aggregate', ('g', {'v': 'first'})))
+
+    steps = plan.optimize()
+
+    assert steps[0] == ('sort', ('v', True))
+    result = QueryPlan.apply(df, steps)
+    assert result['v'].tolist() == [1, 3]
+
+
+def test_sort_dropped_before_order_insensitive_aggregate():
+    plan = make_plan(('sort', ('v', True)),
+                     ('aggregate', ('g', {'v': ['sum', 'max']})))
+
+    assert [op for op, _ in plan.optimize()] == ['aggregate']
+
+
+def test_aggregate_without_mapping_needs_all_columns():
+    plan = QueryPlan(['g', 'v', 'w'])
+    plan.add('aggregate', ('g', 'sum'))
+
+    assert plan.required_columns() is None
+
+
+def test_select_of_dropped_column_still_fails():
+    df = pd.DataFrame({'g': ['a'], 'v': [1]})
+    plan = make_plan(('select', ['g']), ('select', ['v']))
+
+    steps = plan.optimize()
+
+    assert plan.required_columns() == ['g']
+    with pytest.raises(KeyError):
+        QueryPlan.apply(df, steps)
+
+
+def test_nested_selects_collapse():
+    plan = make_plan(('select', ['g', 'v']), ('select', ['v']))
+
+    assert plan.optimize() == [('select', ['v'])]
@@ -0,0 +1,98 @@
+"""Tests for converting several sheets of a workbook"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import format_converter
+
+
+def write_workbook(path, seed=0):
+    """Three sheets of different lengths; the last lacks a column"""
+    rng = np.random.default_rng(seed)
+    sheets = {}
+    for title, rows in (('Jan', 120), ('Feb 2', 45), ('Mar', 80)):
+        sheets[title] = pd.DataFrame({
+            'id': np.arange(rows),
+            'x': rng.normal(0, 1, rows).round(4),
+            'name': rng.choice(['a', 'b', 'ç'], rows),
+        })
+    sheets['Mar'] = sheets['Mar'].drop(columns='x').assign(
+        extra=lambda df: df['id'] * 2)
+    with pd.ExcelWriter(path) as writer:
+        for title, df in sheets.items():
+            df.to_excel(writer, sheet_name=title, index=False)
+
+
+def combined(sheets, sheet_column='sheet'):
+    """The sheets stacked in order, tagged with their titles"""
+    frames = [df.assign(**{sheet_column: title})
+              for title, df in sheets.items()]
+    df = pd.concat(frames, ignore_index=True)
+    return df[[sheet_column] + [c for c in df.columns if c != sheet_column]]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_file_per_sheet_matches_read_excel(tmp_path, workers):
+    path = tmp_path / 'in.xlsx'
+    write_workbook(path)
+
+    results = format_converter.convert_sheets(
+        path, tmp_path / 'out_{sheet}.csv', workers=workers, chunksize=30
+    )
+
+    expected = pd.read_excel(path, sheet_name=None)
+    assert [sheet for sheet, _, _ in results] == list(expected)
+    for sheet, output, rows in results:
+        assert output == str(tmp_path / f"out_{sheet}.csv")
+        assert rows == len(expected[sheet])
+        pd.testing.assert_frame_equal(pd.read_csv(output), expected[sheet])
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+@pytest.mark.parametrize('suffix', ['.csv', '.parquet'])
+def test_combined_output_matches_read_excel(tmp_path, workers, suffix):
+    path = tmp_path / 'in.xlsx'
+    write_workbook(path, seed=1)
+    output = tmp_path / ('out' + suffix)
+
+    assert format_converter.convert_file(path, output, workers=workers,
+                                         chunksize=25, sheets='all',
+                                         sheet_column='source')
+
+    expected = combined(pd.read_excel(path, sheet_name=None), 'source')
+    if suffix == '.csv':
+        df = pd.read_csv(output)
+    else:
+        df = pd.read_parquet(output)
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+
+
+def test_selected_sheets_with_condition(tmp_path):
+    path = tmp_path / 'in.xlsx'
+    write_workbook(path, seed=2)
+
+    format_converter.convert_sheets(path, tmp_path / 'out.csv',
+                                    sheets=['Mar', 'Jan'], workers=1,
+                                    usecols=['id', 'name'],
+                                    condition='id % 3 == 0')
+
+    sheets = pd.read_excel(path, sheet_name=['Mar', 'Jan'])
+    expected = combined({
+        title: df.query('id % 3 == 0')[['id', 'name']]
+        for title, df in sheets.items()
+    })
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'out.csv'),
+                                  expected)
+
+
+def test_bad_sheets_are_reported(tmp_path):
+    path = tmp_path / 'in.xlsx'
+    write_workbook(path)
+
+    with pytest.raises(ValueError, match='no sheet Apr'):
+        format_converter.convert_sheets(path, tmp_path / 'out.csv',
+                                        sheets=['Jan', 'Apr'])
+    with pytest.raises(ValueError, match="already have a 'name' column"):
+        format_converter.convert_sheets(path, tmp_path / 'out.csv',
+                                        workers=1, sheet_column='name')
@@ -0,0 +1,100 @@
+"""Tests for vectorized validation rules and the quarantine"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import validation
+from validation import REASONS_COLUMN, Rule, Validator
+
+
+def make_frame(rows=2000, seed=0):
+    """Rows breaking each kind of rule now and then"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'id': rng.integers(0, 1500, rows).astype(float),
+        'age': rng.integers(-10, 140, rows).astype(object),
+        'email': rng.choice(['a@b.com', 'bad', 'x@y.org', None], rows),
+        'status': rng.choice(['active', 'inactive', 'gone'], rows),
+        'start': rng.integers(0, 100, rows),
+        'end': rng.integers(0, 100, rows),
+    })
+    df.loc[rng.random(rows) < 0.05, 'id'] = np.nan
+    df.loc[rng.random(rows) < 0.02, 'age'] = 'n/a'
+    return df
+
+
+RULES = [
+    {'type': 'not_null', 'column': 'id'},
+    {'type': 'unique', 'column': 'id'},
+    {'type': 'range', 'column': 'age', 'min': 0, 'max': 120},
+    {'type': 'regex', 'column': 'email', 'pattern': r'[^@]+@[^@]+\.\w+'},
+    {'type': 'enum', 'column': 'status', 'values': ['active', 'inactive']},
+    {'type': 'compare', 'left': 'end', 'op': '>=', 'right': 'start'},
+    {'type': 'expression', 'expr': 'start < 90'},
+]
+
+
+def expected_masks(df):
+    """The rules above, one plain pandas expression each"""
+    age = pd.to_numeric(df['age'], errors='coerce')
+    email = df['email']
+    return {
+        'not_null:id': df['id'].isna(),
+        'unique:id': df['id'].notna() & df['id'].duplicated(),
+        'range:age': df['age'].notna() & ~age.between(0, 120),
+        'regex:email': email.notna() & ~email.fillna('').str.fullmatch(
+            r'[^@]+@[^@]+\.\w+'),
+        'enum:status': ~df['status'].isin(['active', 'inactive']),
+        'compare:end>=start': df['end'] < df['start'],
+        'expression:start < 90': ~(df['start'] < 90),
+    }
+
+
+@pytest.mark.parametrize('rule', RULES, ids=lambda rule: rule['type'])
+def test_rule_mask_matches_pandas(rule):
+    df = make_frame()
+    compiled = Rule(**rule)
+
+    mask = compiled.violations(df)
+
+    expected = expected_masks(df)[compiled.name]
+    assert mask.tolist() == expected.tolist()
+    assert 0 < mask.sum() < len(df)
+
+
+def test_chunked_quarantine_matches_whole_frame(tmp_path):
+    df = make_frame(seed=1)
+    path = tmp_path / 'in.csv'
+    df.to_csv(path, index=False)
+    whole = pd.read_csv(path)
+
+    validator = Validator.from_spec(RULES)
+    rows, quarantined = validation.validate_csv(
+        path, tmp_path / 'valid.csv', tmp_path / 'bad.csv', validator,
+        chunksize=170
+    )
+
+    valid, bad = Validator.from_spec(RULES).split(whole)
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'valid.csv'),
+                                  valid.reset_index(drop=True))
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'bad.csv'),
+                                  bad.reset_index(drop=True))
+    assert (rows, quarantined) == (len(whole), len(bad))
+
+
+def test_reasons_list_every_broken_rule():
+    df = make_frame(seed=2)
+    validator = Validator.from_spec(RULES)
+
+    valid, bad = validator.split(df)
+
+    masks = pd.DataFrame(expected_masks(df))
+    broken = masks.any(axis=1)
+    assert valid.index.tolist() == df.index[~broken].tolist()
+    assert bad.index.tolist() == df.index[broken].tolist()
+    expected = masks[broken].apply(
+        lambda row: ';'.join(row.index[row]), axis=1
+    )
+    assert bad[REASONS_COLUMN].tolist() == expected.tolist()
+    assert validator.counts == masks.sum().to_dict()
@@ -0,0 +1,71 @@
+"""Tests for zone map pruning"""
+
+import os
+
+import pandas as pd
+import pytest
+
+import csv_processor
+import zone_map
+
+
+CONDITIONS = [
+    'ts < "2026-1"',
+    'ts >= "2026-06-01"',
+    'ts == "2026-07-15"',
+    'name > "m"',
+    'name in ["b", "zz"]',
+    'n > 150 and ts < "2026-07"',
+    'x <= 0.5 or name == "c"',
+]
+
+
+@pytest.fixture
+def indexed(tmp_path):
+    """An append-ordered file with a zone map of many small blocks"""
+    path = tmp_path / 'd.csv'
+    pd.DataFrame({
+        'ts': [f"2026-{month:02d}-{day:02d}"
+               for month in range(5, 9) for day in range(1, 26)] * 2,
+        'name': ['a', 'b', 'c', 'm', 'n'] * 40,
+        'n': range(200),
+        'x': [0.5, None, 1.5, 2.0] * 50,
+    }).to_csv(path, index=False)
+    zone_map.build_index(path, block_mb=0.0005, workers=1)
+    return path
+
+
+@pytest.mark.parametrize('condition', CONDITIONS)
+def test_pruned_blocks_give_unpruned_result(indexed, condition):
+    index = zone_map.load_index(indexed)
+    assert len(index['blocks']) > 4
+    expected = pd.read_csv(indexed).query(condition)
+
+    ranges = zone_map.matching_blocks(index, condition)
+    result = zone_map.read_blocks(indexed, ranges, workers=1).query(
+        condition
+    )
+
+    assert result.reset_index(drop=True).equals(
+        expected.reset_index(drop=True)
+    )
+
+
+def filtered(path, output, parse_dates):
+    """Run a lazy ``csv_processor`` filter and return the written CSV"""
+    processor = csv_processor.CSVProcessor(str(path), lazy=True, workers=1,
+                                           parse_dates=parse_dates)
+    processor.filter_rows('ts < "2026-1" or ts > "2026-08-20"')
+    processor.save(str(output))
+    return output.read_text()
+
+
+@pytest.mark.parametrize('parse_dates', [False, True])
+def test_processor_output_same_with_zone_map(tmp_path, indexed,
+                                             parse_dates):
+    pruned = filtered(indexed, tmp_path / 'pruned.csv', parse_dates)
+    os.remove(zone_map.index_path(indexed))
+    plain = filtered(indexed, tmp_path / 'plain.csv', parse_dates)
+
+    assert pruned == plain
+    assert len(plain.splitlines()) > 1
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Top N - Bounded-memory top-N selection over streamed chunks
+"""
+
+import pandas as pd
+
+
+class TopNCollector:
+    """Keep the first ``n`` rows of a sort order across streamed chunks
+
+    The result equals ``df.sort_values(by, ascending=ascending,
+    kind='mergesort').head(n)`` over all chunks, but only ``n`` rows plus
+    one chunk's candidates are ever held.  Candidates are selected with
+    ``nlargest``/``nsmallest`` (a partial selection, O(rows log n)) when
+    every key sorts the same way, and then merged with the running top.
+    """
+
+    def __init__(self, by, ascending=True, n=10):
+        """Initialize collector"""
+        self.by = by if isinstance(by, list) else [by]
+        if isinstance(ascending, (list, tuple)):
+            self.ascending = list(ascending)
+        else:
+            self.ascending = [ascending] * len(self.by)
+        self.n = n
+        self.top = None
+
+    def candidates(self, chunk):
+        """Rows of ``chunk`` that could make the top ``n``"""
+        if len(chunk) <= self.n:
+            return chunk
+        if len(set(self.ascending)) != 1:
+            return self.sort(chunk).head(self.n)
+        if not chunk.index.is_unique:
+            chunk = chunk.reset_index(drop=True)
+
+        try:
+            pick = chunk.nsmallest if self.ascending[0] else chunk.nlargest
+            best = pick(self.n, self.by, keep='all')
+        except TypeError:
+            # nlargest/nsmallest only handle numeric and datetime keys
+            return self.sort(chunk).head(self.n)
+
+        # They also drop NaN keys, which a sort puts last, so keep the
+        # first n rows with a missing key as candidates too
+        nulls = chunk[self.by].isna().any(axis=1)
+        keep = chunk.index.isin(best.index) | (
+            nulls & (nulls.cumsum() <= self.n)
+        )
+        return chunk[keep]
+
+    def sort(self, df):
+        """Stable sort on the collector's keys"""
+        return df.sort_values(by=self.by, ascending=self.ascending,
+                              kind='mergesort')
+
+    def add(self, chunk):
+        """Fold a chunk into the running top ``n``"""
+        if chunk.empty and self.top is not None:
+            return
+        found = self.candidates(chunk)
+        if self.top is not None:
+            found = pd.concat([self.top, found], ignore_index=True)
+        self.top = self.sort(found).head(self.n).reset_index(drop=True)
+
+    def result(self):
+        """Return the top ``n`` rows in sort order"""
+        return self.top
+
+
+def top_n(df, by, n, ascending=True):
+    """Top ``n`` rows of a single frame without sorting all of it"""
+    collector = TopNCollector(by, ascending, n)
+    collector.add(df)
+    return collector.result()
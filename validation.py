@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Validation - Vectorized rule checks with a quarantine for failing rows
+"""
+
+import operator
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+import cleaning_recipe
+import compressed_io
+import csv_schema
+import dedup
+
+
+# Column of the quarantine file listing the rules a row broke
+REASONS_COLUMN = '_violations'
+
+COMPARISONS = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt,
+    '>=': operator.ge, '==': operator.eq, '!=': operator.ne,
+}
+
+RULE_TYPES = ('not_null', 'range', 'regex', 'enum', 'unique', 'compare',
+              'expression')
+
+
+class Rule:
+    """One validation rule, compiled to a vectorized violation mask
+
+    Types: ``not_null``, ``range`` (``min``/``max``; non-numeric values
+    fail), ``regex`` (the whole value must match ``pattern``), ``enum``
+    (``values``), ``unique`` (over ``columns``, across all chunks; the
+    first occurrence passes), ``compare`` (``left`` ``op`` ``right``,
+    where ``right`` is a column, or ``value`` a constant) and
+    ``expression`` (a ``DataFrame.eval`` condition every row must
+    satisfy).  Missing values only fail ``not_null`` and ``expression``.
+    """
+
+    def __init__(self, type, column=None, columns=None, name=None,
+                 min=None, max=None, pattern=None, values=None, left=None,
+                 op=None, right=None, value=None, expr=None):
+        """Initialize and check a rule"""
+        if type not in RULE_TYPES:
+            raise ValueError(f"Unknown rule type '{type}' "
+                             f"(use one of: {', '.join(RULE_TYPES)})")
+        self.type = type
+        self.columns = list(columns) if columns else (
+            [column] if column is not None else []
+        )
+        self.min, self.max = min, max
+        self.values = values
+        self.left, self.right, self.value = left, right, value
+        self.expr = expr
+        self.pattern = None
+        self.seen = None
+
+        needs_column = type in ('not_null', 'range', 'regex', 'enum',
+                                'unique')
+        if needs_column and not self.columns:
+            raise ValueError(f"A {type} rule needs a column")
+        if type == 'range' and min is None and max is None:
+            raise ValueError("A range rule needs min and/or max")
+        if type == 'regex':
+            self.pattern = re.compile(pattern)
+        if type == 'enum' and not values:
+            raise ValueError("An enum rule needs values")
+        if type == 'unique':
+            self.seen = dedup.HashSet()
+        if type == 'compare':
+            if op not in COMPARISONS or left is None or (
+                right is None and value is None
+            ):
+                raise ValueError("A compare rule needs left, op (one of "
+                                 f"{' '.join(COMPARISONS)}) and right "
+                                 "or value")
+            self.op = COMPARISONS[op]
+        if type == 'expression' and not expr:
+            raise ValueError("An expression rule needs expr")
+
+        if name is None:
+            if type == 'compare':
+                subject = f"{left}{op}{right if value is None else value}"
+            elif type == 'expression':
+                subject = expr
+            else:
+                subject = ','.join(self.columns)
+            name = f"{type}:{subject}"
+        self.name = name
+
+    def violations(self, chunk):
+        """Boolean array: which rows of ``chunk`` break the rule"""
+        return getattr(self, 'check_' + self.type)(chunk)
+
+    def check_not_null(self, chunk):
+        return chunk[self.columns].isna().any(axis=1).to_numpy()
+
+    def check_range(self, chunk):
+        series = chunk[self.columns[0]]
+        present = series.notna().to_numpy()
+        if not (pd.api.types.is_numeric_dtype(series.dtype)
+                or pd.api.types.is_datetime64_any_dtype(series.dtype)):
+            series = pd.to_numeric(series, errors='coerce')
+        bad = np.zeros(len(chunk), dtype=bool)
+        if self.min is not None:
+            bad |= (series < self.min).to_numpy()
+        if self.max is not None:
+            bad |= (series > self.max).to_numpy()
+        # Values that did not parse as numbers fail too
+        bad |= present & series.isna().to_numpy()
+        return bad
+
+    def check_regex(self, chunk):
+        series = chunk[self.columns[0]]
+        present = series.notna()
+        matched = series[present].astype(str).str.fullmatch(self.pattern)
+        bad = np.zeros(len(chunk), dtype=bool)
+        bad[present.to_numpy()] = ~matched.to_numpy(dtype=bool)
+        return bad
+
+    def check_enum(self, chunk):
+        series = chunk[self.columns[0]]
+        return (series.notna() & ~series.isin(self.values)).to_numpy()
+
+    def check_unique(self, chunk):
+        present = chunk[self.columns].notna().all(axis=1).to_numpy()
+        bad = np.zeros(len(chunk), dtype=bool)
+        hashes = dedup.row_hashes(chunk[present], self.columns)
+        bad[present] = ~self.seen.first_seen(hashes)
+        return bad
+
+    def check_compare(self, chunk):
+        left = chunk[self.left]
+        right = chunk[self.right] if self.value is None else self.value
+        present = left.notna()
+        if self.value is None:
+            present &= right.notna()
+        return (present & ~self.op(left, right)).to_numpy()
+
+    def check_expression(self, chunk):
+        result = pd.Series(chunk.eval(self.expr), index=chunk.index)
+        return ~result.fillna(False).to_numpy(dtype=bool)
+
+
+class Validator:
+    """A rule set evaluated in one pass per chunk
+
+    Every rule yields a violation mask; rows with any violation are split
+    off with the names of the rules they broke.  Violations and time are
+    counted per rule.
+    """
+
+    def __init__(self, rules):
+        """Initialize from Rule objects, making their names unique"""
+        self.rules = rules
+        names = set()
+        for i, rule in enumerate(rules):
+            if rule.name in names:
+                rule.name = f"{rule.name}#{i + 1}"
+            names.add(rule.name)
+        self.rows = 0
+        self.quarantined = 0
+        self.counts = {rule.name: 0 for rule in rules}
+        self.timings = {rule.name: 0.0 for rule in rules}
+
+    @classmethod
+    def from_spec(cls, spec):
+        """Build from a list of rule dicts, or ``{"rules": [...]}``"""
+        if isinstance(spec, dict):
+            spec = spec.get('rules')
+        if not spec:
+            raise ValueError("A rule set needs a non-empty list of rules")
+        return cls([Rule(**rule) for rule in spec])
+
+    def check(self, chunk):
+        """``(bad, reasons)`` for a chunk
+
+        ``bad`` marks the rows that break any rule and ``reasons`` lists,
+        for each of them, the broken rules as ``"not_null:id;range:age"``.
+        """
+        masks = []
+        for rule in self.rules:
+            start = time.perf_counter()
+            mask = rule.violations(chunk)
+            self.timings[rule.name] += time.perf_counter() - start
+            self.counts[rule.name] += int(mask.sum())
+            masks.append(mask)
+        self.rows += len(chunk)
+
+        matrix = np.column_stack(masks)
+        bad = matrix.any(axis=1)
+        self.quarantined += int(bad.sum())
+        names = [rule.name + ';' for rule in self.rules]
+        # bool x str products concatenate the names of the broken rules
+        reasons = matrix[bad].astype(object).dot(
+            np.array(names, dtype=object)
+        )
+        return bad, [r.rstrip(';') for r in reasons]
+
+    def split(self, chunk):
+        """``(valid, quarantined)`` rows of a chunk
+
+        The quarantined rows get a REASONS_COLUMN from ``check``.
+        """
+        bad, reasons = self.check(chunk)
+        return chunk[~bad], chunk[bad].assign(**{REASONS_COLUMN: reasons})
+
+    def report(self):
+        """Print violation counts and timings per rule"""
+        print(f"\n🔎 Validation: {self.quarantined} of {self.rows} rows "
+              "quarantined")
+        for rule in self.rules:
+            print(f"  {rule.name:<40}{self.counts[rule.name]:>10} rows"
+                  f"{self.timings[rule.name]:8.2f}s")
+
+
+def load_rules(path):
+    """Read a rule set from a JSON file, or YAML if PyYAML is installed"""
+    return Validator.from_spec(cleaning_recipe.read_document(path))
+
+
+def validate_csv(input_file, output_file, quarantine_file, validator,
+                 chunksize=100000, encoding='utf-8'):
+    """Split a CSV into valid rows and quarantined rows, chunk by chunk
+
+    Returns ``(rows, quarantined)``.
+    """
+    with compressed_io.open_write(output_file, encoding) as out, \
+            compressed_io.open_write(quarantine_file, encoding) as bad:
+        chunks = csv_schema.read_csv(input_file, encoding=encoding,
+                                     chunksize=chunksize, parse_dates=False)
+        for i, chunk in enumerate(chunks):
+            valid, quarantined = validator.split(chunk)
+            valid.to_csv(out, index=False, header=(i == 0))
+            quarantined.to_csv(bad, index=False, header=(i == 0))
+        if validator.rows == 0:
+            header = pd.read_csv(input_file, encoding=encoding, nrows=0)
+            header.to_csv(out, index=False)
+            header.assign(**{REASONS_COLUMN: []}).to_csv(bad, index=False)
+    return validator.rows, validator.quarantined
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Zone Map - Per-block min/max index so filters can skip parts of a CSV
+"""
+
+import argparse
+import ast
+import json
+import math
+import os
+import io
+import re
+import sys
+import tokenize
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import csv_schema
+import parallel_reader
+
+
+INDEX_SUFFIX = '.zonemap.json'
+DEFAULT_BLOCK_MB = 8
+
+BACKTICKED = re.compile(r'`([^`]+)`')
+
+
+def index_path(csv_path):
+    """Return the zone map sidecar path for a CSV file"""
+    return str(csv_path) + INDEX_SUFFIX
+
+
+def column_stats(series):
+    """Return ``(kind, stats)`` for one column of a block
+
+    Numeric, datetime and text columns are indexed; anything else returns
+    ``(None, None)``.  Text keeps its own min/max, since the loaders read
+    it as strings and ``DataFrame.query`` compares it lexically; text
+    that is all ISO-8601 dates is marked 'date' so it can be left out
+    when dates are parsed.
+    """
+    nulls = int(series.isna().sum())
+    values = series.dropna()
+
+    if (pd.api.types.is_numeric_dtype(series.dtype)
+            and not pd.api.types.is_bool_dtype(series.dtype)):
+        kind = 'number'
+    elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+        kind = 'datetime'
+    elif len(values) and pd.api.types.infer_dtype(values) == 'string':
+        kind = 'date' if values.str.match(csv_schema.ISO_DATE).all() else (
+            'text'
+        )
+    else:
+        return None, None
+
+    if not len(values):
+        return None, {'min': None, 'max': None, 'nulls': nulls}
+    low, high = values.min(), values.max()
+    if kind == 'datetime':
+        low, high = low.isoformat(), high.isoformat()
+    elif kind == 'number':
+        low = low.item() if hasattr(low, 'item') else low
+        high = high.item() if hasattr(high, 'item') else high
+        if isinstance(low, float) and (math.isinf(low) or math.isinf(high)):
+            return None, None
+    return kind, {'min': low, 'max': high, 'nulls': nulls}
+
+
+def block_stats(path, start, end, names, kwargs):
+    """Parse one block and return its row count and per-column stats"""
+    df = parallel_reader.parse_range(path, start, end, names, kwargs)
+    stats = {}
+    for column in df.columns:
+        kind, values = column_stats(df[column])
+        if values is not None:
+            stats[column] = {'kind': kind, **values}
+    return {'start': start, 'end': end, 'rows': len(df), 'stats': stats}
+
+
+def build_index(csv_path, block_mb=DEFAULT_BLOCK_MB, encoding='utf-8',
+                workers=None):
+    """Scan a CSV once and write its zone map sidecar
+
+    Blocks are newline-aligned byte ranges of about ``block_mb``; they
+    are parsed on a process pool.  A column is indexed only if every
+    block with values agrees on its kind.
+    """
+    size = os.path.getsize(csv_path)
+    parts = max(1, math.ceil(size / (block_mb * 1024 * 1024)))
+    _, ranges = parallel_reader.split_ranges(csv_path, parts)
+    names, kwargs, _ = parallel_reader.range_kwargs(csv_path, encoding)
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(ranges) < 2:
+        blocks = [block_stats(csv_path, start, end, names, kwargs)
+                  for start, end in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            blocks = list(executor.map(
+                block_stats,
+                [csv_path] * len(ranges),
+                [start for start, _ in ranges],
+                [end for _, end in ranges],
+                [names] * len(ranges),
+                [kwargs] * len(ranges),
+            ))
+
+    kinds = {}
+    for column in names:
+        seen = {block['stats'][column]['kind']
+                for block in blocks if column in block['stats']}
+        seen.discard(None)
+        complete = all(column in block['stats'] for block in blocks)
+        if complete and len(seen) == 1:
+            kinds[column] = seen.pop()
+
+    for block in blocks:
+        block['stats'] = {
+            column: {k: v for k, v in stats.items() if k != 'kind'}
+            for column, stats in block['stats'].items() if column in kinds
+        }
+
+    index = {
+        'source': csv_schema.fingerprint(csv_path),
+        'encoding': encoding,
+        'columns': kinds,
+        'blocks': blocks,
+    }
+    tmp = index_path(csv_path) + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    os.replace(tmp, index_path(csv_path))
+    return index
+
+
+def load_index(csv_path):
+    """Return the zone map if it exists and matches the file, else None"""
+    try:
+        with open(index_path(csv_path), encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get('source') != csv_schema.fingerprint(csv_path):
+        return None
+    return index
+
+
+class Pruner:
+    """Decide from block min/max whether a query condition can match
+
+    The condition is parsed with Python's ``ast`` (the ``DataFrame.query``
+    grammar is a subset of Python expressions).  Only comparisons between
+    an indexed column and a literal, combined with and/or/&/|, are used
+    for pruning; anything else is assumed to match.  Datetime columns
+    compare as timestamps, with strict bounds widened so a literal that
+    parses to a block's bound is never ruled out; text and date columns
+    compare as strings.
+    """
+
+    FLIP = {ast.Gt: ast.Lt, ast.GtE: ast.LtE, ast.Lt: ast.Gt,
+            ast.LtE: ast.GtE, ast.Eq: ast.Eq, ast.NotEq: ast.NotEq}
+
+    def __init__(self, condition, kinds):
+        """Parse ``condition`` for columns of the given kinds"""
+        self.kinds = kinds
+        self.aliases = {}
+
+        def alias(match):
+            name = f"__zm_col{len(self.aliases)}"
+            self.aliases[name] = match.group(1)
+            return name
+
+        try:
+            self.tree = ast.parse(
+                self.as_python(BACKTICKED.sub(alias, condition)), mode='eval'
+            ).body
+        except (SyntaxError, tokenize.TokenError):
+            self.tree = None
+
+    @staticmethod
+    def as_python(condition):
+        """Rewrite &, | and ~ as and, or and not
+
+        ``DataFrame.query`` gives them boolean-operator precedence, so
+        ``a > 1 & b < 2`` means ``(a > 1) and (b < 2)``.
+        """
+        words = {'&': 'and', '|': 'or', '~': 'not'}
+        readline = io.StringIO(condition).readline
+        tokens = [
+            (tokenize.NAME, words[tok.string])
+            if tok.type == tokenize.OP and tok.string in words
+            else (tok.type, tok.string)
+            for tok in tokenize.generate_tokens(readline)
+        ]
+        return tokenize.untokenize(tokens)
+
+    def may_match(self, stats):
+        """True unless the block's stats rule the condition out"""
+        if self.tree is None:
+            return True
+        return self.check(self.tree, stats)
+
+    def check(self, node, stats):
+        """Evaluate one expression node against a block"""
+        if isinstance(node, ast.BoolOp):
+            results = [self.check(value, stats) for value in node.values]
+            return all(results) if isinstance(node.op, ast.And) else any(
+                results
+            )
+        if isinstance(node, ast.Compare):
+            operands = [node.left] + node.comparators
+            return all(
+                self.compare(operands[i], op, operands[i + 1], stats)
+                for i, op in enumerate(node.ops)
+            )
+        return True
+
+    def column(self, node):
+        """Column name for a Name node, or None"""
+        if isinstance(node, ast.Name):
+            name = self.aliases.get(node.id, node.id)
+            if name in self.kinds:
+                return name
+        return None
+
+    @staticmethod
+    def literal(node):
+        """Python value of a literal node, or raise ValueError"""
+        return ast.literal_eval(node)
+
+    def compare(self, left, op, right, stats):
+        """Can ``left op right`` hold for some row of the block?"""
+        column = self.column(left)
+        if column is None:
+            column, left, right = self.column(right), right, left
+            if column is None or type(op) not in self.FLIP:
+                return True
+            op = self.FLIP[type(op)]()
+        if column not in stats:
+            return True
+
+        try:
+            value = self.literal(right)
+        except (ValueError, SyntaxError, TypeError):
+            return True
+
+        block = stats[column]
+        if block['min'] is None:
+            # Only nulls: NaN compares False except for != / not in
+            return isinstance(op, (ast.NotEq, ast.NotIn))
+
+        try:
+            low, high, values = self.coerce(self.kinds[column], block,
+                                            value, op)
+            if isinstance(op, ast.In):
+                return any(low <= v <= high for v in values)
+            if isinstance(op, ast.NotIn):
+                return True
+            v = values[0]
+            if self.kinds[column] == 'datetime':
+                op = {ast.Gt: ast.GtE, ast.Lt: ast.LtE}.get(type(op),
+                                                            type(op))()
+            if isinstance(op, ast.Gt):
+                return high > v
+            if isinstance(op, ast.GtE):
+                return high >= v
+            if isinstance(op, ast.Lt):
+                return low < v
+            if isinstance(op, ast.LtE):
+                return low <= v
+            if isinstance(op, ast.Eq):
+                return low <= v <= high
+            if isinstance(op, ast.NotEq):
+                return not (low == high == v and block['nulls'] == 0)
+        except (TypeError, ValueError):
+            pass
+        return True
+
+    @staticmethod
+    def coerce(kind, block, value, op):
+        """Bring block bounds and literal(s) to comparable types"""
+        values = list(value) if isinstance(op, (ast.In, ast.NotIn)) else [
+            value
+        ]
+        if kind == 'datetime':
+            if not all(isinstance(v, str) for v in values):
+                raise TypeError("date column compared to non-string")
+            return (pd.Timestamp(block['min']), pd.Timestamp(block['max']),
+                    [pd.Timestamp(v) for v in values])
+        if kind in ('text', 'date'):
+            if not all(isinstance(v, str) for v in values):
+                raise TypeError("text column compared to non-string")
+            return block['min'], block['max'], values
+        if not all(isinstance(v, (int, float)) and not isinstance(v, bool)
+                   for v in values):
+            raise TypeError("numeric column compared to non-number")
+        return block['min'], block['max'], values
+
+
+def matching_blocks(index, condition, parse_dates=False):
+    """Byte ranges of the blocks that may satisfy ``condition``
+
+    With ``parse_dates`` the date columns are read as datetimes, which
+    their string bounds say nothing about, so they are not used.
+    """
+    kinds = {column: kind for column, kind in index['columns'].items()
+             if not (parse_dates and kind == 'date')}
+    pruner = Pruner(condition, kinds)
+    return [
+        (block['start'], block['end'])
+        for block in index['blocks']
+        if block['rows'] and pruner.may_match(block['stats'])
+    ]
+
+
+def iter_blocks(csv_path, ranges, usecols=None, encoding='utf-8',
+                parse_dates=False, categories=False):
+    """Parse and yield the given byte ranges one at a time
+
+    ``parse_dates`` and ``categories`` are as in ``csv_schema.read_csv``.
+    """
+    names, kwargs, fresh = parallel_reader.range_kwargs(
+        csv_path, encoding, usecols, parse_dates, categories
+    )
+    if not fresh and (parse_dates or categories):
+        kwargs.update(csv_schema.read_kwargs(
+            csv_schema.current_schema(csv_path, encoding), usecols,
+            parse_dates, categories
+        ))
+    for start, end in ranges:
+        yield parallel_reader.parse_range(csv_path, start, end, names,
+                                          kwargs)
+
+
+def read_blocks(csv_path, ranges, usecols=None, encoding='utf-8',
+                workers=None, parse_dates=False, categories=False):
+    """Parse the given byte ranges in parallel into one frame"""
+    names, kwargs, fresh = parallel_reader.range_kwargs(
+        csv_path, encoding, usecols, parse_dates, categories
+    )
+    if not ranges:
+        return pd.read_csv(csv_path, encoding=encoding, nrows=0,
+                           usecols=usecols)
+    parts = parallel_reader.parse_ranges(csv_path, ranges, names, kwargs,
+                                         workers)
+    df = pd.concat(parts, ignore_index=True)
+    if not fresh and (parse_dates or categories):
+        csv_schema.apply_candidates(
+            df, csv_schema.schema_from_frame(df, csv_path), parse_dates,
+            categories
+        )
+    return df
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(
+        description='Build a min/max zone map index for a CSV file'
+    )
+    parser.add_argument('input', help='Input CSV file')
+    parser.add_argument('--block-mb', type=float, default=DEFAULT_BLOCK_MB,
+                        help=f'Block size in MB (default: {DEFAULT_BLOCK_MB})')
+    parser.add_argument('--encoding', default='utf-8',
+                        help='File encoding (default: utf-8)')
+    parser.add_argument('--workers', type=int,
+                        help='Processes for the scan (default: CPU count)')
+    parser.add_argument('--explain', metavar='CONDITION',
+                        help='Show how many blocks a filter would scan')
+
+    args = parser.parse_args()
+
+    try:
+        index = build_index(args.input, args.block_mb, args.encoding,
+                            args.workers)
+    except Exception as e:
+        print(f"❌ Error building index: {e}")
+        sys.exit(1)
+
+    print(f"✅ Indexed {len(index['blocks'])} blocks of {args.input}")
+    for column, kind in index['columns'].items():
+        print(f"  {column}: {kind}")
+
+    if args.explain:
+        ranges = matching_blocks(index, args.explain)
+        print(f"🔍 {args.explain}: scans {len(ranges)} of "
+              f"{len(index['blocks'])} blocks")
+
+
+if __name__ == "__main__":
+    main()